@@ -8,8 +8,8 @@ struct SymbolInfo: Encodable {
     let symbolName: String
     let symbolKind: String
     let typeSignature: String
-    let calls_out: [String]
-    let references: [String]
+    var calls_out: [String]
+    var references: [String]
     let conforms: [String]
     let attributes: [String]
 
@@ -78,48 +78,96 @@ func qualTypeName(stack: [String], currentType: String?) -> String {
 }
 
 
-// MARK: - Body scan visitor
-final class BodyVisitor: SyntaxVisitor {
-    var calls: [String] = []
-    var refs: [String] = []
+// MARK: - Main Visitor
+// 트리를 한 번만 순회하며 심볼과 본문 신호(calls/refs)를 함께 수집합니다.
+// 함수 본문이나 접근자 블록에 들어가면 스코프를 쌓고, 그 안에서 만난 호출/참조를 맨 위 스코프에 기록합니다.
+// 블록을 빠져나올 때(visitPost) 미리 자리를 잡아둔 심볼에 결과를 채우고, 부모 스코프에 합쳐서
+// 바깥 함수도 중첩된 함수/클로저의 신호를 포함하게 합니다 (기존의 본문 재순회와 동일한 결과).
+private struct SignalScope {
+    let id: SyntaxIdentifier
+    let symbolIndices: [Int]
+    var calls: Set<String> = []
+    var refs: Set<String> = []
+}
+
+final class SymbolCollector: SyntaxVisitor {
+    private var typeStack: [String] = []
+    private var scopes: [SignalScope] = []
+    // 스코프가 될 노드 id -> 결과를 채울 심볼 인덱스
+    private var pendingScopes: [SyntaxIdentifier: [Int]] = [:]
+    var symbols: [SymbolInfo] = []
+
+    // SwiftSyntax API 변경에 따라 'SyntaxTreeViewMode'를 사용하도록 수정
+    override init(viewMode: SyntaxTreeViewMode) {
+        super.init(viewMode: viewMode)
+    }
+
+    // MARK: Scopes
+    private func openScope(_ id: SyntaxIdentifier) {
+        if let indices = pendingScopes.removeValue(forKey: id) {
+            scopes.append(SignalScope(id: id, symbolIndices: indices))
+        }
+    }
+
+    private func closeScope(_ id: SyntaxIdentifier) {
+        guard let scope = scopes.last, scope.id == id else { return }
+        scopes.removeLast()
+
+        let calls = scope.calls.sorted()
+        let refs = scope.refs.sorted()
+        for index in scope.symbolIndices {
+            symbols[index].calls_out = calls
+            symbols[index].references = refs
+        }
+
+        if !scopes.isEmpty {
+            scopes[scopes.count - 1].calls.formUnion(scope.calls)
+            scopes[scopes.count - 1].refs.formUnion(scope.refs)
+        }
+    }
+
+    override func visit(_ node: CodeBlockSyntax) -> SyntaxVisitorContinueKind {
+        openScope(node.id)
+        return .visitChildren
+    }
+
+    override func visitPost(_ node: CodeBlockSyntax) {
+        closeScope(node.id)
+    }
+
+    override func visit(_ node: AccessorBlockSyntax) -> SyntaxVisitorContinueKind {
+        openScope(node.id)
+        return .visitChildren
+    }
+
+    override func visitPost(_ node: AccessorBlockSyntax) {
+        closeScope(node.id)
+    }
 
+    // MARK: Body signals
     override func visit(_ node: FunctionCallExprSyntax) -> SyntaxVisitorContinueKind {
+        guard !scopes.isEmpty else { return .visitChildren }
         if let calledExpr = node.calledExpression.as(DeclReferenceExprSyntax.self) {
-            calls.append(calledExpr.baseName.text)
+            scopes[scopes.count - 1].calls.insert(calledExpr.baseName.text)
         } else if let memberAccess = node.calledExpression.as(MemberAccessExprSyntax.self) {
-            calls.append(memberAccess.declName.baseName.text)
+            scopes[scopes.count - 1].calls.insert(memberAccess.declName.baseName.text)
         }
         return .visitChildren
     }
 
     override func visit(_ node: DeclReferenceExprSyntax) -> SyntaxVisitorContinueKind {
-        refs.append(node.baseName.text)
+        if !scopes.isEmpty {
+            scopes[scopes.count - 1].refs.insert(node.baseName.text)
+        }
         return .visitChildren
     }
 
     override func visit(_ node: MemberAccessExprSyntax) -> SyntaxVisitorContinueKind {
-        refs.append(node.declName.baseName.text)
+        if !scopes.isEmpty {
+            scopes[scopes.count - 1].refs.insert(node.declName.baseName.text)
+        }
         return .visitChildren
     }
-}
-
-private func scanBodySignals(_ syntax: Syntax) -> (calls:[String], refs:[String]) {
-    let v = BodyVisitor(viewMode: .sourceAccurate)
-    v.walk(syntax)
-    func uniq(_ a:[String]) -> [String] { Array(Set(a)).sorted() }
-    return (uniq(v.calls), uniq(v.refs))
-}
-
-
-// MARK: - Main Visitor
-final class SymbolCollector: SyntaxVisitor {
-    private var typeStack: [String] = []
-    var symbols: [SymbolInfo] = []
-
-    // SwiftSyntax API 변경에 따라 'SyntaxTreeViewMode'를 사용하도록 수정
-    override init(viewMode: SyntaxTreeViewMode) {
-        super.init(viewMode: viewMode)
-    }
 
     // MARK: Type Decls
     override func visit(_ node: ClassDeclSyntax) -> SyntaxVisitorContinueKind {
@@ -165,42 +213,57 @@ final class SymbolCollector: SyntaxVisitor {
         let qualBase = qualTypeName(stack: typeStack, currentType: nil)
         let qualName = (qualBase.isEmpty ? "" : "\(qualBase).") + name
 
-        let bodySyntax: Syntax = node.body.map { Syntax($0) } ?? Syntax(node)
-        let (calls, refs) = scanBodySignals(bodySyntax)
-
+        // calls/refs는 본문을 빠져나올 때 채움 (본문이 없으면 선언 전체가 스코프)
         let info = SymbolInfo(
             symbolName: "\(qualName)(\(sig))",
             symbolKind: "method",
             typeSignature: sig,
-            calls_out: calls,
-            references: refs,
+            calls_out: [],
+            references: [],
             conforms: [],
             attributes: collectAttributes(node.attributes)
         )
         symbols.append(info)
+
+        if let body = node.body {
+            pendingScopes[body.id] = [symbols.count - 1]
+        } else {
+            pendingScopes[node.id] = [symbols.count - 1]
+            openScope(node.id)
+        }
         return .visitChildren
     }
 
+    override func visitPost(_ node: FunctionDeclSyntax) {
+        closeScope(node.id)
+    }
+
     override func visit(_ node: VariableDeclSyntax) -> SyntaxVisitorContinueKind {
         let sig = varTypeSignature(node)
         let names = propertyNames(node)
-        let (calls, refs) = node.bindings.first?.accessorBlock.map { scanBodySignals(Syntax($0)) } ?? ([], [])
         let qualPrefix = qualTypeName(stack: typeStack, currentType: nil)
         let isGlobal = typeStack.isEmpty
         let kind = isGlobal ? "variable" : "property"
 
+        var indices: [Int] = []
         for n in names {
             let qn = (qualPrefix.isEmpty ? "" : "\(qualPrefix).") + n
             let info = SymbolInfo(
                 symbolName: qn,
                 symbolKind: kind,
                 typeSignature: sig,
-                calls_out: calls,
-                references: refs,
+                calls_out: [],
+                references: [],
                 conforms: [],
                 attributes: collectAttributes(node.attributes)
             )
             symbols.append(info)
+            indices.append(symbols.count - 1)
+        }
+
+        // 첫 번째 바인딩의 접근자 블록만 calls/refs의 대상
+        if let accessorBlock = node.bindings.first?.accessorBlock {
+            pendingScopes[accessorBlock.id] = indices
         }
         return .visitChildren
     }
@@ -208,10 +271,7 @@ final class SymbolCollector: SyntaxVisitor {
 
 
 // MARK: - Runner
-func analyzeSwiftFile(path: String) -> [SymbolInfo] {
-    guard let source = try? String(contentsOfFile: path, encoding: .utf8) else {
-        return []
-    }
+func analyzeSource(_ source: String) -> [SymbolInfo] {
     let tree = Parser.parse(source: source)
     // SwiftSyntax API 변경에 따라 'SyntaxTreeViewMode'를 사용하도록 수정
     let collector = SymbolCollector(viewMode: .sourceAccurate)
@@ -219,18 +279,199 @@ func analyzeSwiftFile(path: String) -> [SymbolInfo] {
     return collector.symbols
 }
 
+func analyzeSwiftFile(path: String) -> [SymbolInfo] {
+    guard let source = try? String(contentsOfFile: path, encoding: .utf8) else {
+        return []
+    }
+    return analyzeSource(source)
+}
+
+// --compact: 들여쓰기 없이 한 줄로 출력 (Python 쪽에서 파싱만 하고 포맷은 데이터셋 조립 시 한 번만 수행)
+func makeEncoder(compact: Bool = false) -> JSONEncoder {
+    let encoder = JSONEncoder()
+    if !compact {
+        encoder.outputFormatting = .prettyPrinted
+    }
+    return encoder
+}
+
+
+// MARK: - Server mode
+// 길이 접두(length-prefixed) 프로토콜로 stdin/stdout을 통해 요청을 하나씩 처리합니다.
+//   요청: "<바이트 수>\n" + UTF-8 Swift 소스
+//   응답: "OK <바이트 수>\n" + 심볼 JSON  또는  "ERR <바이트 수>\n" + 에러 메시지
+// stdin이 닫히면 종료합니다.
+func readExactly(_ count: Int) -> Data? {
+    if count == 0 { return Data() }
+    var buffer = [UInt8](repeating: 0, count: count)
+    var offset = 0
+    while offset < count {
+        let n = buffer.withUnsafeMutableBytes { ptr in
+            fread(ptr.baseAddress! + offset, 1, count - offset, stdin)
+        }
+        if n == 0 { return nil }
+        offset += n
+    }
+    return Data(buffer)
+}
+
+func writeFrame(status: String, payload: Data) {
+    FileHandle.standardOutput.write("\(status) \(payload.count)\n".data(using: .utf8)!)
+    FileHandle.standardOutput.write(payload)
+}
+
+func runServer(compact: Bool) {
+    let encoder = makeEncoder(compact: compact)
+    while let header = readLine(strippingNewline: true) {
+        guard let length = Int(header.trimmingCharacters(in: .whitespaces)), length >= 0 else {
+            writeFrame(status: "ERR", payload: "Invalid request header: \(header)".data(using: .utf8)!)
+            continue
+        }
+        guard let body = readExactly(length) else {
+            break
+        }
+        guard let source = String(data: body, encoding: .utf8) else {
+            writeFrame(status: "ERR", payload: "Request body is not valid UTF-8".data(using: .utf8)!)
+            continue
+        }
+        do {
+            writeFrame(status: "OK", payload: try encoder.encode(analyzeSource(source)))
+        } catch {
+            writeFrame(status: "ERR", payload: "Error encoding JSON: \(error)".data(using: .utf8)!)
+        }
+    }
+}
+
+
+// MARK: - Batch mode
+// 디렉토리, 파일 목록, glob 패턴으로 지정한 여러 파일을 한 프로세스에서 병렬로 분석합니다.
+// 파일마다 한 줄의 compact JSON을 출력하며 (JSON Lines), 완료된 순서대로 출력되므로 path로 구분합니다.
+//   성공: {"path":"...","symbols":[...]}
+//   실패: {"path":"...","error":"..."}
+struct BatchRecord: Encodable {
+    let path: String
+    let symbols: [SymbolInfo]?
+    let error: String?
+}
+
+func expandGlob(_ pattern: String) -> [String] {
+    var result = glob_t()
+    defer { globfree(&result) }
+    guard glob(pattern, 0, nil, &result) == 0 else { return [] }
+    return (0..<Int(result.gl_pathc)).compactMap { index in
+        result.gl_pathv[index].map { String(cString: $0) }
+    }
+}
+
+func swiftFiles(inDirectory directory: String) -> [String] {
+    guard let enumerator = FileManager.default.enumerator(atPath: directory) else { return [] }
+    var files: [String] = []
+    while let relative = enumerator.nextObject() as? String {
+        if relative.hasSuffix(".swift") {
+            files.append((directory as NSString).appendingPathComponent(relative))
+        }
+    }
+    return files.sorted()
+}
+
+func readFileList(_ listPath: String) -> [String] {
+    let content: String?
+    if listPath == "-" {
+        content = String(data: FileHandle.standardInput.readDataToEndOfFile(), encoding: .utf8)
+    } else {
+        content = try? String(contentsOfFile: listPath, encoding: .utf8)
+    }
+    return (content ?? "")
+        .split(whereSeparator: \.isNewline)
+        .map { $0.trimmingCharacters(in: .whitespaces) }
+        .filter { !$0.isEmpty }
+}
+
+func resolveBatchInputs(_ arguments: [String]) -> [String] {
+    var files: [String] = []
+    var index = 0
+    while index < arguments.count {
+        let argument = arguments[index]
+        index += 1
+
+        if argument == "--files-from" {
+            guard index < arguments.count else {
+                fputs("--files-from requires a path (or - for stdin)\n", stderr)
+                exit(1)
+            }
+            files.append(contentsOf: readFileList(arguments[index]))
+            index += 1
+            continue
+        }
+
+        var isDirectory: ObjCBool = false
+        if FileManager.default.fileExists(atPath: argument, isDirectory: &isDirectory) {
+            files.append(contentsOf: isDirectory.boolValue ? swiftFiles(inDirectory: argument) : [argument])
+        } else if argument.contains(where: { "*?[".contains($0) }) {
+            files.append(contentsOf: expandGlob(argument))
+        } else {
+            // 존재하지 않는 파일도 에러 레코드로 보고하도록 그대로 포함
+            files.append(argument)
+        }
+    }
+
+    // 중복 경로는 한 번만 분석
+    var seen = Set<String>()
+    return files.filter { seen.insert($0).inserted }
+}
+
+func runBatch(_ arguments: [String]) {
+    let files = resolveBatchInputs(arguments)
+    let outputLock = NSLock()
+
+    DispatchQueue.concurrentPerform(iterations: files.count) { index in
+        let path = files[index]
+        let record: BatchRecord
+        if let source = try? String(contentsOfFile: path, encoding: .utf8) {
+            record = BatchRecord(path: path, symbols: analyzeSource(source), error: nil)
+        } else {
+            record = BatchRecord(path: path, symbols: nil, error: "Could not read file as UTF-8")
+        }
+
+        // JSONEncoder는 스레드 간에 공유하지 않음
+        let encoder = JSONEncoder()
+        guard var line = try? encoder.encode(record) else {
+            return
+        }
+        line.append(0x0A)
+
+        outputLock.lock()
+        FileHandle.standardOutput.write(line)
+        outputLock.unlock()
+    }
+}
+
 
 // MARK: - Main
-if CommandLine.arguments.count < 2 {
-    fputs("Usage: \(CommandLine.arguments[0]) <file-to-analyze.swift>\n", stderr)
+let compactOutput = CommandLine.arguments.contains("--compact")
+let arguments = CommandLine.arguments.filter { $0 != "--compact" }
+
+if arguments.count < 2 {
+    fputs("Usage: \(arguments[0]) [--compact] <file-to-analyze.swift>\n", stderr)
+    fputs("       \(arguments[0]) --server [--compact]\n", stderr)
+    fputs("       \(arguments[0]) --batch [--files-from <list|->] <dir|file|glob>...\n", stderr)
     exit(1)
 }
 
-let inputPath = CommandLine.arguments[1]
+if arguments[1] == "--server" {
+    runServer(compact: compactOutput)
+    exit(0)
+}
+
+if arguments[1] == "--batch" {
+    runBatch(Array(arguments.dropFirst(2)))
+    exit(0)
+}
+
+let inputPath = arguments[1]
 let symbols = analyzeSwiftFile(path: inputPath)
 
-let encoder = JSONEncoder()
-encoder.outputFormatting = .prettyPrinted
+let encoder = makeEncoder(compact: compactOutput)
 
 do {
     let jsonData = try encoder.encode(symbols)
@@ -240,4 +481,4 @@ do {
 } catch {
     fputs("Error encoding JSON: \(error)\n", stderr)
     exit(1)
-}
\ No newline at end of file
+}
@@ -0,0 +1 @@
+from .batch_handler import BatchAdapter, ClaudeBatchAdapter, GeminiBatchAdapter, LocalBatchAdapter, BatchJobError
@@ -0,0 +1,164 @@
+import abc
+import uuid
+from typing import Callable
+
+from structured_log import get_logger
+from claude_handler.claude_handler import ClaudeHandler
+from gemini_handler.gemini_handler import GeminiHandler
+
+log = get_logger(__name__)
+
+
+class BatchJobError(RuntimeError): pass
+
+
+class BatchAdapter(abc.ABC):
+    """제공자별 배치(비동기 대량 처리) API를 감싸는 공통 인터페이스.
+
+    requests는 {"custom_id": str, "prompt": str} 목록이며, 결과는 {custom_id: 응답 텍스트}로 돌려줍니다.
+    실패한 요청은 결과에서 빠지므로 호출자가 별도로 처리해야 합니다.
+    """
+
+    provider = "base"
+    # 한 번의 배치 작업에 넣을 최대 요청 수
+    max_requests_per_job = 1000
+
+    @abc.abstractmethod
+    def submit(self, requests: list[dict]) -> str:
+        """배치 작업을 제출하고 작업 ID를 반환합니다."""
+
+    @abc.abstractmethod
+    def poll(self, job_id: str) -> str:
+        """작업 상태를 "running", "succeeded", "failed" 중 하나로 반환합니다."""
+
+    @abc.abstractmethod
+    def results(self, job_id: str, custom_ids: list[str]) -> dict[str, str]:
+        """완료된 작업의 결과를 반환합니다. custom_ids는 제출 순서 그대로 전달됩니다."""
+
+
+class ClaudeBatchAdapter(BatchAdapter):
+    """Anthropic Message Batches API 어댑터."""
+
+    provider = "claude"
+    max_requests_per_job = 10000
+
+    def submit(self, requests: list[dict]) -> str:
+        batch = ClaudeHandler.client.messages.batches.create(requests=[
+            {
+                "custom_id": request["custom_id"],
+                "params": {
+                    "model": ClaudeHandler.model,
+                    "max_tokens": ClaudeHandler.max_tokens,
+                    "temperature": ClaudeHandler.temperature,
+                    "messages": [{"role": "user", "content": request["prompt"]}]
+                }
+            }
+            for request in requests
+        ])
+        return batch.id
+
+    def poll(self, job_id: str) -> str:
+        batch = ClaudeHandler.client.messages.batches.retrieve(job_id)
+        if batch.processing_status != "ended":
+            return "running"
+        return "succeeded"
+
+    def results(self, job_id: str, custom_ids: list[str]) -> dict[str, str]:
+        results = {}
+        for entry in ClaudeHandler.client.messages.batches.results(job_id):
+            if entry.result.type == "succeeded" and entry.result.message.content:
+                results[entry.custom_id] = entry.result.message.content[0].text.strip()
+        return results
+
+
+class GeminiBatchAdapter(BatchAdapter):
+    """Gemini Batch API 어댑터 (google-genai SDK 필요, 인라인 요청 사용)."""
+
+    provider = "gemini"
+    # 인라인 요청은 전체 크기 제한(20MB)이 있으므로 작업 하나에 넣는 요청 수를 작게 유지
+    max_requests_per_job = 200
+
+    def __init__(self, model_name: str = "gemini-2.5-pro", key_index: int = 0):
+        try:
+            from google import genai as google_genai
+        except ImportError as e:
+            raise BatchJobError("Gemini 배치 모드에는 google-genai 패키지가 필요합니다 (pip install google-genai)") from e
+
+        self.model_name = model_name
+        self.client = google_genai.Client(api_key=GeminiHandler.api_keys[key_index])
+
+    @staticmethod
+    def request_config() -> dict:
+        """대화형 GeminiHandler와 같은 생성 설정과 안전 설정(BLOCK_NONE)을 google-genai 요청 형식으로 만듭니다.
+
+        보안 관련 Swift 샘플이 배치 모드에서만 차단되지 않도록 안전 설정을 함께 보냅니다.
+        """
+        return {
+            **GeminiHandler.generation_config,
+            "safety_settings": [
+                {"category": category.name, "threshold": threshold.name}
+                for category, threshold in GeminiHandler.safety_settings.items()
+            ]
+        }
+
+    def submit(self, requests: list[dict]) -> str:
+        config = self.request_config()
+        job = self.client.batches.create(
+            model=f"models/{self.model_name}",
+            src=[
+                {
+                    "contents": [{"role": "user", "parts": [{"text": request["prompt"]}]}],
+                    "config": config
+                }
+                for request in requests
+            ],
+            config={"display_name": f"swingft-{uuid.uuid4().hex[:8]}"}
+        )
+        return job.name
+
+    def poll(self, job_id: str) -> str:
+        state = self.client.batches.get(name=job_id).state.name
+        if state == "JOB_STATE_SUCCEEDED":
+            return "succeeded"
+        if state in ("JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"):
+            return "failed"
+        return "running"
+
+    def results(self, job_id: str, custom_ids: list[str]) -> dict[str, str]:
+        job = self.client.batches.get(name=job_id)
+        results = {}
+        # 인라인 응답은 제출 순서와 같은 순서로 반환됨
+        for custom_id, inline_response in zip(custom_ids, job.dest.inlined_responses or []):
+            response = inline_response.response
+            if inline_response.error or not response:
+                continue
+            text = response.text
+            if text and text.strip():
+                results[custom_id] = text.strip()
+        return results
+
+
+class LocalBatchAdapter(BatchAdapter):
+    """실제 API 대신 responder 함수로 즉시 응답하는 로컬 가짜 어댑터 (테스트/벤치마크용)."""
+
+    def __init__(self, responder: Callable[[str], str], provider: str = "local"):
+        self.responder = responder
+        self.provider = provider
+        self._jobs = {}
+
+    def submit(self, requests: list[dict]) -> str:
+        job_id = f"local-{uuid.uuid4().hex}"
+        results = {}
+        for request in requests:
+            try:
+                results[request["custom_id"]] = self.responder(request["prompt"])
+            except Exception as e:
+                log.warning("⚠️ Local batch request failed", custom_id=request["custom_id"], error=repr(e))
+        self._jobs[job_id] = results
+        return job_id
+
+    def poll(self, job_id: str) -> str:
+        return "succeeded" if job_id in self._jobs else "failed"
+
+    def results(self, job_id: str, custom_ids: list[str]) -> dict[str, str]:
+        return dict(self._jobs.get(job_id, {}))
@@ -0,0 +1,91 @@
+"""깊게 중첩된 Swift 파일에서 SwiftASTAnalyzer의 분석 시간을 측정합니다.
+
+중첩 깊이를 늘려가며 생성한 파일을 분석기 CLI로 여러 번 분석하고 중앙값을 출력합니다.
+--baseline으로 이전 빌드의 실행 파일을 지정하면 두 실행 파일의 출력이 동일한지도 확인합니다.
+
+    python benchmarks/analyzer_nesting.py --depths 8 16 32 64 128
+    python benchmarks/analyzer_nesting.py --baseline ./old/SwiftASTAnalyzer
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+DEFAULT_EXECUTABLE = "./SwiftASTAnalyzer/.build/release/SwiftASTAnalyzer"
+
+
+def generate_nested_source(depth: int, statements_per_level: int = 4) -> str:
+    """함수/클로저/계산 프로퍼티가 depth 단계만큼 중첩된 Swift 소스를 생성합니다."""
+    lines = ["import Foundation", "", "class NestedSample {"]
+    indent = "    "
+
+    for level in range(depth):
+        lines.append(f"{indent}func level{level}(value: Int) -> Int {{")
+        indent += "    "
+        lines.append(f"{indent}var total{level}: Int {{ return value + helper{level}(value) }}")
+        for i in range(statements_per_level):
+            lines.append(f"{indent}let v{level}_{i} = compute(value, {i}).map {{ $0 + self.offset{i} }}")
+        lines.append(f"{indent}let closure{level} = {{ (x: Int) -> Int in")
+        lines.append(f"{indent}    return transform(x) + level{level}Ref")
+        lines.append(f"{indent}}}")
+
+    for level in reversed(range(depth)):
+        lines.append(f"{indent}return closure{level}(total{level})")
+        indent = indent[:-4]
+        lines.append(f"{indent}}}")
+
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def time_analyzer(executable: str, path: Path, repeat: int) -> tuple[float, str]:
+    """분석기를 repeat번 실행하여 (중앙값 초, 마지막 출력)을 반환합니다."""
+    durations = []
+    output = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([executable, str(path)], capture_output=True, text=True, check=True)
+        durations.append(time.perf_counter() - start)
+        output = completed.stdout
+    return statistics.median(durations), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="중첩 깊이에 따른 SwiftASTAnalyzer 분석 시간 측정")
+    parser.add_argument("--executable", default=DEFAULT_EXECUTABLE, help="측정할 분석기 실행 파일")
+    parser.add_argument("--baseline", help="출력과 시간을 비교할 이전 분석기 실행 파일")
+    parser.add_argument("--depths", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    executables = {"current": args.executable}
+    if args.baseline:
+        executables["baseline"] = args.baseline
+
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        header = f"{'depth':>6} {'lines':>7}" + "".join(f" {name + ' (ms)':>16}" for name in executables)
+        print(header)
+        for depth in args.depths:
+            source = generate_nested_source(depth)
+            path = Path(tmp) / f"nested_{depth}.swift"
+            path.write_text(source, encoding="utf-8")
+
+            results = {name: time_analyzer(exe, path, args.repeat) for name, exe in executables.items()}
+            row = f"{depth:>6} {source.count(chr(10)):>7}"
+            row += "".join(f" {seconds * 1000:>16.1f}" for seconds, _ in results.values())
+            print(row)
+
+            if args.baseline and results["current"][1] != results["baseline"][1]:
+                mismatches += 1
+                print(f"  ❌ depth {depth}: 출력이 baseline과 다릅니다")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
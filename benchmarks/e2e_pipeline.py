@@ -0,0 +1,233 @@
+"""목(mock) LLM 서버와 합성 Swift 코퍼스로 파이프라인 전체(main_pipeline, main_test_existing_pipeline)를 벤치마크합니다.
+
+API 할당량 없이 처리량(samples/sec), 단계별 p50/p99 지연 시간, 최대 RSS를 측정합니다.
+실제 SwiftASTAnalyzer 빌드가 필요하며, 출력물은 임시 작업 디렉토리에 만들어집니다.
+
+    # 데이터셋 파이프라인 40개 태스크(샘플 160개) + 기존 테스트 파일 100개, 응답 0.5±0.2초, 429 2%
+    python benchmarks/e2e_pipeline.py --tasks 40 --test-files 100 --latency 0.5 --jitter 0.2 --throttle-rate 0.02
+
+    # 워커 수 조정 실험 후 결과 저장, 이전 결과와 비교 (처리량이 15% 이상 떨어지면 종료 코드 1)
+    python benchmarks/e2e_pipeline.py --claude-workers 8 --gemini-workers 24 --json bench.json
+    python benchmarks/e2e_pipeline.py --compare bench.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_llm_server import MockLLMServer  # noqa: E402
+from swift_corpus import write_corpus  # noqa: E402
+
+# gemini_handler가 읽는 API 키 환경 변수 이름 (목 서버에는 어떤 값이든 전달됨)
+GEMINI_KEY_NAMES = [
+    "GEMINI_API_KEY_KS", "GEMINI_API_KEY_DH", "GEMINI_API_KEY_GN", "GEMINI_API_KEY_HJ",
+    "GEMINI_API_KEY_SH", "GEMINI_API_KEY_SI", "GEMINI_API_KEY_BW", "GEMINI_API_KEY_SW",
+]
+# 결과에 포함할 구간 (tracing 구간 이름)
+REPORTED_SPANS = ("stage:", "claude.ask", "gemini.ask", "gemini.acquire_key", "analyzer.",
+                  "prepare_existing_test_file", "process_existing_test_files")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """최근접 순위(nearest-rank) 방식의 백분위수."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> dict[str, float]:
+    """이 프로세스와 종료된 자식 프로세스(분석기 등)의 최대 RSS (Linux에서 ru_maxrss 단위는 KB)."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def count_lines(path: Path) -> int:
+    if not path.exists():
+        return 0
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def prepare_environment(args, server: MockLLMServer, workdir: Path):
+    """파이프라인 모듈을 import하기 전에 목 서버 주소, 가짜 키, 캐시/로그 설정과 작업 디렉토리를 준비합니다."""
+    os.environ.update({
+        "ANTHROPIC_BASE_URL": server.url,
+        "GEMINI_API_ENDPOINT": server.url,
+        "CLAUDE_API_KEY": "mock-claude-key",
+        # 응답 캐시를 쓰면 두 번째 실행부터 목 서버를 거치지 않으므로 끔
+        "LLM_CACHE_MODE": "off",
+        "GEMINI_RPM_PER_KEY": str(args.gemini_rpm),
+        "GEMINI_TPM_PER_KEY": str(10 ** 9),
+        "LOG_LEVEL": args.log_level,
+    })
+    for name in GEMINI_KEY_NAMES[:args.gemini_keys]:
+        os.environ[name] = f"mock-{name.lower()}"
+    if args.claude_workers:
+        os.environ["CLAUDE_MAX_CONCURRENCY"] = str(args.claude_workers)
+    if args.gemini_workers:
+        os.environ["GEMINI_MAX_CONCURRENCY"] = str(args.gemini_workers)
+
+    # 스크립트들은 ./output, ./patterns.json, ./SwiftASTAnalyzer 상대 경로를 사용
+    workdir.mkdir(parents=True, exist_ok=True)
+    shutil.copy(PROJECT_ROOT / "patterns.json", workdir / "patterns.json")
+    analyzer_link = workdir / "SwiftASTAnalyzer"
+    if not analyzer_link.exists():
+        analyzer_link.symlink_to(PROJECT_ROOT / "SwiftASTAnalyzer", target_is_directory=True)
+    if args.test_files:
+        write_corpus(workdir / "output" / "generated_code" / "test" / "bench", args.test_files, args.seed)
+
+    os.chdir(workdir)
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def span_latencies(tracer) -> dict[str, dict]:
+    result = {}
+    for name, durations in sorted(tracer.durations().items()):
+        if name.startswith(REPORTED_SPANS):
+            result[name] = {"count": len(durations), "p50": percentile(durations, 50), "p99": percentile(durations, 99)}
+    return result
+
+
+def run_dataset_pipeline(args, tracer) -> dict:
+    import create_alpaca_dataset
+
+    # 태스크 수를 제한 (Mixed 태스크의 비민감 패턴 선택도 seed로 고정)
+    random.seed(args.seed)
+    generate_tasks = create_alpaca_dataset.generate_tasks
+    create_alpaca_dataset.generate_tasks = lambda patterns: generate_tasks(patterns)[:args.tasks]
+
+    started = time.perf_counter()
+    create_alpaca_dataset.main_pipeline()
+    elapsed = time.perf_counter() - started
+
+    samples = (count_lines(create_alpaca_dataset.FINAL_DATASET_CLAUDE_ONLY)
+               + count_lines(create_alpaca_dataset.FINAL_DATASET_GEMINI_ONLY))
+    return {"samples": samples, "seconds": elapsed, "samples_per_sec": samples / elapsed if elapsed else 0.0,
+            "spans": span_latencies(tracer)}
+
+
+def run_test_pipeline(args, tracer) -> dict:
+    import test
+
+    started = time.perf_counter()
+    test.main_test_existing_pipeline()
+    elapsed = time.perf_counter() - started
+
+    samples = count_lines(test.OUTPUT_DIR / "all_test_dataset.jsonl")
+    return {"samples": samples, "seconds": elapsed, "samples_per_sec": samples / elapsed if elapsed else 0.0,
+            "spans": span_latencies(tracer)}
+
+
+def print_report(results: dict):
+    print("\n" + "=" * 78)
+    for name, result in results["pipelines"].items():
+        print(f"[{name}] {result['samples']} samples in {result['seconds']:.1f}s "
+              f"-> {result['samples_per_sec']:.2f} samples/sec")
+        print(f"  {'span':<34} {'count':>7} {'p50 (s)':>10} {'p99 (s)':>10}")
+        for span_name, latency in result["spans"].items():
+            print(f"  {span_name:<34} {latency['count']:>7} {latency['p50']:>10.3f} {latency['p99']:>10.3f}")
+    server = results["server"]
+    print(f"Mock server: {server['requests']} requests, {server['throttled']} throttled (429)")
+    print(f"Peak RSS: {results['peak_rss_mb']['self']:.0f} MB (self), "
+          f"{results['peak_rss_mb']['children']:.0f} MB (analyzer/child processes)")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """기준 결과 대비 처리량이 tolerance 이상 떨어졌거나 단계 p99가 (1 + tolerance)배 이상 늘어난 항목을 반환합니다."""
+    regressions = []
+    for name, result in results["pipelines"].items():
+        base = baseline.get("pipelines", {}).get(name)
+        if not base:
+            continue
+        if result["samples_per_sec"] < base["samples_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['samples_per_sec']:.2f} samples/sec "
+                               f"(baseline {base['samples_per_sec']:.2f})")
+        for span_name, latency in result["spans"].items():
+            base_latency = base["spans"].get(span_name)
+            if base_latency and latency["p99"] > base_latency["p99"] * (1 + tolerance):
+                regressions.append(f"{name}/{span_name}: p99 {latency['p99']:.3f}s (baseline {base_latency['p99']:.3f}s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목 LLM 서버를 사용한 파이프라인 전체 벤치마크")
+    parser.add_argument("--pipelines", nargs="+", choices=["dataset", "test"], default=["dataset", "test"])
+    parser.add_argument("--tasks", type=int, default=20, help="데이터셋 파이프라인 태스크 수 (태스크당 샘플 4개)")
+    parser.add_argument("--test-files", type=int, default=50, help="기존 테스트 파일 파이프라인에 넣을 합성 Swift 파일 수")
+    parser.add_argument("--latency", type=float, default=0.5, help="목 서버 평균 응답 시간 (초)")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="429를 반환할 확률")
+    parser.add_argument("--claude-workers", type=int, help="Claude 최대 동시 요청 수 (CLAUDE_MAX_CONCURRENCY)")
+    parser.add_argument("--gemini-workers", type=int, help="Gemini 최대 동시 요청 수 (GEMINI_MAX_CONCURRENCY)")
+    parser.add_argument("--gemini-keys", type=int, default=4, choices=range(1, len(GEMINI_KEY_NAMES) + 1))
+    parser.add_argument("--gemini-rpm", type=float, default=10_000, help="키별 분당 요청 수 한도")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, help="출력 디렉토리 (기본값: 임시 디렉토리, 종료 시 삭제)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", type=Path, help="결과를 JSON으로 저장")
+    parser.add_argument("--compare", type=Path, help="이전 --json 결과와 비교하여 성능 저하 시 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    executable = PROJECT_ROOT / "SwiftASTAnalyzer" / ".build" / "release" / "SwiftASTAnalyzer"
+    if not executable.exists():
+        print(f"❌ SwiftASTAnalyzer 빌드가 필요합니다: {executable}")
+        sys.exit(1)
+
+    # 상대 경로 인자는 작업 디렉토리로 이동하기 전에 절대 경로로 변환
+    json_path = args.json.resolve() if args.json else None
+    compare_path = args.compare.resolve() if args.compare else None
+    workdir = args.workdir.resolve() if args.workdir else Path(tempfile.mkdtemp(prefix="alpaca-bench-"))
+
+    server = MockLLMServer(latency=args.latency, jitter=args.jitter, throttle_rate=args.throttle_rate,
+                           seed=args.seed).start()
+    try:
+        prepare_environment(args, server, workdir)
+        from tracing import TRACER
+        TRACER.enable(workdir / "output" / "trace.json")
+
+        results = {"config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+                   "pipelines": {}}
+        runners = {"dataset": run_dataset_pipeline, "test": run_test_pipeline}
+        for name in args.pipelines:
+            results["pipelines"][name] = runners[name](args, TRACER)
+            TRACER.clear()
+        results["server"] = server.stats()
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        server.stop()
+        os.chdir(PROJECT_ROOT)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if json_path:
+        json_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results saved to {json_path}")
+    if compare_path:
+        regressions = compare(results, json.loads(compare_path.read_text(encoding="utf-8")), args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
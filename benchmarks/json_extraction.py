@@ -0,0 +1,218 @@
+"""레이블 응답 JSON 추출기(pipeline.json_extraction.extract_label_json)의 벤치마크와 퍼징 도구.
+
+    # LLM 응답 캐시에 저장된 실제 응답을 코퍼스로 수집
+    python benchmarks/json_extraction.py capture --cache-dir output/cache/llm/gemini
+
+    # 코퍼스 + 약 60K 토큰 크기의 합성 응답으로 처리 시간 측정 (이전 정규식 방식과 비교)
+    python benchmarks/json_extraction.py bench
+
+    # 코퍼스를 변형해 추출 결과가 유지되는지, 예외 없이 선형 시간에 끝나는지 확인
+    python benchmarks/json_extraction.py fuzz --iterations 2000
+"""
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline.json_extraction import extract_label_json  # noqa: E402
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus" / "label_responses"
+# 60K 토큰 ≈ 240KB (토큰당 약 4자)
+LARGE_RESPONSE_CHARS = 240_000
+
+
+def load_corpus(corpus_dir: Path = CORPUS_DIR) -> dict[str, str]:
+    return {path.name: path.read_text(encoding="utf-8") for path in sorted(corpus_dir.glob("*.txt"))}
+
+
+def make_large_response(seed: str, target_chars: int = LARGE_RESPONSE_CHARS) -> str:
+    """사고 과정이 길게 붙은 응답을 흉내 내어, 중괄호/따옴표가 섞인 서술 뒤에 seed 응답을 붙입니다."""
+    paragraph = (
+        "Looking at `func validate(_ token: String) -> Bool { return token.count > 0 }`, the closure "
+        "{ $0.isEmpty } and the dictionary [\"key\": value] are not sensitive by themselves. "
+    )
+    repeats = max(1, (target_chars - len(seed)) // len(paragraph))
+    return paragraph * repeats + "\n\n" + seed
+
+
+def make_long_reasoning_response(target_chars: int = LARGE_RESPONSE_CHARS) -> str:
+    """reasoning 문자열 자체가 매우 긴 응답 (문자열 안에 괄호, 이스케이프된 따옴표, 코드 조각 포함)."""
+    sentence = (
+        "The method `login(user:password:)` builds {\\\"user\\\": user} and passes `password` to "
+        "`Keychain.set(_:forKey:)`, so [password, token] must be treated as secrets. "
+    )
+    reasoning = sentence * max(1, target_chars // len(sentence))
+    return f'```json\n{{"reasoning": "{reasoning}", "identifiers": ["login", "password", "token"]}}\n```'
+
+
+def legacy_extract(text: str) -> str | None:
+    """비교용: 정규식 4개를 차례로 시도한 뒤 줄 단위 중괄호 카운터로 찾던 이전 방식 (수정 로직 제외)."""
+    def valid(candidate: str) -> bool:
+        try:
+            parsed = json.loads(candidate)
+        except json.JSONDecodeError:
+            return False
+        return isinstance(parsed, dict) and "reasoning" in parsed and "identifiers" in parsed
+
+    for pattern in (r"```json\s*(\{.*?\})\s*```", r"```\s*(\{.*?\})\s*```",
+                    r"```json\s*([\s\S]*?)\s*```", r"```\s*([\s\S]*?)\s*```"):
+        match = re.search(pattern, text, re.DOTALL | re.MULTILINE)
+        if match and valid(match.group(1).strip()):
+            return match.group(1).strip()
+
+    lines = text.split("\n")
+    for start, line in enumerate(lines):
+        if line.strip().startswith("{"):
+            depth = 0
+            for end in range(start, len(lines)):
+                depth += lines[end].count("{") - lines[end].count("}")
+                if depth == 0:
+                    candidate = "\n".join(lines[start:end + 1])
+                    return candidate if valid(candidate) else None
+            break
+
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start and valid(text[start:end + 1]):
+        return text[start:end + 1]
+    return None
+
+
+def time_function(func, text: str, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def run_bench(args):
+    corpus = load_corpus()
+    inputs = dict(corpus)
+    for name, text in corpus.items():
+        inputs[f"large:{name}"] = make_large_response(text)
+    inputs["long_reasoning"] = make_long_reasoning_response()
+
+    print(f"{'input':<44} {'chars':>8} {'new (ms)':>10} {'legacy (ms)':>12} {'found':>6}")
+    for name, text in inputs.items():
+        new_ms = time_function(extract_label_json, text, args.repeat) * 1000
+        legacy_ms = time_function(legacy_extract, text, args.repeat) * 1000
+        found = "yes" if extract_label_json(text) else "no"
+        print(f"{name:<44} {len(text):>8} {new_ms:>10.2f} {legacy_ms:>12.2f} {found:>6}")
+
+
+def mutate(text: str, rng: random.Random) -> tuple[str, bool]:
+    """(변형된 텍스트, 원래 추출 결과가 유지되어야 하는지)를 반환합니다."""
+    mutation = rng.choice(["prose_prefix", "prose_suffix", "fence", "stray_open", "padding", "truncate", "noise"])
+    if mutation == "prose_prefix":
+        return "Reasoning about {braces} and \"quotes\" and [brackets]:\n" + text, True
+    if mutation == "prose_suffix":
+        return text + "\n\nNote: the closure { x in x } is fine.", True
+    if mutation == "fence":
+        return f"```json\n{text}\n```", True
+    if mutation == "stray_open":
+        return "Analysis { begins here without closing.\n" + text, True
+    if mutation == "padding":
+        return make_large_response(text, rng.randint(10_000, LARGE_RESPONSE_CHARS)), True
+    if mutation == "truncate":
+        return text[:rng.randint(0, len(text))], False
+    # noise: 임의 위치에 괄호/따옴표/역슬래시 삽입 (결과는 달라져도 되지만 예외/폭주는 안 됨)
+    chars = list(text)
+    for _ in range(rng.randint(1, 10)):
+        chars.insert(rng.randint(0, len(chars)), rng.choice('{}[]"\\,:'))
+    return "".join(chars), False
+
+
+def run_fuzz(args):
+    rng = random.Random(args.seed)
+    corpus = load_corpus()
+    if not corpus:
+        print(f"❌ 코퍼스가 비어 있습니다: {CORPUS_DIR}")
+        sys.exit(1)
+
+    expected = {name: extract_label_json(text) for name, text in corpus.items()}
+    failures = 0
+    slowest = 0.0
+
+    for _ in range(args.iterations):
+        name = rng.choice(list(corpus))
+        text, must_match = mutate(corpus[name], rng)
+        start = time.perf_counter()
+        try:
+            result = extract_label_json(text)
+        except Exception as e:
+            failures += 1
+            print(f"❌ {name}: 예외 발생 {type(e).__name__}: {e}")
+            save_failure(text)
+            continue
+        # 문자 수 대비 시간(µs/KB)으로 선형성 확인
+        elapsed = time.perf_counter() - start
+        slowest = max(slowest, elapsed * 1e6 / max(1, len(text) / 1024))
+
+        if must_match and result != expected[name]:
+            failures += 1
+            print(f"❌ {name}: 변형 후 추출 결과가 달라졌습니다")
+            save_failure(text)
+
+    print(f"{args.iterations}회 변형, 실패 {failures}건, 최대 {slowest:.1f} µs/KB")
+    if failures:
+        sys.exit(1)
+
+
+def save_failure(text: str):
+    failure_dir = CORPUS_DIR.parent / "failures"
+    failure_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    (failure_dir / f"failure_{digest}.txt").write_text(text, encoding="utf-8")
+
+
+def run_capture(args):
+    """LLM 응답 캐시(<provider>/ab/<sha>.json)에서 응답 본문을 코퍼스 파일로 복사합니다."""
+    CORPUS_DIR.mkdir(parents=True, exist_ok=True)
+    captured = 0
+    for path in sorted(Path(args.cache_dir).glob("*/*.json"))[:args.limit]:
+        try:
+            response = json.loads(path.read_text(encoding="utf-8"))["response"]
+        except (OSError, ValueError, KeyError):
+            continue
+        # 코드 생성 응답은 제외하고 레이블 응답만 수집
+        if "reasoning" not in response or "identifiers" not in response:
+            continue
+        target = CORPUS_DIR / f"captured_{path.stem[:12]}.txt"
+        if not target.exists():
+            target.write_text(response, encoding="utf-8")
+            captured += 1
+    print(f"{captured}개의 응답을 {CORPUS_DIR}에 저장했습니다")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="레이블 JSON 추출기 벤치마크/퍼징")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bench = subparsers.add_parser("bench")
+    bench.add_argument("--repeat", type=int, default=20)
+    bench.set_defaults(func=run_bench)
+
+    fuzz = subparsers.add_parser("fuzz")
+    fuzz.add_argument("--iterations", type=int, default=1000)
+    fuzz.add_argument("--seed", type=int, default=0)
+    fuzz.set_defaults(func=run_fuzz)
+
+    capture = subparsers.add_parser("capture")
+    capture.add_argument("--cache-dir", default="output/cache/llm/gemini")
+    capture.add_argument("--limit", type=int, default=500)
+    capture.set_defaults(func=run_capture)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""샘플마다 실행되는 헬퍼(레이블 JSON 추출, 배치 응답 파싱, Alpaca 엔트리 조립)의 마이크로벤치마크.
+
+pytest-benchmark와 같은 방식으로 한 라운드가 --min-time 이상 걸리도록 반복 횟수를 보정한 뒤
+라운드별 호출당 시간(min/median/mean/stddev)을 측정하고, tracemalloc으로 호출 한 번의 최대 할당량을 측정합니다.
+입력은 benchmarks/corpus/label_responses의 코퍼스와 그 변형(약 60K 토큰으로 늘린 large: 응답)입니다.
+현재 코퍼스는 Gemini 응답 형태(코드 펜스, 잘린 JSON, 서술 속 JSON 등)를 흉내 낸 손으로 쓴 시드이며,
+실제 응답은 `python benchmarks/json_extraction.py capture`로 LLM 응답 캐시에서 추가할 수 있습니다.
+extract_label_json은 같은 입력의 이전 정규식 방식(legacy_extract_label_json)과 나란히 측정합니다.
+
+    # 측정 후 기준 결과 저장
+    python benchmarks/microbench.py --save
+
+    # 저장된 기준 결과(benchmarks/baselines/microbench.json)와 비교 (라운드 최소 시간이 20% 이상 느려지면 종료 코드 1)
+    python benchmarks/microbench.py --compare
+
+    # 이름으로 골라 실행
+    python benchmarks/microbench.py --filter extract_label_json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from pipeline.json_extraction import extract_label_json, iter_balanced_spans, load_json_span, repair_json  # noqa: E402
+from pipeline.label_batching import parse_batch_label_response  # noqa: E402
+from pipeline.assembly import create_alpaca_input, build_entry  # noqa: E402
+from swift_analyzer_handler import AnalyzerResult  # noqa: E402
+from json_extraction import load_corpus, make_large_response, legacy_extract  # noqa: E402
+from swift_corpus import generate_swift_source  # noqa: E402
+
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "microbench.json"
+
+
+def make_symbols(count: int) -> list[dict]:
+    """SwiftASTAnalyzer 출력과 같은 스키마의 심볼 목록 (타입 1개 + 프로퍼티/메서드, 빈 배열 필드는 생략)."""
+    symbols = [{"symbolName": "LoginManager", "symbolKind": "class",
+                "conforms": ["NSObject", "URLSessionDelegate"], "attributes": ["@MainActor"]}]
+    for i in range(count - 1):
+        if i % 3 == 0:
+            symbol = {"symbolName": f"LoginManager.accessToken{i}", "symbolKind": "property",
+                      "typeSignature": "String", "references": ["KeychainStore.shared", f"LoginManager.session{i}"]}
+            if i % 2:
+                symbol["attributes"] = ["@Published"]
+        else:
+            signature = "(String, @escaping (Result<Data, Error>) -> Void) -> Void"
+            symbol = {"symbolName": f"LoginManager.save{i}({signature})", "symbolKind": "method",
+                      "typeSignature": signature,
+                      "calls_out": ["SecItemAdd", "Data.init", "UserDefaults.standard.set", f"LoginManager.validate{i}"],
+                      "references": ["kSecClass", "kSecValueData", f"LoginManager.accessToken{i - 1}"]}
+        symbols.append(symbol)
+    return symbols
+
+
+def make_batch_response(corpus: dict[str, str], truncated: bool = False) -> tuple[str, dict[str, str]]:
+    """코퍼스 응답의 레이블을 id별 배열로 묶은 배치 응답 (truncated면 마지막 객체가 잘림)."""
+    items = []
+    for i, text in enumerate(corpus.values(), 1):
+        label = extract_label_json(text)
+        if label:
+            items.append({"id": f"sample_{i}", **json.loads(label)})
+    response = "```json\n" + json.dumps(items, indent=2) + "\n```"
+    if truncated:
+        response = response[:len(response) - len(json.dumps(items[-1])) // 2]
+    return response, {item["id"]: f"name_{item['id']}" for item in items}
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    """{벤치마크 이름: 인자 없는 호출 함수}."""
+    corpus = load_corpus()
+    cases = {}
+
+    for name, text in corpus.items():
+        stem = Path(name).stem
+        large = make_large_response(text)
+        cases[f"extract_label_json[{stem}]"] = lambda text=text: extract_label_json(text)
+        cases[f"extract_label_json[large:{stem}]"] = lambda text=large: extract_label_json(text)
+        cases[f"legacy_extract_label_json[{stem}]"] = lambda text=text: legacy_extract(text)
+        cases[f"legacy_extract_label_json[large:{stem}]"] = lambda text=large: legacy_extract(text)
+        cases[f"iter_balanced_spans[{stem}]"] = lambda text=text: iter_balanced_spans(text)
+
+        spans = iter_balanced_spans(text)
+        if spans:
+            start, end = max(spans, key=lambda span: span[1] - span[0])
+            span = text[start:end]
+            cases[f"load_json_span[{stem}]"] = lambda span=span: load_json_span(span)
+            cases[f"repair_json[{stem}]"] = lambda span=span: repair_json(span)
+
+    for truncated in (False, True):
+        response, id_to_name = make_batch_response(corpus, truncated)
+        suffix = "truncated" if truncated else "complete"
+        cases[f"parse_batch_label_response[{suffix}]"] = (
+            lambda response=response, id_to_name=id_to_name: parse_batch_label_response(response, id_to_name)
+        )
+
+    swift_code = generate_swift_source(0, methods=8)
+    label = extract_label_json(next(iter(corpus.values()))) or "{}"
+    for symbol_count in (10, 100):
+        symbols = make_symbols(symbol_count)
+        warm = AnalyzerResult(symbols)
+        _ = warm.pretty
+        # warm: 들여쓰기 문자열이 이미 만들어진 결과 (파이프라인에서 프롬프트 생성 후 조립하는 경우)
+        cases[f"create_alpaca_input[warm,{symbol_count} symbols]"] = (
+            lambda result=warm: create_alpaca_input(swift_code, result)
+        )
+        # cold: 조립 시점에 처음으로 들여쓰기 문자열을 만드는 경우 (이어하기로 레이블이 이미 있던 샘플)
+        cases[f"build_entry[cold,{symbol_count} symbols]"] = (
+            lambda symbols=symbols: build_entry(swift_code, AnalyzerResult(symbols), label)
+        )
+    return cases
+
+
+def calibrate(func: Callable, min_time: float) -> int:
+    """한 라운드가 min_time 이상 걸리는 반복 횟수를 찾습니다."""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - start >= min_time or iterations >= 1 << 20:
+            return iterations
+        iterations *= 2
+
+
+def measure_time(func: Callable, min_time: float, max_time: float, min_rounds: int) -> dict:
+    func()  # warmup
+    iterations = calibrate(func, min_time)
+    per_call = []
+    deadline = time.perf_counter() + max_time
+    while len(per_call) < min_rounds or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        per_call.append((time.perf_counter() - start) / iterations)
+    return {
+        "min": min(per_call),
+        "median": statistics.median(per_call),
+        "mean": statistics.fmean(per_call),
+        "stddev": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "rounds": len(per_call),
+        "iterations": iterations,
+    }
+
+
+def measure_allocations(func: Callable, calls: int = 5) -> dict:
+    """호출 한 번 동안의 최대 추가 할당량(peak)과 호출 후에도 남은 할당량(retained)을 바이트 단위로 측정합니다."""
+    tracemalloc.start()
+    try:
+        peaks, retained = [], []
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = func()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+            del result
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": max(peaks), "retained_bytes": min(retained)}
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def print_results(results: dict, baseline: dict | None):
+    print(f"{'name':<52} {'min':>10} {'median':>10} {'stddev':>10} {'rounds':>7} {'peak alloc':>11} {'vs base':>8}")
+    for name, result in results.items():
+        change = ""
+        if baseline and name in baseline:
+            change = f"{result['min'] / baseline[name]['min'] - 1:+.0%}"
+        print(f"{name:<52} {format_time(result['min']):>10} {format_time(result['median']):>10} "
+              f"{format_time(result['stddev']):>10} {result['rounds']:>7} "
+              f"{result['peak_bytes'] / 1024:>8.1f} KB {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파이프라인 헬퍼 마이크로벤치마크")
+    parser.add_argument("--filter", help="이름에 이 문자열이 포함된 벤치마크만 실행")
+    parser.add_argument("--min-time", type=float, default=0.005, help="라운드당 최소 시간 (초)")
+    parser.add_argument("--max-time", type=float, default=0.5, help="벤치마크당 측정 시간 (초)")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="결과를 --baseline 경로에 저장")
+    parser.add_argument("--compare", action="store_true", help="--baseline과 비교하여 성능 저하 시 종료 코드 1")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용하는 최소 시간 증가 비율")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.filter:
+        cases = {name: func for name, func in cases.items() if args.filter in name}
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = {**measure_time(func, args.min_time, args.max_time, args.min_rounds),
+                         **measure_allocations(func)}
+
+    baseline = None
+    if (args.compare or not args.save) and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["benchmarks"]
+    print_results(results, baseline)
+
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        machine = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+        args.baseline.write_text(json.dumps({"machine": machine, "benchmarks": results}, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"❌ 기준 결과가 없습니다: {args.baseline} (--save로 먼저 저장)")
+            sys.exit(1)
+        # 공유/가상 머신에서는 중앙값도 흔들리므로, 방해를 가장 덜 받은 라운드(min)끼리 비교
+        regressions = [name for name, result in results.items()
+                       if name in baseline and result["min"] > baseline[name]["min"] * (1 + args.tolerance)]
+        for name in regressions:
+            print(f"❌ Regression: {name} {format_time(baseline[name]['min'])} -> {format_time(results[name]['min'])}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Anthropic Messages API와 Gemini generateContent(REST) API를 흉내 내는 로컬 HTTP 서버.
+
+API 할당량을 쓰지 않고 파이프라인 전체를 벤치마크하기 위한 것으로, 요청마다 설정된 지연 시간만큼 기다린 뒤
+프롬프트 종류(코드 생성 / 단일 레이블 / 배치 레이블)에 맞는 고정 응답을 돌려주고, 일정 비율로 429를 반환합니다.
+
+    # 단독 실행 (다른 터미널에서 파이프라인 실행 시)
+    python benchmarks/mock_llm_server.py --port 8765 --latency 0.8 --jitter 0.3 --throttle-rate 0.02
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python create_alpaca_dataset.py
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from swift_corpus import SENSITIVE_NAMES, generate_swift_source  # noqa: E402
+
+BATCH_SAMPLE_ID = re.compile(r"### Sample id: (sample_\d+)")
+LABEL_PROMPT_MARKER = "identify all sensitive identifiers"
+
+
+def canned_response(prompt: str, index: int, seed: int = 0) -> str:
+    """프롬프트 종류에 맞는 응답 텍스트를 만듭니다."""
+    sample_ids = BATCH_SAMPLE_ID.findall(prompt)
+    if sample_ids:
+        # 배치 레이블: 샘플 블록별로 코드에 등장하는 민감한 이름을 identifiers로 반환
+        blocks = BATCH_SAMPLE_ID.split(prompt)[1:]
+        items = []
+        for sample_id, block in zip(blocks[::2], blocks[1::2]):
+            identifiers = [name for name in SENSITIVE_NAMES if name in block]
+            items.append({"id": sample_id, "reasoning": f"Mock reasoning for {sample_id}.", "identifiers": identifiers})
+        return "```json\n" + json.dumps(items, indent=2) + "\n```"
+    if LABEL_PROMPT_MARKER in prompt:
+        identifiers = [name for name in SENSITIVE_NAMES if name in prompt]
+        return "```json\n" + json.dumps({"reasoning": "Mock reasoning.", "identifiers": identifiers}, indent=2) + "\n```"
+    return "```swift\n" + generate_swift_source(index, seed) + "```"
+
+
+class MockLLMServer:
+    """백그라운드 스레드에서 동작하는 목 서버. url 속성을 ANTHROPIC_BASE_URL / GEMINI_API_ENDPOINT로 사용합니다.
+
+    - latency, jitter: 응답 지연 시간(초) = latency ± jitter (균등 분포)
+    - throttle_rate: 429(Anthropic rate_limit_error / Gemini RESOURCE_EXHAUSTED)를 반환할 확률
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.5, jitter: float = 0.2,
+                 throttle_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = {"claude": 0, "gemini": 0}
+        self.throttled = {"claude": 0, "gemini": 0}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": dict(self.requests), "throttled": dict(self.throttled)}
+
+    def _next(self, provider: str) -> tuple[int, float, bool]:
+        """(요청 번호, 지연 시간, 429 반환 여부)를 정합니다."""
+        with self._lock:
+            self.requests[provider] += 1
+            index = sum(self.requests.values())
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            throttle = self._rng.random() < self.throttle_rate
+            if throttle:
+                self.throttled[provider] += 1
+        return index, delay, throttle
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # 요청마다 stderr에 출력하지 않음
+
+            def _send(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/v1/messages"):
+                    self._claude(payload)
+                elif ":generateContent" in self.path:
+                    self._gemini(payload, self.path.split("/models/")[-1].split(":")[0])
+                else:
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            def _claude(self, payload: dict):
+                index, delay, throttle = server._next("claude")
+                time.sleep(delay)
+                if throttle:
+                    self._send(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "mock rate limit"}})
+                    return
+                content = payload["messages"][-1]["content"]
+                prompt = content if isinstance(content, str) else "".join(part.get("text", "") for part in content)
+                text = canned_response(prompt, index, server.seed)
+                self._send(200, {
+                    "id": f"msg_mock_{index}", "type": "message", "role": "assistant", "model": payload.get("model"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn", "stop_sequence": None,
+                    "usage": {"input_tokens": len(prompt) // 4 + 1, "output_tokens": len(text) // 4 + 1},
+                })
+
+            def _gemini(self, payload: dict, model: str):
+                index, delay, throttle = server._next("gemini")
+                time.sleep(delay)
+                if throttle:
+                    self._send(429, {"error": {"code": 429, "message": "mock quota exceeded", "status": "RESOURCE_EXHAUSTED"}})
+                    return
+                prompt = "".join(part.get("text", "") for content in payload.get("contents", [])
+                                 for part in content.get("parts", []))
+                text = canned_response(prompt, index, server.seed)
+                self._send(200, {
+                    "candidates": [{"content": {"role": "model", "parts": [{"text": text}]},
+                                    "finishReason": "STOP", "index": 0}],
+                    "usageMetadata": {"promptTokenCount": len(prompt) // 4 + 1,
+                                      "candidatesTokenCount": len(text) // 4 + 1,
+                                      "totalTokenCount": (len(prompt) + len(text)) // 4 + 2},
+                    "modelVersion": model,
+                })
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anthropic/Gemini 목 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.jitter, args.throttle_rate, args.seed).start()
+    print(f"Mock LLM server listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(server.stats())
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""벤치마크용 합성 Swift 코퍼스 생성기.
+
+실제 생성 코드와 비슷한 모양(클래스/구조체, 저장 프로퍼티, 메서드, 클로저, Keychain/URLSession 호출)의
+Swift 파일을 seed에 따라 결정적으로 만듭니다. 목(mock) LLM 서버의 코드 생성 응답과
+기존 테스트 파일 파이프라인의 입력 파일로 사용됩니다.
+
+    python benchmarks/swift_corpus.py --count 200 --out /tmp/swift_corpus
+"""
+import random
+import argparse
+from pathlib import Path
+
+SENSITIVE_NAMES = ["password", "accessToken", "refreshToken", "apiKey", "sessionId", "pinCode",
+                   "cardNumber", "secretKey", "authHeader", "privateKey"]
+PLAIN_NAMES = ["title", "count", "items", "isLoading", "selectedIndex", "username", "theme",
+               "lastUpdated", "cellHeight", "pageSize"]
+TYPE_NAMES = ["LoginManager", "PaymentService", "ProfileViewModel", "SessionStore", "FeedController",
+              "SettingsView", "TokenProvider", "CartRepository", "ImageCache", "NetworkClient"]
+
+
+def generate_swift_source(index: int, seed: int = 0, methods: int = 4) -> str:
+    """index번째 합성 Swift 파일을 생성합니다 (같은 index/seed면 항상 같은 결과)."""
+    rng = random.Random(seed * 1_000_003 + index)
+    type_name = f"{rng.choice(TYPE_NAMES)}{index}"
+    sensitive = rng.sample(SENSITIVE_NAMES, rng.randint(1, 3))
+    plain = rng.sample(PLAIN_NAMES, rng.randint(2, 4))
+
+    lines = ["import Foundation", "import Security", "", f"final class {type_name} {{"]
+    for name in sensitive:
+        lines.append(f'    private var {name}: String = ""')
+    for name in plain:
+        lines.append(f"    var {name}: Int = {rng.randint(0, 100)}")
+    lines.append("")
+
+    for m in range(methods):
+        target = rng.choice(sensitive + plain)
+        kind = rng.choice(["store", "request", "transform"])
+        if kind == "store":
+            lines += [
+                f"    func save{target[0].upper()}{target[1:]}{m}(_ value: String) {{",
+                f"        let query: [String: Any] = [kSecClass as String: kSecClassGenericPassword,",
+                f'                                    kSecAttrAccount as String: "{target}",',
+                f"                                    kSecValueData as String: Data(value.utf8)]",
+                f"        SecItemAdd(query as CFDictionary, nil)",
+                f"        UserDefaults.standard.set(value, forKey: \"{target}_{m}\")",
+                f"    }}",
+            ]
+        elif kind == "request":
+            lines += [
+                f"    func fetch{m}(completion: @escaping (Result<Data, Error>) -> Void) {{",
+                f'        var request = URLRequest(url: URL(string: "https://api.example.com/v{m}")!)',
+                f'        request.setValue("Bearer \\(self.{sensitive[0]})", forHTTPHeaderField: "Authorization")',
+                f"        URLSession.shared.dataTask(with: request) {{ data, _, error in",
+                f"            if let error = error {{ completion(.failure(error)); return }}",
+                f"            completion(.success(data ?? Data()))",
+                f"        }}.resume()",
+                f"    }}",
+            ]
+        else:
+            lines += [
+                f"    func transform{m}(_ values: [Int]) -> [Int] {{",
+                f"        let offset = {rng.randint(1, 9)}",
+                f"        return values.filter {{ $0 > offset }}.map {{ $0 * offset + self.{rng.choice(plain)} }}",
+                f"    }}",
+            ]
+        lines.append("")
+
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def write_corpus(out_dir: Path, count: int, seed: int = 0) -> list[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = out_dir / f"Sample{i:04d}.swift"
+        path.write_text(generate_swift_source(i, seed), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 Swift 코퍼스 생성")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+    paths = write_corpus(args.out, args.count, args.seed)
+    print(f"{len(paths)}개의 Swift 파일을 {args.out}에 생성했습니다")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import json
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -8,11 +9,30 @@ from googleapiclient.http import MediaFileUpload
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 import anthropic
+from llm_cache import LLMResponseCache, CacheMissError
+from llm_metrics import LLM_METRICS
+from retry_policy import RetryPolicy, current_attempt
+from tracing import traced
+from structured_log import get_logger
 
 load_dotenv(dotenv_path=Path(__file__).resolve().parents[1] / ".env")
+log = get_logger(__name__)
 
 class ClaudeHandler:
-    client = anthropic.Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
+    # SDK 자체 재시도는 끄고 retry_policy로만 재시도 (재시도가 중첩되지 않도록)
+    client = anthropic.Anthropic(api_key=os.getenv("CLAUDE_API_KEY"), max_retries=0)
+    response_cache = LLMResponseCache.from_env()
+    metrics = LLM_METRICS
+    retry_policy = RetryPolicy(
+        throttle_delay=15.0,
+        is_throttle=lambda e: isinstance(e, (anthropic.RateLimitError, anthropic.APITimeoutError))
+                              or getattr(e, "status_code", None) == 529,
+        non_retryable=(CacheMissError, anthropic.BadRequestError, anthropic.AuthenticationError)
+    )
+
+    model = "claude-3-5-sonnet-20241022"
+    max_tokens = 1024
+    temperature = 0.7
 
     @staticmethod
     def get_credentials():
@@ -73,7 +93,7 @@ class ClaudeHandler:
 
                 folder = service.files().create(body=file_metadata, fields='id').execute()
                 current_folder_id = folder.get('id')
-                print(f"📁 Created Google Drive folder: {folder_name}")
+                log.info("📁 Created Google Drive folder", folder=folder_name)
 
         # 파일 업로드
         file_extension = os.path.splitext(file_name)[1].lower()
@@ -87,7 +107,7 @@ class ClaudeHandler:
         file_metadata = {'name': file_name, 'parents': [current_folder_id]}
         media = MediaFileUpload(local_file_path, mimetype=mimetype)
         file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
-        print(f"✅ Uploaded to Google Drive: {folder_path}/{file_name} (ID: {file.get('id')})")
+        log.info("✅ Uploaded to Google Drive", path=f"{folder_path}/{file_name}", file_id=file.get('id'))
         return file.get('id')
 
     @staticmethod
@@ -134,22 +154,43 @@ class ClaudeHandler:
             os.remove(swift_local_path)
             os.remove(json_local_path)
 
-            print(f"      ☁️ Google Drive 업로드 완료")
+            log.info("☁️ Google Drive 업로드 완료", path=file_path)
 
         except Exception as e:
-            print(f"      ❌ 저장/업로드 실패: {e}")
+            log.error("❌ 저장/업로드 실패", path=file_path, error=repr(e))
 
 
 
     @classmethod
-    def ask(cls, prompt):
-        response = cls.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1024,
-            temperature=0.7,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text.strip()
+    @traced("claude.ask", "llm")
+    def ask(cls, prompt, retry_policy: RetryPolicy | None = None):
+        # 동일한 (프롬프트, 모델, temperature) 요청은 캐시된 응답을 재사용
+        cached = cls.response_cache.get("claude", cls.model, cls.temperature, prompt)
+        if cached is not None:
+            cls.metrics.record("claude", cls.model, 0.0, outcome="cached")
+            return cached
+
+        def attempt():
+            started_at = time.monotonic()
+            try:
+                response = cls.client.messages.create(
+                    model=cls.model,
+                    max_tokens=cls.max_tokens,
+                    temperature=cls.temperature,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            except Exception as e:
+                cls.metrics.record("claude", cls.model, time.monotonic() - started_at, attempt=current_attempt(),
+                                   outcome=type(e).__name__)
+                raise
+            cls.metrics.record("claude", cls.model, time.monotonic() - started_at, response.usage.input_tokens,
+                               response.usage.output_tokens, response.stop_reason, attempt=current_attempt())
+            return response
+
+        response = (retry_policy or cls.retry_policy).call(attempt, describe="Claude")
+        text = response.content[0].text.strip()
+        cls.response_cache.put("claude", cls.model, cls.temperature, prompt, text)
+        return text
 
         # 2. Class Label (JSON 정답 레이블) 저장
         class_filename = f"{base_name}_label.json"
@@ -158,13 +199,13 @@ class ClaudeHandler:
 
         with open(class_filepath, "w", encoding="utf-8") as f:
             f.write(json_label)
-        print(f"📄 Class label saved: {class_filepath}")
+        log.info("📄 Class label saved", path=class_filepath)
 
         # 3. Google Drive에 훈련 데이터셋 구조로 업로드 (training_set 디렉토리 제외)
         ClaudeHandler.upload_to_drive(input_filepath, f"input_label/{input_filename}")
         ClaudeHandler.upload_to_drive(class_filepath, f"class_label/{class_filename}")
 
-        print(f"☁️ Training data uploaded: {base_name}")
+        log.info("☁️ Training data uploaded", name=base_name)
 
     @staticmethod
     def save_swift_code(code: str, library: str, context: str, local_dir: str = "./data/claude_generated_swift/"):
@@ -174,6 +215,6 @@ class ClaudeHandler:
 
         with open(filepath, "w", encoding="utf-8") as f:
             f.write(code)
-        print(f"📄 Saved locally: {filepath}")
+        log.info("📄 Saved locally", path=filepath)
 
         # ClaudeHandler.upload_to_drive(filepath, filename)
@@ -1,8 +1,9 @@
+import os
+import sys
 import time
-import re
+import hashlib
+import argparse
 import json
-import subprocess
-import tempfile
 from pathlib import Path
 from tqdm import tqdm
 import itertools
@@ -15,10 +16,60 @@ from prompts import (
 )
 from claude_handler.claude_handler import ClaudeHandler  # 코드 생성용
 from gemini_handler.gemini_handler import GeminiHandler  # 코드 생성 + 레이블 생성용
+from gemini_handler.async_gemini_handler import AsyncGeminiHandler
+from batch_handler import BatchAdapter, ClaudeBatchAdapter, GeminiBatchAdapter
+from swift_analyzer_handler import SwiftAnalyzerPool, AnalyzerCache  # AST 분석용
+from pipeline import (
+    SymbolAnalyzer, Labeler, JsonlDatasetWriter, PipelineManifest, PairAssembler, Stage, StagedPipeline, AIMDController,
+    build_entry, build_label_prompt, claude_requester, gemini_requester, content_hash, merge_jsonl_files,
+    is_throttle_error, is_retryable
+)
+from retry_policy import RetryPolicy, RetryBudget
+from llm_cache import CacheMissError
+from llm_metrics import LLM_METRICS, metric_labels
+from tracing import TRACER, span
+from structured_log import get_logger, configure_logging
+
+log = get_logger(__name__)
 
 ANALYZER_EXECUTABLE = "./SwiftASTAnalyzer/.build/release/SwiftASTAnalyzer"
 PATTERNS_FILE = "./patterns.json"
 OUTPUT_DIR = Path("./output")
+# 샘플/요청 단위 로그 (JSON lines, 터미널 출력 레벨은 LOG_LEVEL 환경 변수로 조절)
+LOG_FILE = OUTPUT_DIR / "logs" / "create_alpaca_dataset.jsonl"
+# 호출별 LLM 지표(JSONL)와 Prometheus 텍스트 형식 합계
+METRICS_DIR = OUTPUT_DIR / "metrics"
+# 상주 분석기 프로세스 풀 + 분석 결과 캐시 (소스 + 분석기 바이너리 해시 기반, 크기 제한 LRU)
+ANALYZER = SymbolAnalyzer(
+    SwiftAnalyzerPool(ANALYZER_EXECUTABLE),
+    AnalyzerCache(OUTPUT_DIR / "cache" / "analyzer", ANALYZER_EXECUTABLE)
+)
+# API 제공자별 동시 요청 수 컨트롤러 (응답이 안정적이면 늘리고, 사용량 한도/시간 초과 시 절반으로 줄임)
+# 각 단계의 워커 수는 max_limit이며, 실제 동시 요청 수는 컨트롤러의 현재 한도를 따름 (환경 변수로 조정 가능)
+LIMITERS = {
+    "claude": AIMDController("claude", initial=4, max_limit=int(os.getenv("CLAUDE_MAX_CONCURRENCY", 16))),
+    "gemini": AIMDController("gemini", initial=4, max_limit=int(os.getenv("GEMINI_MAX_CONCURRENCY", 16))),
+}
+# 제공자별 현재 동시성 한도/진행 중 요청 수/한도 초과 횟수를 LLM 지표 파일에 게이지로 내보냄
+for _limiter in LIMITERS.values():
+    LLM_METRICS.register_gauges("llm_concurrency", {"provider": _limiter.name}, _limiter.gauge_values)
+# 모든 요청 함수가 공유하는 재시도 정책: 요청당 최대 4회 시도, 10분 제한, 실행 전체 재시도 예산 (요청 5개당 1회 + 여유 50회)
+# 재시도는 이 정책 한 곳에서만 이루어지며, 핸들러는 요청 함수 안에서 재시도 없이 한 번만 요청함
+RETRY_BUDGET = RetryBudget(ratio=0.2, reserve=50)
+RETRY_POLICY = RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=60.0, throttle_delay=15.0, deadline=600.0,
+                           budget=RETRY_BUDGET, is_throttle=is_throttle_error, is_retryable=is_retryable,
+                           non_retryable=(CacheMissError,))
+# 모든 Gemini API 키에 요청을 분산하는 비동기 클라이언트 (키별 RPM/TPM 버킷 + 쿨다운)
+GEMINI_CLIENT = AsyncGeminiHandler()
+# 생성기별 코드 생성 요청 함수와 레이블 생성기 (Gemini 코드/레이블 요청은 같은 컨트롤러를 공유)
+CODE_REQUESTS = {
+    "claude": claude_requester(ClaudeHandler, "Claude", retry_policy=RETRY_POLICY, limiter=LIMITERS["claude"]),
+    "gemini": gemini_requester(GEMINI_CLIENT, "Gemini code", retry_policy=RETRY_POLICY, limiter=LIMITERS["gemini"]),
+}
+LABELER = Labeler(
+    gemini_requester(GEMINI_CLIENT, "Gemini label", retry_policy=RETRY_POLICY, limiter=LIMITERS["gemini"]),
+    GeminiHandler.generation_config
+)
 
 # 각 생성기별 디렉토리 구조
 GENERATED_CODE_CLAUDE = OUTPUT_DIR / "generated_code" / "claude_generated"
@@ -33,482 +84,213 @@ FINAL_DATASET_CLAUDE_ONLY = OUTPUT_DIR / "claude_only_dataset.jsonl"
 FINAL_DATASET_GEMINI_ONLY = OUTPUT_DIR / "gemini_only_dataset.jsonl"
 FINAL_DATASET_COMBINED = OUTPUT_DIR / "combined_dataset.jsonl"
 
+# 샘플별 진행 단계(코드 생성/분석/레이블/조립)와 해시를 기록하는 이어하기 매니페스트
+MANIFEST = PipelineManifest(OUTPUT_DIR / "manifest.sqlite3")
 
-# --- 2. 헬퍼 함수 (Helper Functions) ---
-
-def extract_json_block(text: str) -> str | None:
-    """텍스트에서 JSON 블록을 안전하게 추출합니다."""
-    if not text or not isinstance(text, str):
-        return None
-
-    text = text.strip()
-
-    # 1. ```json ... ``` 블록 검색
-    json_block_patterns = [
-        r"```json\s*(\{.*?\})\s*```",
-        r"```\s*(\{.*?\})\s*```",
-        r"```json\s*([\s\S]*?)\s*```",
-        r"```\s*([\s\S]*?)\s*```"
-    ]
-
-    for pattern in json_block_patterns:
-        try:
-            match = re.search(pattern, text, re.DOTALL | re.MULTILINE)
-            if match:
-                json_candidate = match.group(1).strip()
-                if json_candidate and validate_and_return_json(json_candidate):
-                    return json_candidate
-        except Exception:
-            continue
-
-    # 2. 블록 마커 없이 JSON 객체 찾기
-    return extract_json_from_text(text)
+# 배치 API 모드 요청/작업 기록 디렉토리와 폴링 간격(초)
+BATCH_DIR = OUTPUT_DIR / "batch"
+BATCH_POLL_INTERVAL = 60
 
 
-def extract_json_from_text(text: str) -> str | None:
-    """텍스트에서 유효한 JSON 객체를 추출합니다."""
-    try:
-        # 줄별로 처리하여 JSON 시작점 찾기
-        lines = text.split('\n')
-        json_start_line = -1
-
-        # JSON이 시작될 것 같은 라인 찾기
-        for i, line in enumerate(lines):
-            stripped_line = line.strip()
-            if stripped_line.startswith('{'):
-                json_start_line = i
-                break
-
-        if json_start_line == -1:
-            return None
-
-        # JSON 끝점 찾기 (중괄호 균형)
-        brace_count = 0
-        json_lines = []
-
-        for i in range(json_start_line, len(lines)):
-            line = lines[i]
-            json_lines.append(line)
-
-            for char in line:
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-
-            if brace_count == 0 and len(json_lines) > 0:
-                # JSON 객체가 완성됨
-                json_text = '\n'.join(json_lines)
-                return validate_and_return_json(json_text.strip())
-
-        # 중괄호가 균형을 이루지 못한 경우, 전체 텍스트에서 JSON 시도
-        return validate_and_return_json(text)
+# --- 2. 헬퍼 함수 (Helper Functions) ---
 
-    except Exception:
-        return None
+def build_code_prompt(task: dict, is_negative: bool) -> str:
+    """태스크 유형과 Positive/Negative 여부에 맞는 코드 생성 프롬프트를 만듭니다."""
+    task_type = task['type']
+    patterns = task['patterns']
 
+    prompt = ""
+    if task_type.startswith('Pure_nC1'):
+        prompt_template = GENERATE_SECURE_SINGLE_CODE_PROMPT if is_negative else GENERATE_SINGLE_CODE_PROMPT
+        prompt = prompt_template.format(pattern=patterns[0]['text'])
+    elif task_type.startswith('Pure_nC2'):
+        prompt_template = GENERATE_SECURE_COMBINED_CODE_PROMPT if is_negative else GENERATE_COMBINED_CODE_PROMPT
+        prompt = prompt_template.format(pattern1=patterns[0]['text'], pattern2=patterns[1]['text'])
+    elif task_type.startswith('Mixed'):
+        prompt_template = GENERATE_SECURE_MIXED_CONTEXT_CODE_PROMPT if is_negative else GENERATE_MIXED_CONTEXT_CODE_PROMPT
+        prompt = prompt_template.format(sensitive_pattern=patterns[0]['text'],
+                                        nonsensitive_pattern=patterns[1]['text'])
+    return prompt
+
+
+def iter_samples(tasks: list[dict], generator_type: str):
+    """태스크 목록을 생성기의 Positive/Negative 샘플 단위 작업으로 펼칩니다 (파이프라인 입력)."""
+    for task in tasks:
+        for is_negative, suffix in ((False, "positive"), (True, "negative")):
+            base_filename = f"{task['filename']}_{suffix}"
+            code_path, label_path, prompt_path = get_generator_sample_paths(generator_type, base_filename)
+            yield {
+                "task": task,
+                "generator": generator_type,
+                "is_negative": is_negative,
+                "suffix": suffix,
+                "name": base_filename,
+                "key": f"{generator_type}/{base_filename}",
+                # Positive/Negative 쌍은 둘 다 완료되어야 함께 기록됨
+                "pair": f"{generator_type}/{task['filename']}",
+                "code_path": code_path,
+                "label_path": label_path,
+                "prompt_path": prompt_path
+            }
 
-def validate_and_return_json(json_text: str) -> str | None:
-    """JSON 텍스트의 유효성을 검사하고 반환합니다."""
-    if not json_text:
-        return None
 
-    try:
-        # 앞뒤 공백 및 특수문자 제거
-        json_text = json_text.strip()
+def generate_code_stage(sample: dict) -> dict | None:
+    """[코드 생성 단계] 이어하기 상태를 확인하고, 필요한 경우에만 코드를 생성하여 sample["code"]에 넣습니다.
 
-        # JSON 파싱 시도
-        parsed = json.loads(json_text)
+    레이블까지 완료된 샘플은 sample["label"]도 채워지며, 이후 단계는 분석(캐시 조회)과 조립만 수행합니다.
+    """
+    sample_key = sample["key"]
+    code_path, label_path = sample["code_path"], sample["label_path"]
+    record = MANIFEST.get(sample_key)
 
-        # 기대하는 구조 확인 (reasoning, identifiers 필드)
-        if isinstance(parsed, dict) and "reasoning" in parsed and "identifiers" in parsed:
-            # 유효한 JSON이므로 원본 반환 (포맷팅 보존)
-            return json_text
+    # --- 이어하기 로직 (매니페스트 조회) ---
 
-    except (json.JSONDecodeError, TypeError, AttributeError) as e:
-        # JSON 파싱 실패 - 일반적인 문제들을 수정 시도
+    # 1. 완벽하게 완료된 경우: 매니페스트의 해시와 파일 내용이 일치하면 조립 단계까지 그대로 전달
+    if PipelineManifest.has_reached(record, "labeled"):
         try:
-            # 흔한 문제들 수정
-            fixed_json = fix_common_json_issues(json_text)
-            if fixed_json and fixed_json != json_text:
-                parsed = json.loads(fixed_json)
-                if isinstance(parsed, dict) and "reasoning" in parsed and "identifiers" in parsed:
-                    return fixed_json
-        except Exception:
+            swift_code = code_path.read_text(encoding='utf-8')
+            json_output_str = label_path.read_text(encoding='utf-8')
+            if (content_hash(swift_code) == record["code_hash"]
+                    and content_hash(json_output_str) == record["label_hash"]):
+                log.info("➡️ Using existing files", sample=sample_key)
+                sample.update(code=swift_code, label=json_output_str)
+                return sample
+        except OSError:
             pass
+        log.warning("⚠️ Existing files changed since they were recorded, will regenerate", sample=sample_key)
 
-    return None
-
-
-def fix_common_json_issues(json_text: str) -> str:
-    """일반적인 JSON 형식 문제들을 수정합니다."""
-    if not json_text:
-        return json_text
-
-    try:
-        # 1. 앞뒤 불필요한 문자 제거
-        json_text = json_text.strip()
-
-        # 2. 시작과 끝이 중괄호가 아닌 경우 찾기
-        start_idx = json_text.find('{')
-        end_idx = json_text.rfind('}')
-
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            json_text = json_text[start_idx:end_idx + 1]
-
-        # 3. 따옴표 문제 수정 (단순한 경우만)
-        json_text = re.sub(r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3', json_text)
-
-        # 4. 후행 쉼표 제거
-        json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
-
-        return json_text
-
-    except Exception:
-        return json_text
-
-
-def run_swift_analyzer_on_code(swift_code: str) -> str | None:
-    """Swift 코드를 임시 파일에 저장하고 분석기를 실행하여 심볼 정보를 반환합니다."""
-    if not swift_code or not swift_code.strip():
-        return None
-
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_file_path = Path(temp_dir) / "temp.swift"
-            temp_file_path.write_text(swift_code, encoding='utf-8')
-            command = [ANALYZER_EXECUTABLE, str(temp_file_path.absolute())]
-
-            process = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding='utf-8',
-                timeout=30
-            )
-            return process.stdout.strip() if process.stdout else None
-
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, Exception) as e:
-        print(f"  ⚠️ Swift analyzer failed: {e}")
-        return None
-
-
-def create_alpaca_input(swift_code: str, symbol_info_json: str) -> str:
-    """모델이 학습할 Input 필드를 형식에 맞게 생성합니다."""
-    try:
-        symbol_info_pretty = json.dumps(json.loads(symbol_info_json), indent=2, ensure_ascii=False)
-    except (json.JSONDecodeError, TypeError):
-        symbol_info_pretty = symbol_info_json
-
-    return f"""**Swift Source Code:**
-```swift
-{swift_code}
-```
-
-**AST Symbol Information (JSON):**
-```
-{symbol_info_pretty}
-```"""
-
-
-def safe_claude_request(prompt: str, max_retries: int = 3) -> str:
-    """Claude API 요청을 안전하게 처리합니다 (코드 생성용)."""
-    for attempt in range(max_retries):
+    # 매니페스트 도입 이전의 출력물: .swift와 .json 파일이 모두 존재하고 유효하면 재사용 (조립 단계에서 매니페스트에 기록)
+    elif record is None and code_path.exists() and label_path.exists():
         try:
-            response = ClaudeHandler.ask(prompt)
-            if response and response.strip():
-                return response.strip()
-        except Exception as e:
-            print(f"  ⚠️ Claude request attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-    return ""
-
-
-def safe_gemini_code_request(prompt: str, max_retries: int = 3) -> str:
-    """Gemini API 요청을 안전하게 처리합니다 (코드 생성용)."""
-    for attempt in range(max_retries):
+            swift_code = code_path.read_text(encoding='utf-8')
+            json_output_str = label_path.read_text(encoding='utf-8')
+            if swift_code.strip() and json_output_str.strip():
+                json.loads(json_output_str)  # JSON 유효성 검사
+                log.info("➡️ Using existing files", sample=sample_key, backfill=True)
+                sample.update(code=swift_code, label=json_output_str, backfill=True)
+                return sample
+        except (json.JSONDecodeError, FileNotFoundError, Exception) as e:
+            log.warning("⚠️ Error with existing files, will regenerate", sample=sample_key, error=repr(e))
+
+    # --- 코드 준비 단계 ---
+    generated_code = None
+
+    # 2. 코드만 존재하는 경우: .swift 파일을 읽어서 사용하고 코드 생성 단계를 건너뜀
+    if PipelineManifest.has_reached(record, "code_generated") or (record is None and code_path.exists()):
+        log.info("➡️ Code file found, reusing it", sample=sample_key)
         try:
-            prompt_config = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "parts": [prompt]
-                    }
-                ]
-            }
-            response = GeminiHandler.ask(prompt_config, model_name="gemini-2.5-pro")
-            if response and response.strip():
-                return response.strip()
-        except Exception as e:
-            print(f"  ⚠️ Gemini code request attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-    return ""
-
-
-def safe_gemini_label_request(prompt: str, max_retries: int = 3) -> str:
-    """Gemini API 요청을 안전하게 처리합니다 (레이블 생성용)."""
-    for attempt in range(max_retries):
-        try:
-            prompt_config = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "parts": [prompt]
-                    }
-                ]
-            }
-            response = GeminiHandler.ask(prompt_config, model_name="gemini-2.5-pro")
-            if response and response.strip():
-                return response.strip()
+            existing_code = code_path.read_text(encoding='utf-8')
+            if record and record["code_hash"] != content_hash(existing_code):
+                log.warning("⚠️ Existing code file changed since it was recorded, will regenerate", sample=sample_key)
+            else:
+                generated_code = existing_code.strip()
+                if not generated_code:
+                    log.warning("⚠️ Existing code file is empty, will regenerate", sample=sample_key)
+                elif record is None:
+                    MANIFEST.record(sample_key, "code_generated", code_hash=content_hash(existing_code))
         except Exception as e:
-            print(f"  ⚠️ Gemini label request attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-    return ""
-
-
-def process_single_task_for_generator(task: dict, generator_type: str) -> list[dict]:
-    """하나의 태스크에 대해 특정 생성기로 Positive/Negative 샘플 쌍을 생성합니다."""
-    final_entries = []
-    task_type = task['type']
-    patterns = task['patterns']
+            log.warning("⚠️ Could not read existing code file, will regenerate", path=str(code_path), error=repr(e))
+            generated_code = None  # 읽기 실패 시 재생성하도록 초기화
+
+    # 3. 코드가 존재하지 않거나 비어있는 경우: API를 호출하여 코드 생성
+    if not generated_code:
+        log.info("✨ Generating new code", sample=sample_key)
+        with metric_labels(stage="codegen", generator=sample["generator"], task_type=sample["task"]["type"]):
+            api_response = CODE_REQUESTS[sample["generator"]](build_code_prompt(sample["task"], sample["is_negative"]))
+        if not api_response:
+            log.error("❌ Code generation API call failed", sample=sample_key)
+            return None
 
-    print(f"  🔄 Processing task: {task['filename']} with {generator_type}")
+        generated_code = api_response.removeprefix("```swift").removesuffix("```").strip()
+        if not generated_code:
+            log.error("❌ Empty code after processing", sample=sample_key)
+            return None
 
-    # 생성기별 경로 설정
-    if generator_type == "claude":
-        code_dir = GENERATED_CODE_CLAUDE
-        label_dir = GENERATED_LABELS_CLAUDE
-        prompt_dir = GENERATION_PROMPTS_CLAUDE
-        code_request_func = safe_claude_request
-    else:  # gemini
-        code_dir = GENERATED_CODE_GEMINI
-        label_dir = GENERATED_LABELS_GEMINI
-        prompt_dir = GENERATION_PROMPTS_GEMINI
-        code_request_func = safe_gemini_code_request
-
-    samples_to_generate = [
-        {"is_negative": False, "suffix": "positive"},
-        {"is_negative": True, "suffix": "negative"}
-    ]
+        # 레이블 단계에서 실패하더라도 다음 실행에서 재사용할 수 있도록 바로 저장
+        code_path.parent.mkdir(parents=True, exist_ok=True)
+        code_path.write_text(generated_code, encoding='utf-8')
+        MANIFEST.record(sample_key, "code_generated", code_hash=content_hash(generated_code))
 
-    for sample_info in samples_to_generate:
-        is_negative = sample_info['is_negative']
-        suffix = sample_info['suffix']
-        base_filename = f"{task['filename']}_{suffix}"
-
-        code_path = code_dir / f"{base_filename}.swift"
-        label_path = label_dir / f"{base_filename}.json"
-        prompt_path = prompt_dir / f"{base_filename}.txt"
-
-        # --- 이어하기 로직 ---
-
-        # 1. 완벽하게 완료된 경우: .swift와 .json 파일이 모두 존재하고 유효하면 건너뜀
-        if code_path.exists() and label_path.exists():
-            try:
-                swift_code = code_path.read_text(encoding='utf-8')
-                json_output_str = label_path.read_text(encoding='utf-8')
-                if swift_code.strip() and json_output_str.strip():
-                    json.loads(json_output_str)  # JSON 유효성 검사
-                    symbol_info = run_swift_analyzer_on_code(swift_code)
-                    if symbol_info:
-                        print(f"  ➡️ Using existing files for {base_filename}")
-                        final_entries.append({
-                            "instruction": "In the following Swift code, find all identifiers related to sensitive logic. Provide the names and reasoning as a JSON object.",
-                            "input": create_alpaca_input(swift_code, symbol_info),
-                            "output": json_output_str
-                        })
-                        continue  # 이 샘플은 완전히 완료되었으므로 다음 샘플로 넘어감
-            except (json.JSONDecodeError, FileNotFoundError, Exception) as e:
-                print(f"  ⚠️ Error with existing files for {base_filename}, will regenerate. Error: {e}")
-
-        # --- 코드 준비 단계 ---
-        generated_code = None
-
-        # 2. 코드만 존재하는 경우: .swift 파일을 읽어서 사용하고 코드 생성 단계를 건너뜀
-        if code_path.exists():
-            print(f"  ➡️ Code file found for {base_filename}. Reusing it.")
-            try:
-                generated_code = code_path.read_text(encoding='utf-8').strip()
-                if not generated_code:
-                    print(f"  ⚠️ Existing code file for {base_filename} is empty. Will regenerate.")
-            except Exception as e:
-                print(f"  ⚠️ Could not read existing code file {code_path}: {e}. Will regenerate.")
-                generated_code = None  # 읽기 실패 시 재생성하도록 초기화
+    sample["code"] = generated_code
+    return sample
 
-        # 3. 코드가 존재하지 않거나 비어있는 경우: API를 호출하여 코드 생성
-        if not generated_code:
-            print(f"  ✨ Generating new code for {base_filename}...")
-            try:
-                prompt = ""
-                if task_type.startswith('Pure_nC1'):
-                    prompt_template = GENERATE_SECURE_SINGLE_CODE_PROMPT if is_negative else GENERATE_SINGLE_CODE_PROMPT
-                    prompt = prompt_template.format(pattern=patterns[0]['text'])
-                elif task_type.startswith('Pure_nC2'):
-                    prompt_template = GENERATE_SECURE_COMBINED_CODE_PROMPT if is_negative else GENERATE_COMBINED_CODE_PROMPT
-                    prompt = prompt_template.format(pattern1=patterns[0]['text'], pattern2=patterns[1]['text'])
-                elif task_type.startswith('Mixed'):
-                    prompt_template = GENERATE_SECURE_MIXED_CONTEXT_CODE_PROMPT if is_negative else GENERATE_MIXED_CONTEXT_CODE_PROMPT
-                    prompt = prompt_template.format(sensitive_pattern=patterns[0]['text'],
-                                                    nonsensitive_pattern=patterns[1]['text'])
-
-                api_response = code_request_func(prompt)
-                if not api_response:
-                    print(f"  ❌ Code generation API call failed for {base_filename}")
-                    continue
-
-                generated_code = api_response.removeprefix("```swift").removesuffix("```").strip()
-                if not generated_code:
-                    print(f"  ❌ Empty code after processing for {base_filename}")
-                    continue
 
-            except Exception as e:
-                print(f"  ❌ Code generation error for {base_filename}: {e}")
-                continue
+def analyze_stage(sample: dict) -> dict | None:
+    """[AST 분석 단계] 상주 분석기 풀로 심볼 정보를 구해 sample["symbols"]에 넣습니다."""
+    symbol_info = ANALYZER.analyze(sample["code"])
+    if not symbol_info:
+        log.error("❌ AST analysis failed", sample=sample["key"])
+        return None
 
-        # --- AST 분석 단계 ---
+    if not sample.get("label"):
+        MANIFEST.record(sample["key"], "analyzed", symbols_hash=content_hash(symbol_info.compact))
+    sample["symbols"] = symbol_info
+    return sample
+
+
+def label_stage(samples: list[dict]) -> list[dict]:
+    """[레이블 생성 단계] 큐에 함께 쌓인 샘플들을 한 번의 요청으로 레이블링하고 프롬프트/레이블 파일을 저장합니다."""
+    pending = [sample for sample in samples if not sample.get("label")]
+    for sample in pending:
+        # 모든 샘플에 대해 동일한 프롬프트 템플릿 사용
+        sample["label_prompt"] = build_label_prompt(sample["code"], sample["symbols"])
+
+    # 배치 요청 하나에 여러 생성기/태스크 유형이 섞이면 "mixed"로 집계
+    generators = {sample["generator"] for sample in pending}
+    task_types = {sample["task"]["type"] for sample in pending}
+    with metric_labels(stage="label", generator=generators.pop() if len(generators) == 1 else "mixed",
+                       task_type=task_types.pop() if len(task_types) == 1 else "mixed"):
+        # 생성기가 달라도 파일명이 같을 수 있으므로 샘플 키(생성기/파일명)로 구분
+        # 같은 태스크의 Positive/Negative(sample["pair"])는 서로 다른 요청으로 나뉨
+        prompts = {}
+        labels = LABELER.generate_batched([{**sample, "name": sample["key"]} for sample in pending], prompts) if pending else {}
+
+    for sample in pending:
+        json_output_str = labels.get(sample["key"])
+        if not json_output_str:
+            log.error("❌ Label generation failed, skipping", sample=sample["key"])
+            continue
         try:
-            symbol_info_json = run_swift_analyzer_on_code(generated_code)
-            if not symbol_info_json:
-                print(f"  ❌ AST analysis failed for {base_filename}")
-                continue
-        except Exception as e:
-            print(f"  ❌ AST analysis error for {base_filename}: {e}")
+            sample["label_path"].parent.mkdir(parents=True, exist_ok=True)
+            sample["prompt_path"].parent.mkdir(parents=True, exist_ok=True)
+            # 레이블을 실제로 얻은 프롬프트(배치 프롬프트일 수 있음)를 저장
+            sample["prompt_path"].write_text(prompts.get(sample["key"], sample["label_prompt"]), encoding='utf-8')
+            sample["label_path"].write_text(json_output_str, encoding='utf-8')
+        except OSError as e:
+            log.error("❌ File saving error", sample=sample["key"], error=repr(e))
             continue
+        MANIFEST.record(sample["key"], "labeled", label_hash=content_hash(json_output_str))
+        sample["label"] = json_output_str
 
-        # --- 레이블 생성 단계 (모든 샘플에 대해 동일하게 처리) ---
-        json_output_str = ""
-        label_prompt_for_file = ""
+    return [sample for sample in samples if sample.get("label")]
 
-        try:
-            # 모든 샘플에 대해 동일한 프롬프트 템플릿 사용
-            label_prompt_for_file = f"""You are an expert security code auditor.
-Your task is to identify all sensitive identifiers in the provided Swift code and explain your reasoning.
-Analyze both the source code and its corresponding AST symbol information.
-
-**Swift Source Code:**
-```swift
-{generated_code}
-```
-
-**AST Symbol Information (JSON):**
-```json
-{symbol_info_json}
-```
-
-Based on your analysis, provide your response as a JSON object with two keys: "reasoning" and "identifiers".
-
-"reasoning": A brief step-by-step explanation of why the identified identifiers are considered sensitive. For secure code, explain why it is safe.
-
-"identifiers": A JSON list of strings containing only the simple base name of each sensitive identifier. For secure code, this should be an empty list [].
-
-Example for vulnerable code:
-```json
-{{
-  "reasoning": "The `save` function is sensitive because it calls the `SecItemAdd` Keychain API. The `secretToken` variable holds the data being saved.",
-  "identifiers": ["save", "secretToken"]
-}}
-```
-
-Example for secure code:
-```json
-{{
-  "reasoning": "This code correctly uses the Keychain to store secrets, which is a security best practice. Therefore, no sensitive identifiers were found.",
-  "identifiers": []
-}}
-```
-
-Your response must be ONLY the JSON object, following these rules exactly."""
-
-            # API 호출로 레이블 생성 (재시도 로직 포함)
-            success = False
-            for attempt in range(3):
-                try:
-                    raw_response = safe_gemini_label_request(label_prompt_for_file)
-                    if not raw_response:
-                        print(f"  ⚠️ Empty response for {base_filename}, attempt {attempt + 1}")
-                        continue
-
-                    print(f"  🔍 Raw response length for {base_filename}: {len(raw_response)} chars")
-
-                    # 여러 방법으로 JSON 추출 시도
-                    json_candidates = []
-
-                    # 방법 1: 기존 extract_json_block
-                    extracted_json = extract_json_block(raw_response)
-                    if extracted_json:
-                        json_candidates.append(extracted_json)
-
-                    # 방법 2: 간단한 중괄호 찾기
-                    start = raw_response.find('{')
-                    end = raw_response.rfind('}')
-                    if start != -1 and end != -1 and end > start:
-                        simple_json = raw_response[start:end + 1]
-                        if simple_json not in json_candidates:
-                            json_candidates.append(simple_json)
-
-                    # 각 후보에 대해 검증
-                    for candidate in json_candidates:
-                        try:
-                            output_data = json.loads(candidate)
-                            if isinstance(output_data, dict) and "reasoning" in output_data and "identifiers" in output_data:
-                                json_output_str = json.dumps(output_data, ensure_ascii=False, indent=2)
-                                success = True
-                                print(f"  ✅ JSON successfully parsed for {base_filename}")
-                                break
-                        except json.JSONDecodeError as e:
-                            print(f"  ⚠️ JSON candidate failed for {base_filename}: {e}")
-                            continue
-
-                    if success:
-                        break
-                    else:
-                        print(f"  ❌ All JSON candidates failed for {base_filename}, attempt {attempt + 1}")
-                        print(f"  📄 Response preview: {raw_response[:200]}...")
-                        time.sleep(2)
-
-                except Exception as e:
-                    print(f"  ⚠️ Unexpected error for {base_filename}, attempt {attempt + 1}: {e}")
-                    time.sleep(2)
-
-            if not success:
-                print(f"  ❌ Label generation failed for {base_filename} after 3 attempts. Skipping.")
-                continue
 
-        except Exception as e:
-            print(f"  ❌ Label generation error for {base_filename}: {e}")
-            continue
+def make_assemble_stage(writers: dict[str, JsonlDatasetWriter], counts: dict[str, int], pairs: PairAssembler):
+    """[조립 단계] Positive/Negative 쌍이 모두 도착하면 두 엔트리를 생성기별 writer에 함께 기록하는 함수를 반환합니다.
 
-        # --- 파일 저장 및 최종 엔트리 생성 ---
-        try:
-            # 디렉토리 생성
-            code_path.parent.mkdir(parents=True, exist_ok=True)
-            label_path.parent.mkdir(parents=True, exist_ok=True)
-            prompt_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # 파일 저장
-            prompt_path.write_text(label_prompt_for_file, encoding='utf-8')
-            code_path.write_text(generated_code, encoding='utf-8')
-            label_path.write_text(json_output_str, encoding='utf-8')
-
-            # Alpaca 포맷 엔트리 생성
-            alpaca_input = create_alpaca_input(generated_code, symbol_info_json)
-
-            final_entries.append({
-                "instruction": "In the following Swift code, find all identifiers related to sensitive logic. Provide the names and reasoning as a JSON object.",
-                "input": alpaca_input,
-                "output": json_output_str
-            })
+    쌍 중 하나가 실패하면(pairs.discard) 다른 하나도 기록하지 않으므로, 데이터셋에는 항상 쌍 단위로만 엔트리가 들어갑니다.
+    """
+    def assemble_stage(sample: dict):
+        pair = pairs.add(sample["pair"], sample["suffix"], sample)
+        if pair is None:
+            return  # 짝이 아직 처리 중이거나 이미 실패함
 
-        except Exception as e:
-            print(f"  ❌ File saving error for {base_filename}: {e}")
-            continue
+        # Positive -> Negative 순서 유지
+        writers[sample["generator"]].write_many([
+            build_entry(part["code"], part["symbols"], part["label"]) for part in pair
+        ])
+        counts[sample["generator"]] += len(pair)
 
-    print(f"  ✅ Task {task['filename']} with {generator_type} completed: {len(final_entries)} entries")
-    return final_entries
+        for part in pair:
+            if part.get("backfill"):
+                MANIFEST.record(part["key"], "assembled", code_hash=content_hash(part["code"]),
+                                symbols_hash=content_hash(part["symbols"].compact),
+                                label_hash=content_hash(part["label"]))
+            else:
+                MANIFEST.record(part["key"], "assembled")
+        log.info("✅ Task completed", task=sample["task"]["filename"], generator=sample["generator"], entries=len(pair))
+
+    return assemble_stage
 
 
 def generate_tasks(patterns_by_category: dict) -> list[dict]:
@@ -551,9 +333,313 @@ def generate_tasks(patterns_by_category: dict) -> list[dict]:
     return list(unique_tasks)
 
 
+def report_llm_cache_stats() -> bool:
+    """LLM 응답 캐시 통계를 출력하고, replay 모드에서 캐시 미스가 있었는지 반환합니다."""
+    replay_missed = False
+    for name, handler in (("Claude", ClaudeHandler), ("Gemini", GeminiHandler)):
+        stats = handler.response_cache.stats()
+        print(f"🗄️ {name} response cache ({stats['mode']}): {stats['hits']} hits, {stats['misses']} misses")
+        if stats['mode'] == "replay" and stats['misses']:
+            replay_missed = True
+    return replay_missed
+
+
+def report_concurrency_stats():
+    """제공자별 동시성 컨트롤러의 최종 한도와 성공/한도 초과 횟수, 재시도 예산 사용량을 출력합니다."""
+    for limiter in LIMITERS.values():
+        stats = limiter.stats()
+        print(f"🚦 {stats['name']} concurrency: limit {stats['limit']} (peak {stats['peak_limit']}), "
+              f"{stats['successes']} ok, {stats['throttles']} throttled, {stats['errors']} errors, "
+              f"+{stats['increases']}/-{stats['decreases']} adjustments")
+    budget = RETRY_BUDGET.stats()
+    print(f"🔁 Retries: {budget['retries']} used for {budget['requests']} requests, {budget['denied']} denied by budget")
+
+
+def report_llm_metrics():
+    """LLM 호출 지표를 Prometheus 텍스트 파일로 저장하고, 스테이지/생성기/태스크 유형별 호출 수와 토큰, 비용을 출력합니다."""
+    LLM_METRICS.write_prometheus(METRICS_DIR / "llm_metrics.prom")
+    LLM_METRICS.close()
+    total_cost = 0.0
+    for (stage, generator, task_type), totals in sorted(LLM_METRICS.summary(("stage", "generator", "task_type")).items()):
+        api_calls = totals["calls"]
+        mean_latency = totals["latency_sum"] / api_calls if api_calls else 0.0
+        total_cost += totals["cost_usd"]
+        print(f"💰 [{stage}/{generator}/{task_type}] {api_calls} calls ({totals['retries']} retries), "
+              f"{totals['input_tokens']} in / {totals['output_tokens']} out tokens, "
+              f"avg {mean_latency:.2f}s, ${totals['cost_usd']:.4f}")
+    print(f"💰 Estimated LLM cost: ${total_cost:.4f} (per-call metrics: {METRICS_DIR / 'llm_calls.jsonl'})")
+
+
+def report_trace():
+    """추적이 켜져 있으면 실행 구간을 Chrome trace-event JSON으로 저장하고, 총 소요 시간이 긴 구간을 출력합니다."""
+    if not TRACER.enabled:
+        return
+    path = TRACER.write_chrome_trace()
+    for name, totals in list(TRACER.summary().items())[:10]:
+        print(f"⏱️ {name}: {totals['count']} spans, {totals['total']:.1f}s total, max {totals['max']:.2f}s")
+    print(f"⏱️ Trace saved to {path} (open in chrome://tracing or https://ui.perfetto.dev)")
+
+
+def run_tasks_staged(tasks: list[dict], writers: dict[str, JsonlDatasetWriter]) -> dict[str, int]:
+    """코드 생성 -> AST 분석 -> 레이블 생성 -> 조립을 단계별 워커 풀로 동시에 실행합니다.
+
+    단계 사이에는 크기가 제한된 큐가 있어, 앞 단계가 너무 앞서가면 대기하게 됩니다.
+    한 태스크의 Positive/Negative 샘플은 별개의 항목으로 동시에 처리되고, 조립 단계에서 쌍이 모두 완료되어야 함께 기록됩니다.
+    생성기별로 기록한 엔트리 수를 반환합니다.
+    """
+    generator_types = list(writers)
+    counts = {generator_type: 0 for generator_type in generator_types}
+    pairs = PairAssembler()
+
+    def on_finish(sample: dict, completed: bool):
+        if not completed:
+            pairs.discard(sample["pair"])
+        pbar.update(1)
+
+    with tqdm(total=len(tasks) * 2 * len(generator_types), desc="Processing samples") as pbar:
+        pipeline = StagedPipeline([
+            *[
+                Stage(f"codegen:{generator_type}", generate_code_stage,
+                      workers=LIMITERS[generator_type].max_limit, downstream="analyze")
+                for generator_type in generator_types
+            ],
+            Stage("analyze", analyze_stage, workers=ANALYZER.size, downstream="label"),
+            Stage("label", label_stage, workers=LIMITERS["gemini"].max_limit, downstream="assemble",
+                  batch_size=LABELER.batch_size),
+            Stage("assemble", make_assemble_stage(writers, counts, pairs), workers=1),
+        ], on_finish=on_finish)
+        # 생성기별 코드 생성 단계에 샘플을 따로 공급하여 두 제공자가 처음부터 함께 동작하도록 함
+        pipeline.run({f"codegen:{generator_type}": iter_samples(tasks, generator_type) for generator_type in generator_types})
+
+    dropped = {name: count for name, count in pipeline.dropped.items() if count}
+    if dropped:
+        log.warning("⚠️ Samples dropped per stage", **dropped)
+    return counts
+
+
+def get_generator_sample_paths(generator_type: str, base_filename: str) -> tuple[Path, Path, Path]:
+    """생성기별 (코드, 레이블, 프롬프트) 파일 경로를 반환합니다."""
+    if generator_type == "claude":
+        return (GENERATED_CODE_CLAUDE / f"{base_filename}.swift",
+                GENERATED_LABELS_CLAUDE / f"{base_filename}.json",
+                GENERATION_PROMPTS_CLAUDE / f"{base_filename}.txt")
+    return (GENERATED_CODE_GEMINI / f"{base_filename}.swift",
+            GENERATED_LABELS_GEMINI / f"{base_filename}.json",
+            GENERATION_PROMPTS_GEMINI / f"{base_filename}.txt")
+
+
+def make_batch_custom_id(stage: str, generator_type: str, base_filename: str) -> str:
+    # 제공자별 custom_id 제약(영숫자/_/-, 64자 이하)을 만족하도록 해시 사용
+    digest = hashlib.sha1(f"{stage}:{generator_type}:{base_filename}".encode('utf-8')).hexdigest()
+    return f"{stage}-{digest[:24]}"
+
+
+def batch_results_path(stage: str, job_id: str) -> Path:
+    return BATCH_DIR / f"{stage}_{job_id.replace('/', '_')}_results.jsonl"
+
+
+def load_batch_results(path: Path) -> dict[str, str]:
+    results = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            results[record["custom_id"]] = record["response"]
+    return results
+
+
+def save_batch_results(path: Path, results: dict[str, str]):
+    """응답을 임시 파일에 쓴 뒤 교체 (작업을 done으로 기록하기 전에 호출)."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for custom_id, response in results.items():
+            f.write(json.dumps({"custom_id": custom_id, "response": response}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def run_batch_stage(stage: str, adapter: BatchAdapter, requests: list[dict]) -> dict[str, str]:
+    """배치 작업을 제출한 뒤 완료될 때까지 폴링하여 {custom_id: 응답}을 반환합니다.
+
+    제출한 작업은 jobs 파일에, 완료된 작업의 응답은 작업별 results 파일(<stage>_<job_id>_results.jsonl)에
+    먼저 저장한 뒤 작업을 done으로 기록합니다. 중단 후 다시 실행하면 실행 중인 작업은 재제출하지 않고 폴링을 이어가고,
+    완료됐지만 호출자가 저장하지 못한 응답은 results 파일에서 다시 읽어 반환합니다.
+    """
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    jobs_file = BATCH_DIR / f"{stage}_jobs.json"
+
+    jobs = json.loads(jobs_file.read_text(encoding='utf-8')) if jobs_file.exists() else []
+    requested = {request["custom_id"] for request in requests}
+    results = {}
+    for job in jobs:
+        if job["status"] == "done" and batch_results_path(stage, job["job_id"]).exists():
+            saved = load_batch_results(batch_results_path(stage, job["job_id"]))
+            results.update((custom_id, response) for custom_id, response in saved.items() if custom_id in requested)
+    if results:
+        log.info("📂 Reusing saved batch responses", stage=stage, responses=len(results))
+
+    in_flight = {custom_id for job in jobs if job["status"] == "running" for custom_id in job["custom_ids"]}
+    new_requests = [request for request in requests
+                    if request["custom_id"] not in in_flight and request["custom_id"] not in results]
+
+    for i in range(0, len(new_requests), adapter.max_requests_per_job):
+        chunk = new_requests[i:i + adapter.max_requests_per_job]
+        job_id = adapter.submit(chunk)
+        jobs.append({"job_id": job_id, "custom_ids": [request["custom_id"] for request in chunk], "status": "running"})
+        jobs_file.write_text(json.dumps(jobs, indent=2), encoding='utf-8')
+        log.info("📤 Submitted batch job", stage=stage, job_id=job_id, requests=len(chunk))
+
+    while True:
+        running_jobs = [job for job in jobs if job["status"] == "running"]
+        for job in running_jobs:
+            status = adapter.poll(job["job_id"])
+            if status == "succeeded":
+                job_results = adapter.results(job["job_id"], job["custom_ids"])
+                save_batch_results(batch_results_path(stage, job["job_id"]), job_results)
+                results.update(job_results)
+                job["status"] = "done"
+            elif status == "failed":
+                log.error("❌ Batch job failed", stage=stage, job_id=job["job_id"])
+                job["status"] = "failed"
+        jobs_file.write_text(json.dumps(jobs, indent=2), encoding='utf-8')
+
+        still_running = sum(1 for job in jobs if job["status"] == "running")
+        if not still_running:
+            break
+        log.info("⏳ Batch jobs still running", stage=stage, running=still_running, poll_interval=BATCH_POLL_INTERVAL)
+        time.sleep(BATCH_POLL_INTERVAL)
+
+    log.info("📥 Received batch responses", stage=stage, responses=len(results))
+    return results
+
+
+def run_batch_code_generation(tasks: list[dict], generator_type: str, adapter: BatchAdapter):
+    """코드 파일이 없는 모든 샘플의 코드 생성 프롬프트를 배치로 처리하여 generated_code에 저장합니다."""
+    requests = []
+    targets = {}
+    targets_keys = {}
+    for task in tasks:
+        for is_negative, suffix in ((False, "positive"), (True, "negative")):
+            base_filename = f"{task['filename']}_{suffix}"
+            sample_key = f"{generator_type}/{base_filename}"
+            code_path, _, _ = get_generator_sample_paths(generator_type, base_filename)
+            if PipelineManifest.has_reached(MANIFEST.get(sample_key), "code_generated"):
+                continue
+            if code_path.exists() and code_path.stat().st_size > 0:
+                continue
+            custom_id = make_batch_custom_id("code", generator_type, base_filename)
+            requests.append({"custom_id": custom_id, "prompt": build_code_prompt(task, is_negative)})
+            targets[custom_id] = code_path
+            targets_keys[custom_id] = sample_key
+
+    print(f"\n📦 [{generator_type}] {len(requests)} code generation requests pending")
+    if not requests:
+        return
+
+    responses = run_batch_stage(f"code_{generator_type}", adapter, requests)
+    saved_count = 0
+    for custom_id, api_response in responses.items():
+        code_path = targets.get(custom_id)
+        generated_code = api_response.removeprefix("```swift").removesuffix("```").strip()
+        if not code_path or not generated_code:
+            continue
+        code_path.parent.mkdir(parents=True, exist_ok=True)
+        code_path.write_text(generated_code, encoding='utf-8')
+        MANIFEST.record(targets_keys[custom_id], "code_generated", code_hash=content_hash(generated_code))
+        saved_count += 1
+    print(f"  ✅ [{generator_type}] Saved {saved_count}/{len(requests)} generated code files")
+
+
+def prepare_batch_label_request(generator_type: str, base_filename: str) -> dict | None:
+    sample_key = f"{generator_type}/{base_filename}"
+    record = MANIFEST.get(sample_key)
+    if PipelineManifest.has_reached(record, "labeled"):
+        return None
+
+    code_path, label_path, prompt_path = get_generator_sample_paths(generator_type, base_filename)
+    if record is None and (not code_path.exists() or (label_path.exists() and label_path.stat().st_size > 0)):
+        return None
+
+    try:
+        raw_code = code_path.read_text(encoding='utf-8')
+    except OSError:
+        return None
+    swift_code = raw_code.strip()
+    symbol_info = ANALYZER.analyze(swift_code)
+    if not symbol_info:
+        log.error("❌ AST analysis failed", sample=sample_key)
+        return None
+    MANIFEST.record(sample_key, "analyzed", code_hash=content_hash(raw_code), symbols_hash=content_hash(symbol_info.compact))
+
+    return {
+        "custom_id": make_batch_custom_id("label", generator_type, base_filename),
+        "sample_key": sample_key,
+        "base_filename": base_filename,
+        "prompt": build_label_prompt(swift_code, symbol_info),
+        "label_path": label_path,
+        "prompt_path": prompt_path
+    }
+
+
+def run_batch_label_generation(tasks: list[dict], adapter: BatchAdapter):
+    """코드는 있지만 레이블이 없는 모든 샘플의 레이블 프롬프트를 배치로 처리하여 outputs/inputs에 저장합니다."""
+    sample_keys = [
+        (generator_type, f"{task['filename']}_{suffix}")
+        for generator_type in ("claude", "gemini")
+        for task in tasks
+        for suffix in ("positive", "negative")
+    ]
+    # AST 분석은 분석기 풀 크기만큼 병렬로 수행
+    with concurrent.futures.ThreadPoolExecutor(max_workers=ANALYZER.size) as executor:
+        prepared = [request for request in executor.map(lambda key: prepare_batch_label_request(*key), sample_keys) if request]
+
+    print(f"\n📦 [label] {len(prepared)} label generation requests pending")
+    if not prepared:
+        return
+
+    targets = {request["custom_id"]: request for request in prepared}
+    responses = run_batch_stage(
+        "label", adapter, [{"custom_id": request["custom_id"], "prompt": request["prompt"]} for request in prepared]
+    )
+
+    saved_count = 0
+    for custom_id, raw_response in responses.items():
+        request = targets.get(custom_id)
+        if not request:
+            continue
+        json_output_str = LABELER.parse(raw_response, request["base_filename"])
+        if not json_output_str:
+            log.error("❌ Could not parse batch label", sample=request["sample_key"])
+            continue
+        request["prompt_path"].parent.mkdir(parents=True, exist_ok=True)
+        request["label_path"].parent.mkdir(parents=True, exist_ok=True)
+        request["prompt_path"].write_text(request["prompt"], encoding='utf-8')
+        request["label_path"].write_text(json_output_str, encoding='utf-8')
+        MANIFEST.record(request["sample_key"], "labeled", label_hash=content_hash(json_output_str))
+        saved_count += 1
+    print(f"  ✅ [label] Saved {saved_count}/{len(prepared)} labels")
+
+
+def run_batch_generation(tasks: list[dict], adapters: dict[str, BatchAdapter]):
+    """코드 생성 -> 레이블 생성을 제공자의 배치 API로 처리합니다.
+
+    adapters는 "claude", "gemini"(코드 생성)와 "label"(레이블 생성) 키를 가집니다.
+    결과는 기존 output/generated_code, output/outputs 구조에 저장되므로 이후 일반 파이프라인이 그대로 이어서 조립합니다.
+    """
+    print("\n📦 Running batch generation (offline batch APIs)...")
+    for generator_type in ("claude", "gemini"):
+        run_batch_code_generation(tasks, generator_type, adapters[generator_type])
+    run_batch_label_generation(tasks, adapters["label"])
+
+
 # --- 3. 메인 파이프라인 (Main Pipeline) ---
-def main_pipeline():
-    """최종 데이터셋 생성 파이프라인 (Claude + Gemini 코드 생성, Gemini 레이블 생성)"""
+def main_pipeline(batch_mode: bool = False, batch_adapters: dict[str, BatchAdapter] | None = None):
+    """최종 데이터셋 생성 파이프라인 (Claude + Gemini 코드 생성, Gemini 레이블 생성)
+
+    batch_mode가 True이면 먼저 모든 미완료 프롬프트를 제공자의 배치 API로 처리한 뒤,
+    일반 파이프라인으로 남은 샘플을 채우고 데이터셋을 조립합니다.
+    """
+    configure_logging(LOG_FILE)
     print("🚀 Starting Alpaca dataset generation pipeline...")
     print("  📝 Claude: Code generation")
     print("  📝 Gemini: Code generation")
@@ -574,62 +660,65 @@ def main_pipeline():
         return
 
     tasks = generate_tasks(patterns_by_category)
-
-    claude_dataset = []
-    gemini_dataset = []
-    combined_dataset = []
-
-    # Claude 생성기로 처리
-    print("\n🔵 Processing with Claude code generator...")
-    for i, task in enumerate(tqdm(tasks, desc="Processing tasks with Claude")):
-        try:
-            entries = process_single_task_for_generator(task, "claude")
-            if entries:
-                claude_dataset.extend(entries)
-                combined_dataset.extend(entries)
-        except Exception as exc:
-            print(f"  ❌ Claude task {task['filename']} generated an exception: {exc}")
-            import traceback
-            traceback.print_exc()
-
-    # Gemini 생성기로 처리
-    print("\n🟡 Processing with Gemini code generator...")
-    for i, task in enumerate(tqdm(tasks, desc="Processing tasks with Gemini")):
-        try:
-            entries = process_single_task_for_generator(task, "gemini")
-            if entries:
-                gemini_dataset.extend(entries)
-                combined_dataset.extend(entries)
-        except Exception as exc:
-            print(f"  ❌ Gemini task {task['filename']} generated an exception: {exc}")
-            import traceback
-            traceback.print_exc()
-
-    # 최종 데이터셋 파일들 저장
+    print(f"📒 Manifest: {len(MANIFEST)} samples recorded {MANIFEST.stage_counts()}")
+
+    if batch_mode:
+        adapters = batch_adapters or {
+            "claude": ClaudeBatchAdapter(),
+            "gemini": GeminiBatchAdapter(),
+            "label": GeminiBatchAdapter()
+        }
+        with span("batch_generation"):
+            run_batch_generation(tasks, adapters)
+
+    # 코드 생성(Claude / Gemini) -> AST 분석 -> 레이블 생성 -> 조립 단계를 동시에 실행 (단계별 워커 한도 적용)
+    # 엔트리는 완료되는 즉시 생성기별 JSONL 파일에 기록되므로 중단되어도 조립된 엔트리는 유지됨
+    print(f"\n🔵🟡 Processing with Claude (up to {LIMITERS['claude'].max_limit} concurrent requests) "
+          f"and Gemini (up to {LIMITERS['gemini'].max_limit} concurrent requests) code generators "
+          f"and {ANALYZER.size} analyzer workers...")
+    LLM_METRICS.open(METRICS_DIR / "llm_calls.jsonl")
+    # 실행 중에도 동시성 한도 변화를 볼 수 있도록 Prometheus 파일을 주기적으로 갱신
+    LLM_METRICS.start_export(METRICS_DIR / "llm_metrics.prom")
     try:
-        # Claude only dataset
-        with open(FINAL_DATASET_CLAUDE_ONLY, "w", encoding="utf-8") as f:
-            for entry in claude_dataset:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        with JsonlDatasetWriter(FINAL_DATASET_CLAUDE_ONLY) as claude_writer, \
+                JsonlDatasetWriter(FINAL_DATASET_GEMINI_ONLY) as gemini_writer:
+            with span("run_tasks_staged", tasks=len(tasks)):
+                counts = run_tasks_staged(tasks, {"claude": claude_writer, "gemini": gemini_writer})
 
-        # Gemini only dataset
-        with open(FINAL_DATASET_GEMINI_ONLY, "w", encoding="utf-8") as f:
-            for entry in gemini_dataset:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
-        # Combined dataset
-        with open(FINAL_DATASET_COMBINED, "w", encoding="utf-8") as f:
-            for entry in combined_dataset:
-                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # Combined dataset은 생성기별 파일을 이어 붙여 만듦 (메모리에 중복 보관하지 않음)
+        with span("merge_datasets"):
+            combined_count = merge_jsonl_files([FINAL_DATASET_CLAUDE_ONLY, FINAL_DATASET_GEMINI_ONLY], FINAL_DATASET_COMBINED)
 
         print(f"\n✅ Pipeline finished!")
-        print(f"📊 Claude dataset: {len(claude_dataset)} entries -> {FINAL_DATASET_CLAUDE_ONLY}")
-        print(f"📊 Gemini dataset: {len(gemini_dataset)} entries -> {FINAL_DATASET_GEMINI_ONLY}")
-        print(f"📊 Combined dataset: {len(combined_dataset)} entries -> {FINAL_DATASET_COMBINED}")
+        print(f"📊 Claude dataset: {counts['claude']} entries -> {FINAL_DATASET_CLAUDE_ONLY}")
+        print(f"📊 Gemini dataset: {counts['gemini']} entries -> {FINAL_DATASET_GEMINI_ONLY}")
+        print(f"📊 Combined dataset: {combined_count} entries -> {FINAL_DATASET_COMBINED}")
+        cache_stats = ANALYZER.stats()
+        print(f"🗄️ Analyzer cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['evictions']} evictions (hit rate {cache_stats['hit_rate']:.1%})")
+        report_concurrency_stats()
+        report_llm_metrics()
 
     except Exception as e:
         print(f"❌ Failed to save final datasets: {e}")
 
+    report_trace()
+
+    # replay(오프라인) 모드에서는 캐시 미스가 하나라도 있으면 실패로 처리
+    if report_llm_cache_stats():
+        print("❌ Replay mode: some LLM requests were not found in the response cache.")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
-    main_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the Alpaca dataset")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit pending code/label prompts through the providers' batch APIs before assembling")
+    parser.add_argument("--trace", type=Path, metavar="PATH",
+                        help="Record per-stage spans and write them as a Chrome trace-event JSON file "
+                             "(same as setting TRACE_FILE)")
+    args = parser.parse_args()
+
+    if args.trace:
+        TRACER.enable(args.trace)
+    main_pipeline(batch_mode=args.batch)
\ No newline at end of file
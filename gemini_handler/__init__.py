@@ -1 +1,2 @@
-from .gemini_handler import GeminiHandler
\ No newline at end of file
+from .gemini_handler import GeminiHandler
+from .async_gemini_handler import AsyncGeminiHandler
@@ -0,0 +1,185 @@
+import os
+import time
+import asyncio
+import threading
+from google.api_core import exceptions
+
+from llm_cache import CacheMissError
+from retry_policy import RetryPolicy
+from tracing import span, traced
+from structured_log import get_logger
+from .gemini_handler import API_KEYS, GeminiHandler
+
+log = get_logger(__name__)
+
+
+class TokenBucket:
+    """capacity만큼 담기고 1분에 capacity만큼 다시 채워지는 토큰 버킷."""
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.refill_per_sec = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_sec)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount만큼 사용할 수 있을 때까지 남은 시간(초)을 반환합니다."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_sec
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+class KeyState:
+    """API 키 하나의 요청/토큰 버킷과 쿨다운 상태."""
+
+    def __init__(self, index: int, api_key: str, requests_per_minute: float, tokens_per_minute: float):
+        self.index = index
+        self.api_key = api_key
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.cooldown_until = 0.0
+        self.consecutive_throttles = 0
+
+    def wait_time(self, estimated_tokens: int, now: float) -> float:
+        return max(
+            self.cooldown_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(estimated_tokens, now)
+        )
+
+
+class AsyncGeminiHandler:
+    """설정된 모든 Gemini API 키에 요청을 분산하는 asyncio 기반 클라이언트.
+
+    키마다 분당 요청 수(RPM)/토큰 수(TPM) 버킷을 두고, ResourceExhausted가 발생한 키는
+    쿨다운 동안 제외한 채 다른 키로 즉시 재시도합니다. 이 키 전환은 retry_policy와 별개로 항상 이루어지며,
+    모든 키가 쿨다운 중일 때만 사용량 한도 오류가 retry_policy(또는 호출자)에게 전달됩니다.
+    """
+
+    def __init__(self, api_keys: list[str] = API_KEYS, requests_per_minute: float | None = None,
+                 tokens_per_minute: float | None = None, cooldown: float = 60.0, max_cooldown: float = 300.0,
+                 retry_policy: RetryPolicy | None = None):
+        # 키별 한도는 요금제에 따라 다르므로 환경 변수로 조정 가능 (기본값: gemini-2.5-pro 무료 등급)
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv("GEMINI_RPM_PER_KEY", 5))
+        if tokens_per_minute is None:
+            tokens_per_minute = float(os.getenv("GEMINI_TPM_PER_KEY", 250_000))
+        self.keys = [KeyState(i, key, requests_per_minute, tokens_per_minute) for i, key in enumerate(api_keys)]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        # 다른 키로 재시도하므로 사용량 한도 초과 시에도 짧게만 대기 (키별 쿨다운은 _acquire_key가 반영)
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=len(self.keys) + 2, base_delay=5.0, throttle_delay=1.0,
+            is_throttle=lambda e: isinstance(e, exceptions.TooManyRequests),
+            non_retryable=(CacheMissError,)
+        )
+        self._next_key = 0
+        self._key_lock = asyncio.Lock()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    @staticmethod
+    def _estimate_tokens(cache_prompt: str) -> int:
+        # 정확한 count_tokens 호출 대신 문자 수 기반으로 대략 추정 (영문 기준 약 4자 = 1토큰)
+        return len(cache_prompt) // 4 + 1
+
+    async def _acquire_key(self, estimated_tokens: int) -> KeyState:
+        while True:
+            async with self._key_lock:
+                now = time.monotonic()
+                # 마지막으로 사용한 다음 키부터 확인하여 요청을 고르게 분산
+                order = self.keys[self._next_key:] + self.keys[:self._next_key]
+                waits = [(key.wait_time(estimated_tokens, now), key) for key in order]
+                wait, key = min(waits, key=lambda item: item[0])
+                if wait <= 0:
+                    key.requests.consume(1, now)
+                    key.tokens.consume(estimated_tokens, now)
+                    self._next_key = (key.index + 1) % len(self.keys)
+                    return key
+            await asyncio.sleep(min(wait, 5.0))
+
+    def _has_available_key(self) -> bool:
+        """쿨다운 중이 아닌 키가 있는지 확인합니다."""
+        now = time.monotonic()
+        return any(key.cooldown_until <= now for key in self.keys)
+
+    def _throttle(self, key: KeyState):
+        key.consecutive_throttles += 1
+        cooldown = min(self.cooldown * (2 ** (key.consecutive_throttles - 1)), self.max_cooldown)
+        key.cooldown_until = time.monotonic() + cooldown
+        return cooldown
+
+    @traced("gemini.ask_async", "llm")
+    async def ask(self, prompt_config: dict, model_name: str, retry_policy: RetryPolicy | None = None) -> str:
+        """사용 가능한 키로 요청하여 응답 텍스트를 반환합니다. 재시도는 retry_policy(기본값: self.retry_policy)를 따릅니다.
+
+        ResourceExhausted가 발생한 키는 쿨다운 동안 제외되므로, 재시도는 다른 키로 이루어집니다.
+        """
+        system_prompt, user_messages = GeminiHandler._split_messages(prompt_config)
+
+        temperature = GeminiHandler.generation_config["temperature"]
+        cache_prompt = GeminiHandler._cache_prompt(system_prompt, user_messages)
+        cached = GeminiHandler.response_cache.get("gemini", model_name, temperature, cache_prompt)
+        if cached is not None:
+            GeminiHandler.metrics.record("gemini", model_name, 0.0, outcome="cached")
+            return cached
+
+        estimated_tokens = self._estimate_tokens(cache_prompt)
+
+        async def request_with_key() -> str:
+            # 키별 RPM/TPM 버킷이 빌 때까지 기다린 시간도 타임라인에 표시
+            with span("gemini.acquire_key", "llm"):
+                key = await self._acquire_key(estimated_tokens)
+            # 키를 기다린 시간은 제외하고 실제 API 호출 시간만 기록
+            started_at = time.monotonic()
+            resp = None
+            try:
+                model = GeminiHandler.model_registry.get(key.api_key, model_name, system_prompt, asynchronous=True)
+                resp = await model.generate_content_async(user_messages, request_options={"timeout": 300})
+                text = GeminiHandler._extract_text(resp)
+            except Exception as e:
+                GeminiHandler.record_call(model_name, started_at, key.index, resp, e)
+                # ResourceExhausted(gRPC)는 TooManyRequests(REST 429)의 하위 클래스
+                if isinstance(e, exceptions.TooManyRequests):
+                    cooldown = self._throttle(key)
+                    log.warning("⚠️ Gemini API 키 사용량 한도 도달, 쿨다운 동안 제외", key=key.index + 1, cooldown=round(cooldown))
+                raise
+            GeminiHandler.record_call(model_name, started_at, key.index, resp)
+            key.consecutive_throttles = 0
+            return text
+
+        async def attempt() -> str:
+            # 키 하나의 사용량 한도 초과는 재시도 정책에 넘기지 않고 대기 없이 다른 키로 다시 요청
+            # (바깥 정책의 백오프/재시도 예산/동시성 감소는 모든 키가 쿨다운 중일 때만 적용됨)
+            for failover in range(len(self.keys)):
+                try:
+                    return await request_with_key()
+                except exceptions.TooManyRequests:
+                    if failover == len(self.keys) - 1 or not self._has_available_key():
+                        raise
+
+        text = await (retry_policy or self.retry_policy).call_async(attempt, describe=f"Gemini async [{model_name}]")
+        GeminiHandler.response_cache.put("gemini", model_name, temperature, cache_prompt, text)
+        return text
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="gemini-async-loop", daemon=True).start()
+            return self._loop
+
+    def ask_blocking(self, prompt_config: dict, model_name: str, **kwargs) -> str:
+        """스레드 기반 호출자를 위한 동기 래퍼. 모든 요청은 하나의 백그라운드 이벤트 루프에서 실행됩니다."""
+        future = asyncio.run_coroutine_threadsafe(self.ask(prompt_config, model_name, **kwargs), self._ensure_loop())
+        return future.result()
@@ -1,11 +1,20 @@
 import os
 import sys
+import json
 import time
+import asyncio
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 from google.api_core import exceptions
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from llm_cache import LLMResponseCache, CacheMissError
+from llm_metrics import LLM_METRICS
+from retry_policy import RetryPolicy, current_attempt
+from tracing import traced
+from structured_log import get_logger
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -20,6 +29,7 @@ API_KEY_NAMES = [
 API_KEYS = [os.getenv(key_name) for key_name in API_KEY_NAMES if os.getenv(key_name)]
 if not API_KEYS:
     raise ValueError("하나 이상의 GEMINI_API_KEY가 .env 파일에 설정되어야 합니다.")
+log = get_logger(__name__)
 
 
 class GeminiResponseEmptyError(RuntimeError): pass
@@ -28,11 +38,101 @@ class GeminiResponseEmptyError(RuntimeError): pass
 class GeminiBlockedError(RuntimeError): pass
 
 
+class ThreadedAsyncClient:
+    """동기 GenerativeServiceClient를 GenerativeModel의 async 클라이언트 자리에 쓸 수 있도록 감쌉니다."""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def generate_content(self, request, **kwargs):
+        return await asyncio.to_thread(self._client.generate_content, request, **kwargs)
+
+
+# GeminiModelRegistry가 클라이언트를 연결하는 GenerativeModel의 비공개 속성 (requirements.txt에 고정한 버전에서 확인)
+GENAI_CHECKED_VERSION = "0.8.5"
+MODEL_CLIENT_ATTRIBUTES = ("_client", "_async_client")
+
+
+class GeminiModelRegistry:
+    """(API 키, 모델, 시스템 프롬프트)별 GenerativeModel을 한 번만 생성하여 재사용합니다.
+
+    전역 genai.configure 대신 키마다 전용 클라이언트를 모델의 비공개 속성(_client/_async_client)에 연결하므로,
+    여러 워커가 전역 상태를 바꾸지 않고 서로 다른 키를 동시에 사용할 수 있습니다.
+    SDK가 바뀌어 이 속성이 없어지면 조용히 기본 클라이언트로 요청하지 않도록 생성 시점에 실패합니다.
+    """
+
+    def __init__(self, safety_settings: dict, generation_config: dict, api_endpoint: str | None = None):
+        self._check_sdk()
+        self.safety_settings = safety_settings
+        self.generation_config = generation_config
+        self.api_endpoint = api_endpoint
+        self._models = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check_sdk():
+        # 요청을 보내지 않는 모델 생성만으로 속성 존재 여부를 확인
+        probe = genai.GenerativeModel(model_name="gemini-2.5-pro")
+        missing = [name for name in MODEL_CLIENT_ATTRIBUTES if not hasattr(probe, name)]
+        if missing:
+            raise RuntimeError(
+                f"google-generativeai {genai.__version__}의 GenerativeModel에 {missing} 속성이 없습니다. "
+                f"requirements.txt의 google-generativeai=={GENAI_CHECKED_VERSION}를 설치하세요."
+            )
+        if genai.__version__ != GENAI_CHECKED_VERSION:
+            log.warning("⚠️ 확인되지 않은 google-generativeai 버전", version=genai.__version__,
+                        checked_version=GENAI_CHECKED_VERSION)
+
+    def _get_client(self, api_key: str, asynchronous: bool):
+        client_key = (api_key, asynchronous)
+        client = self._clients.get(client_key)
+        if client is None:
+            if self.api_endpoint:
+                # 로컬 목(mock) 서버 등 다른 주소로 보낼 때는 HTTP(REST) 전송을 사용
+                # async REST 전송은 없으므로 비동기 모델도 동기 클라이언트를 스레드에서 실행
+                client = glm.GenerativeServiceClient(
+                    transport="rest", client_options={"api_key": api_key, "api_endpoint": self.api_endpoint}
+                )
+                if asynchronous:
+                    client = ThreadedAsyncClient(client)
+            else:
+                client_class = glm.GenerativeServiceAsyncClient if asynchronous else glm.GenerativeServiceClient
+                client = client_class(client_options={"api_key": api_key})
+            self._clients[client_key] = client
+        return client
+
+    def get(self, api_key: str, model_name: str, system_instruction: str | None = None, asynchronous: bool = False):
+        model_key = (api_key, model_name, system_instruction, asynchronous)
+        model = self._models.get(model_key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(model_key)
+            if model is None:
+                model = genai.GenerativeModel(
+                    model_name=model_name,
+                    safety_settings=self.safety_settings,
+                    generation_config=self.generation_config,
+                    system_instruction=system_instruction
+                )
+                # 비동기 모델은 이벤트 루프 안에서 처음 요청될 때 생성되므로 async 클라이언트도 그 루프에 묶임
+                if asynchronous:
+                    model._async_client = self._get_client(api_key, asynchronous=True)
+                else:
+                    model._client = self._get_client(api_key, asynchronous=False)
+                self._models[model_key] = model
+        return model
+
+
 # ---
 
 class GeminiHandler:
     api_keys = API_KEYS
     current_key_index = 0
+    response_cache = LLMResponseCache.from_env()
+    metrics = LLM_METRICS
 
     safety_settings = {
         HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
@@ -46,6 +146,16 @@ class GeminiHandler:
         "max_output_tokens": 65536,
     }
 
+    # GEMINI_API_ENDPOINT가 있으면 해당 주소(예: 벤치마크용 목 서버)로 요청
+    model_registry = GeminiModelRegistry(safety_settings, generation_config, os.getenv("GEMINI_API_ENDPOINT"))
+
+    # 사용량 한도 초과(gRPC ResourceExhausted / REST 429 TooManyRequests)와 시간 초과는 더 길게 대기한 뒤 재시도
+    retry_policy = RetryPolicy(
+        base_delay=5.0, max_delay=300.0, throttle_delay=60.0,
+        is_throttle=lambda e: isinstance(e, (exceptions.TooManyRequests, exceptions.DeadlineExceeded)),
+        non_retryable=(CacheMissError,)
+    )
+
     # /// 모델 이름을 파라미터로 받아 유연성을 높임
     @classmethod
     def _get_configured_model(cls, model_name: str, system_instruction: str | None = None):
@@ -53,17 +163,10 @@ class GeminiHandler:
             raise RuntimeError("사용 가능한 모든 Gemini API 키가 소진되었습니다.")
 
         current_key = cls.api_keys[cls.current_key_index]
-        genai.configure(api_key=current_key)
+        return cls.model_registry.get(current_key, model_name, system_instruction)
 
-        return genai.GenerativeModel(
-            model_name=model_name,
-            safety_settings=cls.safety_settings,
-            generation_config=cls.generation_config,
-            system_instruction=system_instruction
-        )
-
-    @classmethod
-    def ask(cls, prompt_config: dict, model_name: str, retries: int = 3, base_wait: int = 5) -> str:
+    @staticmethod
+    def _split_messages(prompt_config: dict) -> tuple[str | None, list[dict]]:
         messages = prompt_config.get("messages")
         if not messages:
             raise ValueError("프롬프트 설정에 'messages' 키가 없거나 비어있습니다.")
@@ -78,11 +181,69 @@ class GeminiHandler:
                 user_messages.append(msg)
 
         system_prompt = "\n".join(system_prompt_parts) if system_prompt_parts else None
+        return system_prompt, user_messages
+
+    @staticmethod
+    def _cache_prompt(system_prompt: str | None, user_messages: list[dict]) -> str:
+        return json.dumps({"system": system_prompt, "messages": user_messages}, ensure_ascii=False, sort_keys=True)
+
+    @staticmethod
+    def _extract_text(resp) -> str:
+        """generate_content 응답에서 텍스트를 꺼내고, 차단되었거나 비어 있으면 예외를 발생시킵니다."""
+        if not resp.candidates:
+            block_reason = "Unknown"
+            if hasattr(resp, 'prompt_feedback') and resp.prompt_feedback.block_reason:
+                block_reason = resp.prompt_feedback.block_reason.name
+            raise GeminiBlockedError(f"응답이 차단됨 (No candidates returned). Block Reason: {block_reason}")
+
+        candidate = resp.candidates[0]
+        if not candidate.content or not candidate.content.parts:
+            raise GeminiBlockedError(f"콘텐츠가 없음 (finish_reason={candidate.finish_reason.name})")
+
+        text = candidate.content.parts[0].text
+        if not text or not text.strip():
+            raise GeminiResponseEmptyError(f"빈 텍스트 응답 (finish_reason={candidate.finish_reason.name})")
+
+        return text.strip()
 
-        last_err = None
-        for attempt in range(1, retries + 1):
+    @staticmethod
+    def _usage(resp) -> tuple[int, int, str | None]:
+        """응답의 (입력 토큰 수, 출력 토큰 수, 종료 사유)를 반환합니다."""
+        usage = getattr(resp, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        finish_reason = resp.candidates[0].finish_reason.name if getattr(resp, "candidates", None) else None
+        return input_tokens, output_tokens, finish_reason
+
+    @classmethod
+    def record_call(cls, model_name: str, started_at: float, key_index: int, resp=None, error: Exception | None = None):
+        """API 호출 한 번의 지연 시간/토큰 수/종료 사유/키 번호/시도 번호를 지표로 기록합니다."""
+        input_tokens, output_tokens, finish_reason = cls._usage(resp) if resp is not None else (0, 0, None)
+        cls.metrics.record(
+            "gemini", model_name, time.monotonic() - started_at, input_tokens, output_tokens, finish_reason,
+            key_index, current_attempt(), "ok" if error is None else type(error).__name__
+        )
+
+    @classmethod
+    @traced("gemini.ask", "llm")
+    def ask(cls, prompt_config: dict, model_name: str, retry_policy: RetryPolicy | None = None) -> str:
+        """Gemini에 요청하여 응답 텍스트를 반환합니다. 재시도는 retry_policy(기본값: cls.retry_policy)를 따릅니다."""
+        system_prompt, user_messages = cls._split_messages(prompt_config)
+
+        # 동일한 (프롬프트, 모델, temperature) 요청은 캐시된 응답을 재사용
+        temperature = cls.generation_config["temperature"]
+        cache_prompt = cls._cache_prompt(system_prompt, user_messages)
+        cached = cls.response_cache.get("gemini", model_name, temperature, cache_prompt)
+        if cached is not None:
+            cls.metrics.record("gemini", model_name, 0.0, outcome="cached")
+            return cached
+
+        def attempt() -> str:
+            log.debug("🔑 Gemini API 요청 시도", key=cls.current_key_index + 1, model=model_name)
+            key_index = cls.current_key_index
+            started_at = time.monotonic()
+            resp = None
             try:
-                print(f"🔑 Gemini API 키 #{cls.current_key_index + 1}로 [{model_name}] 모델에 요청 시도...")
                 # model_name과 분리된 system_prompt를 전달.
                 model = cls._get_configured_model(model_name=model_name, system_instruction=system_prompt)
 
@@ -91,54 +252,16 @@ class GeminiHandler:
                     user_messages,
                     request_options={"timeout": 300}
                 )
-
-                if not resp.candidates:
-                    block_reason = "Unknown"
-                    if hasattr(resp, 'prompt_feedback') and resp.prompt_feedback.block_reason:
-                        block_reason = resp.prompt_feedback.block_reason.name
-                    raise GeminiBlockedError(f"응답이 차단됨 (No candidates returned). Block Reason: {block_reason}")
-
-                candidate = resp.candidates[0]
-                if not candidate.content or not candidate.content.parts:
-                    raise GeminiBlockedError(f"콘텐츠가 없음 (finish_reason={candidate.finish_reason.name})")
-
-                text = candidate.content.parts[0].text
-                if not text or not text.strip():
-                    raise GeminiResponseEmptyError(f"빈 텍스트 응답 (finish_reason={candidate.finish_reason.name})")
-
-                return text.strip()
-
-            except exceptions.ResourceExhausted as e:
-                # === MODIFIED SECTION START ===
-                # 사용량 한도 초과 시, 키를 바꾸는 대신 61초간 대기하여 한도가 초기화되기를 기다립니다.
-                wait_time = 300
-                print(f"  ⚠️ Gemini API 키 #{cls.current_key_index + 1}의 사용량 한도 도달. {wait_time}초 후 같은 키로 재시도합니다... ({attempt}/{retries})")
-                time.sleep(wait_time)
-                last_err = e
-                # 다음 재시도를 위해 루프의 다음 단계로 넘어갑니다.
-                continue
-                # === MODIFIED SECTION END ===
-
-            except (GeminiResponseEmptyError, GeminiBlockedError) as e:
-                wait = base_wait * (2 ** (attempt - 1))
-                print(f"  ⚠️ 비어 있거나 차단된 응답. {wait}초 후 재시도... ({attempt}/{retries}) :: {e}")
-                time.sleep(wait)
-                last_err = e
-
-            except exceptions.DeadlineExceeded as e:
-                wait = base_wait * (2 ** (attempt - 1))
-                print(f"  ⚠️ API 요청 시간 초과. {wait}초 후 재시도... ({attempt}/{retries})")
-                time.sleep(wait)
-                last_err = e
-
+                text = cls._extract_text(resp)
             except Exception as e:
-                wait = base_wait * (2 ** (attempt - 1))
-                error_summary = str(e).split('\n')[0]
-                print(f"  ⚠️ 예상치 못한 오류. {wait}초 후 재시도... ({attempt}/{retries}) :: {error_summary}")
-                time.sleep(wait)
-                last_err = e
+                cls.record_call(model_name, started_at, key_index, resp, e)
+                raise
+            cls.record_call(model_name, started_at, key_index, resp)
+            return text
 
-        raise RuntimeError(f"Gemini가 {retries}번의 재시도 후 실패했습니다: {last_err}")
+        text = (retry_policy or cls.retry_policy).call(attempt, describe=f"Gemini [{model_name}]")
+        cls.response_cache.put("gemini", model_name, temperature, cache_prompt, text)
+        return text
 
     @staticmethod
     def save_content(content: str, output_path: str):
@@ -0,0 +1 @@
+from .llm_cache import LLMResponseCache, CacheMissError
@@ -0,0 +1,93 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "output" / "cache" / "llm"
+
+
+class CacheMissError(RuntimeError): pass
+
+
+class LLMResponseCache:
+    """(프롬프트, 모델, temperature) 기준으로 LLM 응답을 디스크에 저장하는 캐시.
+
+    mode:
+      - "off": 캐시를 사용하지 않음
+      - "readwrite": 캐시에 있으면 재사용하고, 없으면 API 호출 후 저장 (기본값)
+      - "replay": 캐시만 사용하는 오프라인 모드. 캐시에 없으면 CacheMissError 발생
+    """
+
+    MODES = ("off", "readwrite", "replay")
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, mode: str = "readwrite"):
+        if mode not in self.MODES:
+            raise ValueError(f"알 수 없는 LLM 캐시 모드: {mode} (가능한 값: {', '.join(self.MODES)})")
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        """LLM_CACHE_MODE / LLM_CACHE_DIR 환경 변수로 캐시를 설정합니다."""
+        return cls(
+            cache_dir=Path(os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR)),
+            mode=os.getenv("LLM_CACHE_MODE", "readwrite").strip().lower()
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def _entry_path(self, provider: str, model: str, temperature: float, prompt: str) -> Path:
+        key_material = json.dumps([model, temperature, prompt], ensure_ascii=False)
+        key = hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+        return self.cache_dir / provider / key[:2] / f"{key}.json"
+
+    def get(self, provider: str, model: str, temperature: float, prompt: str) -> str | None:
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(provider, model, temperature, prompt)
+        try:
+            response = json.loads(path.read_text(encoding='utf-8'))["response"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            with self._lock:
+                self.misses += 1
+            if self.replay:
+                raise CacheMissError(f"replay 모드에서 캐시에 없는 {provider} 요청입니다 (model={model}, temperature={temperature})")
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return response
+
+    def put(self, provider: str, model: str, temperature: float, prompt: str, response: str):
+        if not self.enabled or self.replay:
+            return
+
+        path = self._entry_path(provider, model, temperature, prompt)
+        entry = {"model": model, "temperature": temperature, "response": response}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("⚠️ LLM 응답 캐시 저장 실패", provider=provider, error=repr(e))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "hits": self.hits, "misses": self.misses}
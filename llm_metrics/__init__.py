@@ -0,0 +1 @@
+from .llm_metrics import LLMMetrics, LLM_METRICS, metric_labels, estimate_cost
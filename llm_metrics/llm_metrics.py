@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력). 요금제가 바뀌면 여기만 수정
+MODEL_PRICES = {
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+# 호출 시점의 집계 레이블 (스테이지/생성기/태스크 유형). 스레드와 asyncio 태스크별로 따로 유지됨
+_labels: ContextVar[dict] = ContextVar("llm_metric_labels", default={})
+
+LABEL_KEYS = ("stage", "generator", "task_type")
+
+
+@contextmanager
+def metric_labels(**labels):
+    """with 블록 안에서 이루어지는 LLM 호출에 집계 레이블(stage, generator, task_type)을 붙입니다."""
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _format_value(value) -> str:
+    """Prometheus 샘플 값. 정수 카운터는 그대로, 실수는 반올림 없이 전체 정밀도로 씁니다."""
+    return str(int(value)) if isinstance(value, int) else repr(float(value))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class LLMMetrics:
+    """LLM API 호출(시도) 단위로 지연 시간, 토큰 수, 종료 사유, API 키 번호, 재시도 번호를 기록합니다.
+
+    - path를 지정하면 호출마다 JSONL 한 줄을 바로 기록 (메모리에 쌓지 않음)
+    - 메모리에는 (provider, model, stage, generator, task_type, outcome)별 합계만 유지
+    - summary()로 원하는 레이블별 합계를, write_prometheus()로 Prometheus 텍스트 형식 파일을 만듦
+    - register_gauges()로 등록한 현재 값(예: 동시성 한도)도 게이지로 함께 내보내며,
+      start_export()를 호출하면 실행 중에도 주기적으로 파일을 갱신함
+    """
+
+    def __init__(self, path: Path | None = None):
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._gauges = []
+        self._file = None
+        self._export_stop = None
+        self._export_thread = None
+        if path is not None:
+            self.open(path)
+
+    @classmethod
+    def from_env(cls) -> "LLMMetrics":
+        """LLM_METRICS_FILE 환경 변수가 있으면 해당 경로에 호출별 JSONL을 기록합니다."""
+        path = os.getenv("LLM_METRICS_FILE")
+        return cls(Path(path) if path else None)
+
+    def open(self, path: Path):
+        """호출별 JSONL 기록 파일을 (추가 모드로) 엽니다."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, provider: str, model: str, latency: float, input_tokens: int = 0, output_tokens: int = 0,
+               finish_reason: str | None = None, key_index: int | None = None, attempt: int = 1,
+               outcome: str = "ok"):
+        """호출 하나를 기록합니다. outcome은 "ok", "cached" 또는 실패한 경우 예외 클래스 이름입니다."""
+        labels = _labels.get()
+        cost = estimate_cost(model, input_tokens, output_tokens)
+        event = {
+            "ts": round(time.time(), 3),
+            "provider": provider,
+            "model": model,
+            **{key: labels.get(key, "") for key in LABEL_KEYS},
+            "outcome": outcome,
+            "latency": round(latency, 3),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": round(cost, 6),
+            "finish_reason": finish_reason,
+            "key_index": key_index,
+            "attempt": attempt,
+        }
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+
+        group = (provider, model, *(event[key] for key in LABEL_KEYS), outcome)
+        with self._lock:
+            totals = self._totals.get(group)
+            if totals is None:
+                totals = self._totals[group] = {
+                    "calls": 0, "retries": 0, "latency_sum": 0.0, "latency_max": 0.0,
+                    "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0
+                }
+            totals["calls"] += 1
+            totals["retries"] += attempt > 1
+            totals["latency_sum"] += latency
+            totals["latency_max"] = max(totals["latency_max"], latency)
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+            totals["cost_usd"] += cost
+            if self._file is not None:
+                self._file.write(line)
+
+    def register_gauges(self, prefix: str, labels: dict, read: Callable[[], dict[str, float]]):
+        """write_prometheus 때마다 read()를 호출하여 {이름: 값}을 f"{prefix}_{이름}" 게이지로 내보냅니다."""
+        with self._lock:
+            self._gauges.append((prefix, labels, read))
+
+    def start_export(self, path: Path, interval: float = 15.0):
+        """interval초마다 write_prometheus(path)를 호출하는 백그라운드 스레드를 시작합니다 (close()에서 중지)."""
+        self.stop_export()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.write_prometheus(path)
+                except OSError:
+                    pass  # 다음 주기에 다시 시도
+
+        self._export_stop = stop
+        self._export_thread = threading.Thread(target=run, name="llm-metrics-export", daemon=True)
+        self._export_thread.start()
+
+    def stop_export(self):
+        if self._export_thread is not None:
+            self._export_stop.set()
+            self._export_thread.join()
+            self._export_thread = self._export_stop = None
+
+    def summary(self, group_by: tuple[str, ...] = ("stage",)) -> dict[tuple, dict]:
+        """group_by 레이블(provider, model, stage, generator, task_type, outcome 중) 값별로 합계를 반환합니다."""
+        fields = ("provider", "model", *LABEL_KEYS, "outcome")
+        indexes = [fields.index(name) for name in group_by]
+        result = {}
+        with self._lock:
+            for group, totals in self._totals.items():
+                key = tuple(group[i] for i in indexes)
+                merged = result.setdefault(key, dict.fromkeys(totals, 0))
+                for name, value in totals.items():
+                    merged[name] = max(merged[name], value) if name == "latency_max" else merged[name] + value
+        return result
+
+    def write_prometheus(self, path: Path):
+        """누적 합계를 Prometheus 텍스트 노출 형식(node_exporter textfile collector 등에서 사용)으로 저장합니다."""
+        metrics = {
+            "calls": ("llm_calls_total", "counter", "LLM API calls"),
+            "retries": ("llm_retries_total", "counter", "LLM API calls that were retries"),
+            "latency_sum": ("llm_latency_seconds_sum", "counter", "Total LLM call latency in seconds"),
+            "latency_max": ("llm_latency_seconds_max", "gauge", "Slowest LLM call in seconds"),
+            "input_tokens": ("llm_input_tokens_total", "counter", "Prompt tokens"),
+            "output_tokens": ("llm_output_tokens_total", "counter", "Completion tokens"),
+            "cost_usd": ("llm_cost_usd_total", "counter", "Estimated cost in USD"),
+        }
+        fields = ("provider", "model", *LABEL_KEYS, "outcome")
+        with self._lock:
+            totals = list(self._totals.items())
+            gauge_sources = list(self._gauges)
+
+        lines = []
+        for name, (metric, metric_type, help_text) in metrics.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for group, values in totals:
+                labels = ",".join(f'{field}="{_escape_label(value)}"' for field, value in zip(fields, group))
+                lines.append(f"{metric}{{{labels}}} {_format_value(values[name])}")
+
+        # 등록된 게이지는 지표 이름별로 모아 HELP/TYPE을 한 번만 씀
+        gauges = {}
+        for prefix, gauge_labels, read in gauge_sources:
+            labels = ",".join(f'{key}="{_escape_label(value)}"' for key, value in gauge_labels.items())
+            for name, value in read().items():
+                gauges.setdefault(f"{prefix}_{name}", []).append(f"{prefix}_{name}{{{labels}}} {_format_value(value)}")
+        for metric, samples in gauges.items():
+            lines.append(f"# HELP {metric} Current {metric.replace('_', ' ')}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(samples)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def close(self):
+        self.stop_export()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# 모든 핸들러가 공유하는 기본 기록기
+LLM_METRICS = LLMMetrics.from_env()
@@ -0,0 +1,11 @@
+from .analysis import SymbolAnalyzer
+from .assembly import INSTRUCTION, PairAssembler, create_alpaca_input, build_entry
+from .concurrency import AIMDController, is_throttle_error, is_retryable
+from .dataset_writer import JsonlDatasetWriter, merge_jsonl_files
+from .incremental_assembly import IncrementalAssembler
+from .json_extraction import extract_label_json, iter_balanced_spans, load_json_span, repair_json
+from .labeling import Labeler, build_label_prompt
+from .label_batching import get_label_batch_size, split_label_batches, build_batch_label_prompt, parse_batch_label_response
+from .llm import LLMRequester, claude_requester, gemini_requester, gemini_prompt_config
+from .manifest import PipelineManifest, content_hash
+from .staged import Stage, StagedPipeline
@@ -0,0 +1,104 @@
+"""
+Swift 코드 AST 분석 단계
+상주 분석기 프로세스 풀과 결과 캐시를 묶어, 한 번의 호출로 캐시 조회 -> 분석 -> 캐시 저장을 수행
+"""
+
+import json
+from pathlib import Path
+
+from tracing import span, traced
+from structured_log import get_logger
+from swift_analyzer_handler import SwiftAnalyzerPool, SwiftAnalyzerError, AnalyzerCache, AnalyzerResult, analyze_files
+
+log = get_logger(__name__)
+
+
+class SymbolAnalyzer:
+    """Swift 소스의 심볼 정보를 반환하는 분석기 클라이언트.
+
+    pool과 cache를 주입받으므로, 테스트/벤치마크에서는 다른 실행 파일이나 캐시 디렉토리를 사용할 수 있습니다.
+    """
+
+    def __init__(self, pool: SwiftAnalyzerPool, cache: AnalyzerCache | None = None):
+        self.pool = pool
+        self.cache = cache
+
+    @property
+    def size(self) -> int:
+        """동시에 분석할 수 있는 요청 수 (분석기 프로세스 수)."""
+        return self.pool.size
+
+    def cached(self, swift_code: str) -> AnalyzerResult | None:
+        """캐시에 저장된 결과만 조회합니다 (분석기를 실행하지 않음)."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(swift_code)
+        if cached is None:
+            return None
+        try:
+            return AnalyzerResult.from_json(cached)
+        except ValueError:
+            return None  # 손상된 캐시 항목은 다시 분석
+
+    @traced("analyzer.analyze", "analyzer")
+    def analyze(self, swift_code: str) -> AnalyzerResult | None:
+        """Swift 코드를 분석하여 심볼 정보를 반환합니다 (결과는 캐시됨). 실패하면 None."""
+        if not swift_code or not swift_code.strip():
+            return None
+
+        result = self.cached(swift_code)
+        if result is not None:
+            return result
+
+        try:
+            # 캐시 조회와 구분하기 위해 분석기 실행만 별도 구간으로 기록
+            with span("analyzer.run", "analyzer", chars=len(swift_code)):
+                result = AnalyzerResult.from_json(self.pool.analyze(swift_code))
+        except (SwiftAnalyzerError, Exception) as e:
+            log.warning("⚠️ Swift analyzer failed", error=repr(e))
+            return None
+
+        if self.cache is not None:
+            self.cache.put(swift_code, result.compact)
+        return result
+
+    @traced("analyzer.analyze_files", "analyzer")
+    def analyze_files(self, swift_files: list[Path]) -> dict[str, AnalyzerResult]:
+        """분석기 배치 모드로 여러 파일을 한 프로세스에서 분석하여 {경로: 분석 결과}를 반환합니다.
+
+        캐시에 결과가 있는 파일은 바로 반환하고, 캐시에 없는 파일만 배치 모드로 분석합니다.
+        새로 분석한 결과는 캐시에도 저장되어 이후 analyze/cached 호출에서 재사용됩니다.
+        배치 분석이 실패하면 캐시에 있던 결과만 반환하며, 이 경우 호출자는 빠진 파일에 analyze를 사용합니다.
+        """
+        results = {}
+        sources = {}
+        for swift_file in swift_files:
+            try:
+                swift_code = Path(swift_file).read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue  # 읽을 수 없는 파일은 배치 분석기에서도 실패하므로 제외
+            cached = self.cached(swift_code)
+            if cached is not None:
+                results[str(swift_file)] = cached
+            else:
+                sources[str(swift_file)] = swift_code
+        if not sources:
+            return results
+
+        try:
+            analyzed = analyze_files(self.pool.executable, list(sources))
+        except (SwiftAnalyzerError, json.JSONDecodeError) as e:
+            log.warning("⚠️ Swift analyzer batch mode failed, falling back to per-file analysis", error=repr(e))
+            return results
+
+        if self.cache is not None:
+            for path, result in analyzed.items():
+                if path in sources:
+                    self.cache.put(sources[path], result.compact)
+        results.update(analyzed)
+        return results
+
+    def stats(self) -> dict:
+        if self.cache is None:
+            return {"hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0}
+        return self.cache.stats()
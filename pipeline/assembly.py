@@ -0,0 +1,81 @@
+"""
+Alpaca 엔트리 조립 단계
+심볼 정보의 들여쓰기 포맷은 AnalyzerResult가 한 번만 만들고, 여기서는 그대로 끼워 넣기만 함
+"""
+
+import threading
+
+from swift_analyzer_handler import AnalyzerResult
+
+INSTRUCTION = "In the following Swift code, find all identifiers related to sensitive logic. Provide the names and reasoning as a JSON object."
+
+
+def create_alpaca_input(swift_code: str, symbol_info: AnalyzerResult) -> str:
+    """모델이 학습할 Input 필드를 형식에 맞게 생성합니다."""
+    return f"""**Swift Source Code:**
+```swift
+{swift_code}
+```
+
+**AST Symbol Information (JSON):**
+```
+{symbol_info.pretty}
+```"""
+
+
+def build_entry(swift_code: str, symbol_info: AnalyzerResult, label_json: str) -> dict:
+    """코드, 심볼 정보, 레이블 JSON으로 Alpaca 포맷 엔트리를 만듭니다."""
+    return {
+        "instruction": INSTRUCTION,
+        "input": create_alpaca_input(swift_code, symbol_info),
+        "output": label_json
+    }
+
+
+class PairAssembler:
+    """Positive/Negative처럼 함께 기록되어야 하는 항목(샘플/엔트리) 묶음을 모읍니다.
+
+    묶음의 모든 부분이 도착하면 parts 순서대로 항목들을 반환하고, 한 부분이라도 실패(discard)하면
+    먼저 도착한 부분과 나중에 도착할 부분을 모두 버립니다. 여러 워커 스레드에서 호출할 수 있습니다.
+    """
+
+    def __init__(self, parts: tuple[str, ...] = ("positive", "negative")):
+        self.parts = parts
+        self._pending = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def add(self, pair_key: str, part: str, item: dict) -> list[dict] | None:
+        """항목 하나를 추가합니다. 묶음이 완성되면 parts 순서로 정렬된 항목 리스트를, 아니면 None을 반환합니다."""
+        with self._lock:
+            if pair_key in self._failed:
+                self._resolve_failed(pair_key)
+                return None
+            items = self._pending.setdefault(pair_key, {})
+            items[part] = item
+            if len(items) < len(self.parts):
+                return None
+            del self._pending[pair_key]
+        return [items[p] for p in self.parts]
+
+    def discard(self, pair_key: str):
+        """묶음의 한 부분이 실패했음을 알립니다. 이미 도착한 부분은 버려지고, 남은 부분도 도착하는 즉시 버려집니다."""
+        with self._lock:
+            if pair_key in self._failed:
+                self._resolve_failed(pair_key)
+                return
+            # 실패한 부분과 이미 도착한 부분을 제외하고, 앞으로 도착(또는 실패)할 부분 수를 기억
+            remaining = len(self.parts) - len(self._pending.pop(pair_key, {})) - 1
+            if remaining > 0:
+                self._failed[pair_key] = remaining
+
+    def _resolve_failed(self, pair_key: str):
+        self._failed[pair_key] -= 1
+        if self._failed[pair_key] <= 0:
+            del self._failed[pair_key]
+
+    @property
+    def pending(self) -> int:
+        """아직 짝이 도착하지 않은 묶음 수."""
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,177 @@
+"""
+제공자별 동시 요청 수를 조절하는 AIMD(additive-increase, multiplicative-decrease) 컨트롤러
+응답 지연과 사용량 한도 오류가 안정적이면 동시 요청 수를 1씩 늘리고, ResourceExhausted(429)나
+DeadlineExceeded가 발생하면 절반으로 줄임. 고정된 워커 수 대신 제공자 상태에 맞춰 처리량을 찾아감
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# 사용량 한도/과부하로 간주하는 예외 이름 (google.api_core, anthropic 등 제공자 라이브러리를 직접 import하지 않기 위함)
+THROTTLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "DeadlineExceeded",  # Gemini (google.api_core.exceptions)
+    "RateLimitError", "APITimeoutError", "OverloadedError",  # Claude (anthropic)
+}
+THROTTLE_STATUS_CODES = {429, 529}
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """제공자가 요청을 줄이라는 신호(사용량 한도 초과, 과부하, 시간 초과)인지 판별합니다."""
+    if type(error).__name__ in THROTTLE_ERROR_NAMES:
+        return True
+    return getattr(error, "status_code", None) in THROTTLE_STATUS_CODES or getattr(error, "code", None) in THROTTLE_STATUS_CODES
+
+
+# 다시 보내도 같은 결과가 나오는 요청 오류 (잘못된 요청, 인증/권한, 없는 모델)
+NON_RETRYABLE_ERROR_NAMES = {
+    "InvalidArgument", "BadRequest", "Unauthenticated", "Unauthorized", "PermissionDenied", "Forbidden",
+    "NotFound",  # Gemini (google.api_core.exceptions)
+    "BadRequestError", "AuthenticationError", "PermissionDeniedError", "NotFoundError",
+    "UnprocessableEntityError",  # Claude (anthropic)
+}
+NON_RETRYABLE_STATUS_CODES = {400, 401, 403, 404, 422}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """재시도하면 성공할 수 있는 오류인지 판별합니다 (요청 자체가 잘못된 오류는 False)."""
+    if type(error).__name__ in NON_RETRYABLE_ERROR_NAMES:
+        return False
+    return (getattr(error, "status_code", None) not in NON_RETRYABLE_STATUS_CODES
+            and getattr(error, "code", None) not in NON_RETRYABLE_STATUS_CODES)
+
+
+class AIMDController:
+    """동시 요청 수 한도(limit)를 AIMD 방식으로 조절하는 세마포어.
+
+    - 성공: 한도를 모두 쓰는 상태에서 현재 한도만큼 연속으로 성공하고, 최근 지연 시간이 장기 평균의
+      latency_tolerance배 이하이면 한도 +increase
+    - 사용량 한도/시간 초과: 한도 × decrease (같은 순간에 몰린 오류로 여러 번 줄이지 않도록 decrease_interval초 간격 유지)
+    - 그 외 오류: 한도를 바꾸지 않음 (프롬프트/응답 문제는 동시성과 무관)
+
+    여러 스레드에서 slot()으로 감싸 호출하며, 현재 한도와 통계는 stats()로 확인합니다.
+    """
+
+    def __init__(self, name: str, initial: int = 4, min_limit: int = 1, max_limit: int = 16,
+                 increase: float = 1.0, decrease: float = 0.5, latency_tolerance: float = 2.0,
+                 decrease_interval: float = 5.0):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.decrease_interval = decrease_interval
+
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._successes_since_change = 0
+        self._last_decrease = float("-inf")
+        # 최근 지연(빠르게 반영)과 장기 지연(천천히 반영)의 지수 이동 평균
+        self._recent_latency = None
+        self._baseline_latency = None
+
+        self.successes = 0
+        self.throttles = 0
+        self.errors = 0
+        self.increases = 0
+        self.decreases = 0
+        self.peak_limit = int(self._limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """한도 안에서 요청 하나를 실행합니다. 정상 종료 시 지연 시간을, 예외 발생 시 오류 종류를 기록합니다."""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_throttle_error(e):
+                self.record_throttle()
+            else:
+                self.record_error()
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+        finally:
+            self.release()
+
+    def record_success(self, latency: float):
+        with self._cond:
+            self.successes += 1
+            self._successes_since_change += 1
+            if self._recent_latency is None:
+                self._recent_latency = self._baseline_latency = latency
+            else:
+                self._recent_latency += 0.3 * (latency - self._recent_latency)
+                self._baseline_latency += 0.02 * (latency - self._baseline_latency)
+
+            healthy = self._recent_latency <= self._baseline_latency * self.latency_tolerance
+            # 한도가 실제로 다 쓰이고 있을 때만 늘림 (요청이 적어 한도에 못 미치면 늘려도 검증되지 않음)
+            saturated = self._in_flight >= int(self._limit)
+            if (healthy and saturated and self._successes_since_change >= int(self._limit)
+                    and self._limit < self.max_limit):
+                self._limit = min(self.max_limit, self._limit + self.increase)
+                self._successes_since_change = 0
+                self.increases += 1
+                self.peak_limit = max(self.peak_limit, int(self._limit))
+                self._cond.notify_all()
+
+    def record_throttle(self, error: BaseException | None = None):
+        """사용량 한도/시간 초과를 기록하고 한도를 줄입니다. 핸들러 내부에서 재시도하는 오류도 이 함수로 알립니다."""
+        with self._cond:
+            self.throttles += 1
+            self._successes_since_change = 0
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            new_limit = max(self.min_limit, self._limit * self.decrease)
+            if new_limit < self._limit:
+                self._limit = new_limit
+                self.decreases += 1
+                log.warning("🐢 Throttled, lowering concurrency", provider=self.name, limit=self.limit)
+            self._last_decrease = now
+
+    def record_error(self):
+        with self._cond:
+            self.errors += 1
+
+    def gauge_values(self) -> dict:
+        """지표로 내보낼 현재 한도, 진행 중인 요청 수, 누적 한도 초과 횟수."""
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self._in_flight, "throttles": self.throttles}
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "peak_limit": self.peak_limit,
+                "in_flight": self._in_flight,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "errors": self.errors,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "latency": round(self._recent_latency or 0.0, 3),
+            }
@@ -0,0 +1,78 @@
+"""
+Alpaca 데이터셋 엔트리를 JSONL 파일로 스트리밍 저장하는 writer
+엔트리를 메모리에 모아두지 않고 생성되는 즉시 파일에 추가하여, 중단되더라도 이미 조립된 엔트리는 남도록 함
+"""
+
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+
+
+class JsonlDatasetWriter:
+    """엔트리를 하나씩 JSONL 파일에 추가(append)하는 스레드 안전 writer.
+
+    매 엔트리마다 flush하여 OS 버퍼로 넘기고, checkpoint_every개마다 fsync하여 디스크에 확정합니다.
+    """
+
+    def __init__(self, path: Path, checkpoint_every: int = 50, append: bool = False):
+        self.path = Path(path)
+        self.checkpoint_every = checkpoint_every
+        self.count = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+            if self.count % self.checkpoint_every == 0:
+                os.fsync(self._file.fileno())
+
+    def write_many(self, entries: list[dict]):
+        for entry in entries:
+            self.write(entry)
+
+    def checkpoint(self):
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def merge_jsonl_files(sources: list[Path], destination: Path) -> int:
+    """여러 JSONL 파일을 순서대로 이어 붙여 destination에 저장하고, 전체 줄 수를 반환합니다."""
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_suffix(destination.suffix + ".tmp")
+
+    with open(tmp_path, "wb") as out:
+        for source in sources:
+            with open(source, "rb") as f:
+                shutil.copyfileobj(f, out, length=1024 * 1024)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, destination)
+
+    line_count = 0
+    with open(destination, "rb") as f:
+        for _ in f:
+            line_count += 1
+    return line_count
@@ -0,0 +1,269 @@
+"""
+기존 테스트 파일 데이터셋의 증분 조립
+지난 조립 이후 라벨/코드 파일의 (mtime, 크기)가 바뀌지 않았으면 기존 데이터셋의 줄을 그대로 재사용하고,
+바뀐 파일만 프로세스 풀에서 다시 조립하여 프로젝트 데이터셋 파일에 합침
+"""
+
+import os
+import json
+import concurrent.futures
+from pathlib import Path
+
+from tracing import span
+from structured_log import get_logger
+from swift_analyzer_handler import AnalyzerCache, AnalyzerResult
+from .analysis import SymbolAnalyzer
+from .assembly import build_entry
+from .manifest import content_hash
+
+log = get_logger(__name__)
+
+INDEX_VERSION = 1
+# 라벨 파일이 이 크기 이하이면 유효한 레이블로 보지 않음 (빈 객체/배열 등)
+MIN_LABEL_BYTES = 10
+
+# 워커 프로세스마다 한 번 만드는 분석기 캐시 (_init_worker에서 설정)
+_worker_cache = None
+
+
+def file_signature(*paths: Path) -> list[int] | None:
+    """파일들의 (mtime_ns, 크기)를 이어 붙인 값. 하나라도 없으면 None."""
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        signature += [stat.st_mtime_ns, stat.st_size]
+    return signature
+
+
+def _init_worker(cache_dir: str | None, executable: str | None):
+    global _worker_cache
+    _worker_cache = AnalyzerCache(Path(cache_dir), executable) if cache_dir else None
+
+
+def _assemble_file(task: dict, cache: AnalyzerCache | None) -> dict:
+    """파일 하나를 읽고 검증하여 데이터셋 줄을 만듭니다.
+
+    status는 ok(조립됨), unchanged(내용이 지난 조립과 같음), invalid(조립할 수 없음),
+    needs_analysis(분석기 캐시에 심볼 정보가 없어 호출자가 분석해야 함) 중 하나입니다.
+    """
+    result = {"stem": task["stem"], "status": "invalid", "hash": None, "line": None, "error": None}
+    try:
+        label = Path(task["label_path"]).read_text(encoding='utf-8')
+        if len(label.strip()) <= MIN_LABEL_BYTES:
+            result["error"] = "empty label"
+            return result
+        json.loads(label)  # JSON 유효성 검사 (한 번만)
+
+        swift_code = Path(task["code_path"]).read_text(encoding='utf-8')
+        if not swift_code.strip():
+            result["error"] = "empty code"
+            return result
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+        result["error"] = repr(e)
+        return result
+
+    # mtime만 바뀌고 내용은 같으면 기존 줄을 재사용
+    result["hash"] = content_hash(swift_code + "\0" + label)
+    if result["hash"] == task["known_hash"]:
+        result["status"] = "unchanged"
+        return result
+
+    symbols = None
+    if cache is not None:
+        cached = cache.get(swift_code)
+        if cached is not None:
+            try:
+                symbols = AnalyzerResult.from_json(cached)
+            except ValueError:
+                pass
+    if symbols is None:
+        result["status"] = "needs_analysis"
+        return result
+
+    result["status"] = "ok"
+    result["line"] = json.dumps(build_entry(swift_code, symbols, label), ensure_ascii=False) + "\n"
+    return result
+
+
+def _assemble_file_in_worker(task: dict) -> dict:
+    return _assemble_file(task, _worker_cache)
+
+
+class IncrementalAssembler:
+    """프로젝트별 테스트 데이터셋을 증분으로 조립합니다.
+
+    데이터셋 파일 옆에 파일별 (mtime, 크기) 서명, 내용 해시, 데이터셋 줄 번호를 담은 인덱스를 저장합니다.
+    인덱스가 없거나, 데이터셋 파일이 인덱스 저장 후 바뀌었거나, 분석기 바이너리가 바뀌면 전체를 다시 조립합니다.
+    바뀐 파일이 min_parallel개 이상이면 프로세스 풀(max_workers개)에서 조립하고, 그보다 적으면 현재 프로세스에서 조립합니다.
+    분석기 캐시에 없는 파일은 현재 프로세스에서 분석기 배치 모드로 한 번에 분석합니다.
+    """
+
+    def __init__(self, analyzer: SymbolAnalyzer, max_workers: int | None = None, min_parallel: int = 32):
+        self.analyzer = analyzer
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.min_parallel = min_parallel
+        self._executor = None
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        # 바뀐 파일이 많을 때만 처음 한 번 시작하고, 이후 프로젝트들에서 재사용
+        if self._executor is None:
+            cache = self.analyzer.cache
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(str(cache.cache_dir), cache.executable) if cache is not None else (None, None)
+            )
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def index_path(dataset_path: Path) -> Path:
+        return dataset_path.with_name(dataset_path.stem + ".index.json")
+
+    def _analyzer_signature(self) -> list[int] | None:
+        executable = self.analyzer.pool.executable
+        return file_signature(Path(executable)) if executable else None
+
+    def _load_previous(self, dataset_path: Path) -> tuple[dict, list[str]]:
+        """재사용할 수 있는 이전 인덱스의 파일 항목과 데이터셋 줄. 재사용할 수 없으면 빈 값."""
+        try:
+            index = json.loads(self.index_path(dataset_path).read_text(encoding='utf-8'))
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+            return {}, []
+        if (index.get("version") != INDEX_VERSION
+                or index.get("dataset") != file_signature(dataset_path)
+                or index.get("analyzer") != self._analyzer_signature()):
+            log.info("🔁 데이터셋 또는 분석기가 바뀌어 전체를 다시 조립", dataset=str(dataset_path))
+            return {}, []
+
+        with open(dataset_path, encoding='utf-8') as f:
+            lines = f.readlines()
+        # 줄이 있는 항목(조립에 성공한 파일)만 재사용 대상
+        files = {stem: entry for stem, entry in index.get("files", {}).items()
+                 if entry["signature"] is not None and entry["line"] is not None}
+        if any(entry["line"] >= len(lines) for entry in files.values()):
+            return {}, []
+        return files, lines
+
+    def assemble(self, code_dir: Path, inputs_dir: Path, labels_dir: Path, dataset_path: Path) -> dict:
+        """labels_dir의 라벨 파일마다 엔트리를 조립해 dataset_path에 저장하고 {entries, rebuilt, reused, errors}를 반환합니다.
+
+        엔트리 순서는 라벨 파일 이름순이며, 라벨 파일이 삭제된 엔트리는 데이터셋에서 빠집니다.
+        """
+        dataset_path = Path(dataset_path)
+        with span("assemble_project", "assembly", dataset=dataset_path.name):
+            previous, previous_lines = self._load_previous(dataset_path)
+
+            files = {}
+            lines = {}
+            changed = []
+            stats = {"entries": 0, "rebuilt": 0, "reused": 0, "errors": 0}
+
+            for label_path in sorted(Path(labels_dir).glob("*.json")):
+                stem = label_path.stem
+                code_path = Path(code_dir) / f"{stem}.swift"
+                signature = file_signature(label_path, code_path)
+                # 입력 프롬프트 파일이 없으면 라벨링이 끝나지 않은 샘플로 봄
+                if signature is None or not (Path(inputs_dir) / f"{stem}.txt").exists():
+                    files[stem] = {"signature": None, "hash": None, "line": None}
+                    stats["errors"] += 1
+                    continue
+
+                entry = previous.get(stem)
+                if entry and entry["signature"] == signature:
+                    files[stem] = entry
+                    lines[stem] = previous_lines[entry["line"]]
+                    stats["reused"] += 1
+                    continue
+
+                files[stem] = {"signature": signature, "hash": None, "line": None}
+                changed.append({"stem": stem, "label_path": str(label_path), "code_path": str(code_path),
+                                "known_hash": entry["hash"] if entry else None})
+
+            for result in self._assemble_changed(changed):
+                stem = result["stem"]
+                files[stem]["hash"] = result["hash"]
+                if result["status"] == "unchanged":
+                    lines[stem] = previous_lines[previous[stem]["line"]]
+                    stats["reused"] += 1
+                elif result["status"] == "ok":
+                    lines[stem] = result["line"]
+                    stats["rebuilt"] += 1
+                else:
+                    # 서명을 남기지 않아 다음 조립 때 다시 시도
+                    files[stem]["signature"] = None
+                    stats["errors"] += 1
+                    log.warning("⚠️ 파일 조립 실패", sample=stem, error=result["error"])
+
+            self._write(dataset_path, files, lines)
+            stats["entries"] = len(lines)
+        return stats
+
+    def _assemble_changed(self, changed: list[dict]) -> list[dict]:
+        """바뀐 파일들을 조립합니다. 분석기 캐시에 없던 파일은 배치 분석 후 현재 프로세스에서 조립합니다."""
+        if not changed:
+            return []
+        if len(changed) >= self.min_parallel and self.max_workers > 1:
+            chunksize = max(1, len(changed) // (self.max_workers * 4))
+            results = list(self._get_executor().map(_assemble_file_in_worker, changed, chunksize=chunksize))
+        else:
+            results = [_assemble_file(task, self.analyzer.cache) for task in changed]
+
+        pending = {result["stem"]: result for result in results if result["status"] == "needs_analysis"}
+        if pending:
+            tasks = {task["stem"]: task for task in changed if task["stem"] in pending}
+            analyzed = self.analyzer.analyze_files([Path(tasks[stem]["code_path"]) for stem in pending])
+            for stem, result in pending.items():
+                task = tasks[stem]
+                try:
+                    swift_code = Path(task["code_path"]).read_text(encoding='utf-8')
+                    label = Path(task["label_path"]).read_text(encoding='utf-8')
+                except (OSError, UnicodeDecodeError) as e:
+                    result.update(status="invalid", error=repr(e))
+                    continue
+                # 배치 분석도 실패하면 파일별로 다시 분석
+                symbols = analyzed.get(task["code_path"]) or self.analyzer.analyze(swift_code)
+                if not symbols:
+                    result.update(status="invalid", error="analyzer failed")
+                    continue
+                result.update(status="ok",
+                              line=json.dumps(build_entry(swift_code, symbols, label), ensure_ascii=False) + "\n")
+        return results
+
+    def _write(self, dataset_path: Path, files: dict, lines: dict[str, str]):
+        """데이터셋과 인덱스를 임시 파일에 쓴 뒤 교체합니다 (데이터셋 먼저, 인덱스 나중)."""
+        dataset_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dataset_path.with_suffix(dataset_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # 라벨 파일 이름순으로 기록 (files의 순서)
+            number = 0
+            for stem, entry in files.items():
+                if stem in lines:
+                    f.write(lines[stem])
+                    entry["line"] = number
+                    number += 1
+                else:
+                    entry["line"] = None
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, dataset_path)
+
+        index = {"version": INDEX_VERSION, "dataset": file_signature(dataset_path),
+                 "analyzer": self._analyzer_signature(), "files": files}
+        index_path = self.index_path(dataset_path)
+        tmp_index = index_path.with_suffix(index_path.suffix + ".tmp")
+        tmp_index.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_index, index_path)
@@ -0,0 +1,263 @@
+"""
+LLM 응답에서 레이블 JSON을 찾아내는 선형 시간 스캐너
+흔한 경우(```json 코드 펜스)는 펜스 본문만 파싱하고, 아니면 레이블 키 주변의 여는 괄호에서만 괄호 구간을 찾아 파싱함
+"""
+
+import re
+import json
+
+LABEL_KEYS = ("reasoning", "identifiers")
+
+_OPENERS = {'{': '}', '[': ']'}
+_CLOSERS = {'}': '{', ']': '['}
+# 구간 밖에서는 여는 괄호만, 구간 안에서는 문자열 리터럴(통째로)과 괄호를 토큰으로 봄
+_OPEN_RE = re.compile(r'[{\[]')
+_JSON_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*("|\Z)|[{}\[\]]', re.DOTALL)
+# 레이블 키 뒤가 이 패턴이면 객체 키로 쓰인 것 (따옴표 없는 키 포함)
+_KEY_SUFFIX_RE = re.compile(r'"?\s*:')
+# 닫히지 않은 문자열 때문에 다시 스캔하는 횟수 상한 (서술 속 따옴표가 많아도 선형 시간 유지)
+_MAX_RESTARTS = 16
+# 레이블 키 하나당 시도하는 여는 괄호 수 (가까운 것부터, 중첩 객체 뒤의 키도 바깥 객체까지 찾도록)
+_MAX_OPENERS_PER_KEY = 4
+
+
+def _scan(text: str, pos: int, spans: list) -> tuple[list, bool]:
+    """pos부터 스캔해 완성된 구간을 spans에 추가하고 (닫히지 않은 여는 괄호 스택, 닫히지 않은 문자열로 끝났는지)를 반환합니다."""
+    stack = []
+    while True:
+        match = (_JSON_TOKEN_RE if stack else _OPEN_RE).search(text, pos)
+        if not match:
+            return stack, False
+        pos = match.end()
+        char = text[match.start()]
+
+        if char == '"':
+            if not match.group(1):
+                return stack, True  # 닫히지 않은 문자열이 끝까지 이어짐
+            continue  # 문자열 리터럴 (안의 괄호/이스케이프 포함)은 통째로 건너뜀
+        if char in _OPENERS:
+            stack.append((char, match.start()))
+            continue
+
+        opener = _CLOSERS[char]
+        while stack and stack[-1][0] != opener:
+            stack.pop()
+        if not stack:
+            continue
+        _, start = stack.pop()
+        # 방금 닫힌 구간 안에 포함된 (먼저 완성된) 구간은 버림
+        while spans and spans[-1][0] > start:
+            spans.pop()
+        spans.append((start, pos))
+
+
+def iter_balanced_spans(text: str) -> list[tuple[int, int]]:
+    """텍스트를 훑어 괄호 균형이 맞는 최대 구간들의 (시작, 끝+1) 위치를 순서대로 반환합니다.
+
+    - 문자열 리터럴 안의 괄호와 이스케이프된 따옴표는 무시합니다 (JSON 구간 안에서만 따옴표를 추적).
+    - 다른 구간에 포함되지 않는 구간만 반환하므로, 닫히지 않은 '{'가 앞에 있어도
+      그 뒤에 완성된 객체들은 각각 반환됩니다 (잘린 배치 응답 복구에 사용).
+    - 서술 속 '{' 뒤의 짝 없는 따옴표 때문에 나머지 전체가 문자열로 읽히면,
+      그 '{' 다음 여는 괄호부터 다시 스캔합니다 (최대 _MAX_RESTARTS번).
+    - 짝이 맞지 않는 닫는 괄호는 그 사이의 여는 괄호들을 버리고 계속 진행합니다.
+    """
+    spans = []
+    pos = 0
+    for _ in range(_MAX_RESTARTS + 1):
+        stack, unterminated = _scan(text, pos, spans)
+        if not unterminated:
+            break
+        # 가장 바깥의 닫히지 않은 여는 괄호를 JSON이 아닌 것으로 보고 그 뒤부터 다시 스캔
+        first = stack[0][1]
+        while spans and spans[-1][0] > first:
+            spans.pop()
+        pos = first + 1
+    return spans
+
+
+def _span_end(text: str, start: int) -> int | None:
+    """start의 여는 괄호와 짝이 맞는 닫는 괄호 다음 위치. 닫히지 않으면 None."""
+    depth = 0
+    for match in _JSON_TOKEN_RE.finditer(text, start):
+        token = match.group()
+        if token[0] == '"':
+            if not match.group(1):
+                return None
+            continue
+        if token in _OPENERS:
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+    return None
+
+
+def repair_json(span: str) -> str:
+    """흔한 LLM JSON 실수(후행 쉼표, 따옴표 없는 키)를 문자열 리터럴을 건드리지 않고 한 번에 고칩니다."""
+    out = []
+    pending_comma = False
+    pending_space = []
+    in_string = False
+    escaped = False
+    last_significant = ''
+    i = 0
+    length = len(span)
+
+    while i < length:
+        char = span[i]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+
+        if char.isspace():
+            (pending_space if pending_comma else out).append(char)
+            i += 1
+            continue
+
+        # 쉼표는 다음 의미 있는 문자를 보고 후행 쉼표인지 판단할 때까지 보류
+        if pending_comma:
+            if char not in '}]':
+                out.append(',')
+            out.extend(pending_space)
+            pending_space.clear()
+            pending_comma = False
+
+        if char == ',':
+            pending_comma = True
+            last_significant = ','
+            i += 1
+            continue
+
+        if (char.isalpha() or char == '_') and last_significant in ('{', ','):
+            end = i
+            while end < length and (span[end].isalnum() or span[end] == '_'):
+                end += 1
+            rest = end
+            while rest < length and span[rest].isspace():
+                rest += 1
+            if rest < length and span[rest] == ':':
+                out.append(f'"{span[i:end]}"')
+            else:
+                out.append(span[i:end])
+            last_significant = 'a'
+            i = end
+            continue
+
+        if char == '"':
+            in_string = True
+        out.append(char)
+        last_significant = char
+        i += 1
+
+    return ''.join(out)
+
+
+def _find_label_object(value):
+    """파싱된 값에서 reasoning/identifiers 키를 가진 첫 번째 객체를 찾습니다 (바깥 래퍼 객체/배열 허용)."""
+    if isinstance(value, dict):
+        if all(key in value for key in LABEL_KEYS):
+            return value
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+
+    for child in children:
+        found = _find_label_object(child)
+        if found is not None:
+            return found
+    return None
+
+
+def load_json_span(span: str):
+    """구간을 JSON으로 파싱하고, 실패하면 repair_json으로 한 번 고쳐서 다시 시도합니다. 둘 다 실패하면 None."""
+    try:
+        return json.loads(span)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(span))
+    except json.JSONDecodeError:
+        return None
+
+
+def _label_key_positions(text: str) -> list[int]:
+    """레이블 키가 객체 키로 쓰인 위치들 (정규식 대신 str.find로 찾아 긴 서술도 빠르게 건너뜀)."""
+    positions = []
+    for key in LABEL_KEYS:
+        pos = text.find(key)
+        while pos != -1:
+            if _KEY_SUFFIX_RE.match(text, pos + len(key)):
+                positions.append(pos)
+            pos = text.find(key, pos + len(key))
+    return sorted(positions)
+
+
+def _iter_fence_bodies(text: str):
+    """``` 코드 펜스 본문들을 순서대로 반환합니다 (닫는 펜스가 없으면 끝까지)."""
+    pos = text.find("```")
+    while pos != -1:
+        body_start = text.find("\n", pos + 3)
+        if body_start == -1:
+            return
+        body_end = text.find("```", body_start)
+        yield text[body_start:body_end if body_end != -1 else len(text)]
+        if body_end == -1:
+            return
+        pos = text.find("```", body_end + 3)
+
+
+def _format_label(label: dict) -> str:
+    return json.dumps(label, ensure_ascii=False, indent=2)
+
+
+def extract_label_json(text: str) -> str | None:
+    """LLM 응답에서 reasoning/identifiers를 가진 JSON 객체를 찾아 들여쓰기된 JSON 문자열로 반환합니다 (실패 시 None).
+
+    1. 코드 펜스 본문이 그대로 JSON이면 그것만 파싱합니다 (가장 흔한 경우, 앞의 긴 서술은 훑지 않음).
+    2. 아니면 레이블 키가 객체 키로 쓰인 위치마다 가까운 여는 괄호부터 짝이 맞는 구간을 찾아
+       파싱(필요하면 repair_json)해 봅니다. 서술 속의 닫히지 않은 괄호/따옴표는 레이블 구간에 영향을 주지 않습니다.
+    """
+    if not text or not isinstance(text, str):
+        return None
+
+    for body in _iter_fence_bodies(text):
+        body = body.strip()
+        if body[:1] not in _OPENERS:
+            continue
+        try:
+            label = _find_label_object(json.loads(body))
+        except json.JSONDecodeError:
+            continue
+        if label is not None:
+            return _format_label(label)
+
+    tried = set()
+    for key_pos in _label_key_positions(text):
+        opener = key_pos
+        for _ in range(_MAX_OPENERS_PER_KEY):
+            opener = text.rfind("{", 0, opener)
+            if opener == -1:
+                break
+            if opener in tried:
+                continue
+            tried.add(opener)
+            end = _span_end(text, opener)
+            # 키보다 앞에서 닫히는 구간은 키를 감싸지 않는 중첩 객체이므로 더 바깥 괄호를 시도
+            if end is None or end <= key_pos:
+                continue
+            if any(text.find(key, opener, end) == -1 for key in LABEL_KEYS):
+                continue
+            label = _find_label_object(load_json_span(text[opener:end]))
+            if label is not None:
+                return _format_label(label)
+    return None
@@ -0,0 +1,92 @@
+"""
+여러 개의 코드/AST 쌍을 한 번의 Gemini 요청으로 레이블링하기 위한 헬퍼
+pipeline.labeling.Labeler에서 사용
+"""
+
+import json
+from .json_extraction import iter_balanced_spans, load_json_span
+from prompts import GENERATE_BATCH_LABELS_PROMPT, BATCH_LABEL_SAMPLE_TEMPLATE
+
+# 배치 하나에 넣을 최대 샘플 수
+LABEL_BATCH_SIZE = 4
+# 샘플 하나의 레이블(사고 과정 토큰 포함)에 확보할 출력 토큰 수
+LABEL_OUTPUT_TOKENS_PER_SAMPLE = 8192
+
+
+def get_label_batch_size(generation_config: dict) -> int:
+    """max_output_tokens 안에 모든 샘플의 응답이 들어갈 수 있도록 배치 크기를 정합니다."""
+    max_output_tokens = generation_config.get("max_output_tokens", LABEL_OUTPUT_TOKENS_PER_SAMPLE)
+    return max(1, min(LABEL_BATCH_SIZE, max_output_tokens // LABEL_OUTPUT_TOKENS_PER_SAMPLE))
+
+
+def split_label_batches(samples: list[dict], batch_size: int) -> list[list[dict]]:
+    """샘플들을 batch_size개 이하의 배치로 나눕니다. 같은 pair(Positive/Negative 쌍)의 샘플은 서로 다른 배치에 넣습니다.
+
+    대조 쌍이 한 프롬프트에 나란히 있으면 모델이 둘을 비교하며 레이블링하므로 레이블이 치우칠 수 있음.
+    pair 키가 없는 샘플은 제약 없이 순서대로 채웁니다.
+    """
+    batches = []
+    for sample in samples:
+        pair_key = sample.get("pair")
+        for batch in batches:
+            if len(batch) < batch_size and (pair_key is None or all(other.get("pair") != pair_key for other in batch)):
+                batch.append(sample)
+                break
+        else:
+            batches.append([sample])
+    return batches
+
+
+def build_batch_label_prompt(samples: list[dict]) -> tuple[str, dict[str, str]]:
+    """샘플 목록으로 배치 레이블 프롬프트를 만들고, (프롬프트, 샘플 id -> 샘플 이름) 매핑을 반환합니다.
+
+    파일 이름에 positive/negative 같은 힌트가 있으므로 모델에는 중립적인 id(sample_1, ...)만 노출합니다.
+    """
+    id_to_name = {}
+    sample_blocks = []
+    for i, sample in enumerate(samples, 1):
+        sample_id = f"sample_{i}"
+        id_to_name[sample_id] = sample["name"]
+        sample_blocks.append(BATCH_LABEL_SAMPLE_TEMPLATE.format(
+            sample_id=sample_id,
+            swift_code=sample["code"],
+            symbol_info_json=sample["symbols"].pretty
+        ))
+
+    return GENERATE_BATCH_LABELS_PROMPT.format(samples="\n\n".join(sample_blocks)), id_to_name
+
+
+def _is_label_item(item) -> bool:
+    return (isinstance(item, dict) and isinstance(item.get("id"), str)
+            and "reasoning" in item and isinstance(item.get("identifiers"), list))
+
+
+def parse_batch_label_response(raw_response: str, id_to_name: dict[str, str]) -> dict[str, str]:
+    """배치 응답에서 샘플별 레이블을 꺼내 {샘플 이름: 레이블 JSON 문자열}로 반환합니다.
+
+    배열 전체를 파싱할 수 없으면(예: 응답이 잘린 경우) 객체 단위로 최대한 복구하고,
+    복구하지 못한 샘플은 결과에서 빠지므로 호출자가 단일 요청으로 다시 처리해야 합니다.
+    """
+    if not raw_response:
+        return {}
+
+    # 배열 전체가 완성되어 있으면 하나의 구간으로, 잘렸으면 완성된 객체들이 각각의 구간으로 잡힘
+    items = []
+    for start, end in iter_balanced_spans(raw_response):
+        parsed = load_json_span(raw_response[start:end])
+        if parsed is None and raw_response[start] == '[':
+            # 배열 안의 일부 객체만 깨진 경우: 배열 내부를 객체 단위로 다시 훑음
+            inner = raw_response[start + 1:end - 1]
+            parsed = [load_json_span(inner[s:e]) for s, e in iter_balanced_spans(inner)]
+        if isinstance(parsed, list):
+            items.extend(parsed)
+        elif _is_label_item(parsed):
+            items.append(parsed)
+
+    labels = {}
+    for item in items:
+        if not _is_label_item(item) or item["id"] not in id_to_name:
+            continue
+        label = {"reasoning": item["reasoning"], "identifiers": item["identifiers"]}
+        labels[id_to_name[item["id"]]] = json.dumps(label, ensure_ascii=False, indent=2)
+    return labels
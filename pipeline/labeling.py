@@ -0,0 +1,119 @@
+"""
+레이블 생성 단계
+레이블 프롬프트 생성, Gemini 요청(배치/단일), 응답에서 레이블 JSON 추출을 담당
+"""
+
+from structured_log import get_logger
+from swift_analyzer_handler import AnalyzerResult
+from .json_extraction import extract_label_json
+from .llm import LLMRequester
+from .label_batching import get_label_batch_size, split_label_batches, build_batch_label_prompt, parse_batch_label_response
+
+log = get_logger(__name__)
+
+
+def build_label_prompt(swift_code: str, symbol_info: AnalyzerResult) -> str:
+    """단일 샘플 레이블 생성용 프롬프트를 만듭니다 (배치 응답에서 빠진 샘플을 다시 요청할 때 사용)."""
+    return f"""You are an expert security code auditor.
+Your task is to identify all sensitive identifiers in the provided Swift code and explain your reasoning.
+Analyze both the source code and its corresponding AST symbol information.
+
+**Swift Source Code:**
+```swift
+{swift_code}
+```
+
+**AST Symbol Information (JSON):**
+```json
+{symbol_info.pretty}
+```
+
+Based on your analysis, provide your response as a JSON object with two keys: "reasoning" and "identifiers".
+
+"reasoning": A brief step-by-step explanation of why the identified identifiers are considered sensitive. For secure code, explain why it is safe.
+
+"identifiers": A JSON list of strings containing only the simple base name of each sensitive identifier. For secure code, this should be an empty list [].
+
+Example for vulnerable code:
+```json
+{{
+  "reasoning": "The `save` function is sensitive because it calls the `SecItemAdd` Keychain API. The `secretToken` variable holds the data being saved.",
+  "identifiers": ["save", "secretToken"]
+}}
+```
+
+Example for secure code:
+```json
+{{
+  "reasoning": "This code correctly uses the Keychain to store secrets, which is a security best practice. Therefore, no sensitive identifiers were found.",
+  "identifiers": []
+}}
+```
+
+Your response must be ONLY the JSON object, following these rules exactly."""
+
+
+class Labeler:
+    """샘플의 레이블(reasoning/identifiers JSON)을 생성합니다.
+
+    request는 pipeline.llm.LLMRequester(재시도 정책 포함)이며,
+    generation_config는 한 요청에 묶을 샘플 수를 출력 토큰 한도에 맞춰 정하는 데 사용됩니다.
+    """
+
+    def __init__(self, request: LLMRequester, generation_config: dict):
+        self.request = request
+        self.batch_size = get_label_batch_size(generation_config)
+
+    @staticmethod
+    def parse(raw_response: str, sample_name: str) -> str | None:
+        """레이블 응답에서 reasoning/identifiers JSON을 찾아 정규화된 JSON 문자열로 반환합니다 (실패 시 None)."""
+        json_output_str = extract_label_json(raw_response)
+        if json_output_str:
+            log.debug("✅ JSON successfully parsed", sample=sample_name)
+        return json_output_str
+
+    def generate(self, sample_name: str, label_prompt: str) -> str | None:
+        """단일 샘플의 레이블을 생성하여 JSON 문자열로 반환합니다 (실패 시 None).
+
+        빈 응답과 레이블 JSON을 찾지 못한 응답은 요청 함수의 재시도 정책에 따라 다시 요청됩니다.
+        """
+        json_output_str = self.request(label_prompt, parse=lambda raw: self.parse(raw, sample_name))
+        return json_output_str or None
+
+    def generate_batched(self, samples: list[dict], prompts: dict[str, str] | None = None) -> dict[str, str]:
+        """여러 샘플을 한 번의 요청으로 레이블링합니다.
+
+        samples의 각 항목은 name, code, symbols(AnalyzerResult), label_prompt 키와 선택적으로 pair 키를 가지며,
+        같은 pair의 샘플은 같은 요청에 묶이지 않습니다. 배치 응답에서 파싱하지 못한 샘플은 단일 요청으로 다시 레이블링합니다.
+        반환값은 {샘플 이름: 레이블 JSON 문자열}이며, 끝내 실패한 샘플은 포함되지 않습니다.
+        prompts를 주면 레이블을 얻은 샘플마다 실제로 보낸 프롬프트(배치 또는 단일)를 {샘플 이름: 프롬프트}로 채웁니다.
+        """
+        labels = {}
+        if prompts is None:
+            prompts = {}
+
+        for batch in split_label_batches(samples, self.batch_size):
+            if len(batch) < 2:
+                continue
+
+            batch_prompt, id_to_name = build_batch_label_prompt(batch)
+            try:
+                raw_response = self.request(batch_prompt)
+                batch_labels = parse_batch_label_response(raw_response, id_to_name)
+            except Exception as e:
+                log.warning("⚠️ Batch label request failed", samples=len(batch), error=repr(e))
+                batch_labels = {}
+
+            log.info("🏷️ Batch labeled in one request", labeled=len(batch_labels), samples=len(batch))
+            labels.update(batch_labels)
+            prompts.update((name, batch_prompt) for name in batch_labels)
+
+        # 배치에서 빠진 샘플은 단일 요청으로 처리
+        for sample in samples:
+            if sample["name"] not in labels:
+                label = self.generate(sample["name"], sample["label_prompt"])
+                if label:
+                    labels[sample["name"]] = label
+                    prompts[sample["name"]] = sample["label_prompt"]
+
+        return labels
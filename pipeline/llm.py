@@ -0,0 +1,100 @@
+"""
+LLM 요청 단계
+제공자 핸들러의 ask 함수를 감싸, 빈 응답/파싱 실패/일시적 오류를 하나의 재시도 정책으로 재시도하는 요청 함수를 만듦
+"""
+
+from contextlib import nullcontext
+from typing import Callable
+
+from llm_cache import CacheMissError
+from retry_policy import RetryPolicy
+from tracing import span
+from structured_log import get_logger
+from .concurrency import AIMDController
+
+log = get_logger(__name__)
+
+DEFAULT_GEMINI_MODEL = "gemini-2.5-pro"
+
+
+class EmptyResponseError(RuntimeError): pass
+
+
+class InvalidResponseError(RuntimeError): pass
+
+
+class LLMRequester:
+    """프롬프트 문자열을 받아 응답 텍스트를 반환하는 요청 함수. 끝내 실패하면 빈 문자열을 반환합니다.
+
+    재시도는 이 계층에서만 retry_policy(실행 전체에서 공유하는 예산/제한 시간 포함)에 따라 이루어지며,
+    ask는 재시도 없이 한 번만 요청하는 프롬프트 -> 응답 텍스트 함수여야 합니다 (목(mock) 함수도 주입 가능).
+    limiter를 주면 각 시도는 limiter가 허용하는 동시 요청 수 안에서 실행되고, 결과(지연/오류)가 limiter에 기록됩니다.
+    """
+
+    def __init__(self, name: str, ask: Callable[[str], str], retry_policy: RetryPolicy | None = None,
+                 limiter: AIMDController | None = None):
+        self.name = name
+        self.ask = ask
+        self.retry_policy = retry_policy or RetryPolicy(non_retryable=(CacheMissError,))
+        self.limiter = limiter
+
+    def __call__(self, prompt: str, parse: Callable[[str], str | None] | None = None) -> str:
+        """응답 텍스트를 반환합니다. parse를 주면 parse(응답)의 결과를 반환하며, None이면 같은 정책으로 다시 요청합니다."""
+        def attempt() -> str:
+            with self.limiter.slot() if self.limiter else nullcontext():
+                response = self.ask(prompt)
+            if not response or not response.strip():
+                raise EmptyResponseError("empty response")
+            response = response.strip()
+            if parse is None:
+                return response
+            parsed = parse(response)
+            if not parsed:
+                log.debug("🔍 Unparseable response", requester=self.name, preview=response[:200])
+                raise InvalidResponseError(f"could not parse response ({len(response)} chars)")
+            return parsed
+
+        try:
+            with span(self.name, "llm"):
+                return self.retry_policy.call(attempt, describe=self.name)
+        except CacheMissError:
+            # replay 모드의 캐시 미스는 재시도해도 해결되지 않으므로 즉시 전파
+            raise
+        except Exception as e:
+            log.error("❌ Request failed", requester=self.name, error=repr(e))
+            return ""
+
+
+def gemini_prompt_config(prompt: str) -> dict:
+    """단일 사용자 메시지로 된 Gemini prompt_config를 만듭니다."""
+    return {
+        "messages": [
+            {
+                "role": "user",
+                "parts": [prompt]
+            }
+        ]
+    }
+
+
+def claude_requester(handler, name: str = "Claude", retry_policy: RetryPolicy | None = None,
+                     limiter: AIMDController | None = None) -> LLMRequester:
+    """ClaudeHandler(또는 같은 ask(prompt, retry_policy) 인터페이스의 객체)로 요청 함수를 만듭니다."""
+    return LLMRequester(name, lambda prompt: handler.ask(prompt, retry_policy=RetryPolicy.single()),
+                        retry_policy=retry_policy, limiter=limiter)
+
+
+def gemini_requester(client, name: str = "Gemini", model_name: str = DEFAULT_GEMINI_MODEL,
+                     retry_policy: RetryPolicy | None = None, limiter: AIMDController | None = None) -> LLMRequester:
+    """AsyncGeminiHandler(또는 같은 ask_blocking 인터페이스의 객체)로 요청 함수를 만듭니다.
+
+    같은 클라이언트(API 키 묶음)를 쓰는 요청 함수들은 같은 limiter를 공유해야 사용량 한도를 함께 반영합니다.
+    키 하나의 사용량 한도 초과는 클라이언트가 다른 키로 바로 넘기므로, retry_policy와 limiter에는
+    모든 키가 쿨다운 중일 때의 사용량 한도 오류만 전달됩니다.
+    """
+    return LLMRequester(
+        name,
+        lambda prompt: client.ask_blocking(gemini_prompt_config(prompt), model_name=model_name,
+                                           retry_policy=RetryPolicy.single()),
+        retry_policy=retry_policy, limiter=limiter
+    )
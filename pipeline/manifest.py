@@ -0,0 +1,93 @@
+"""
+생성 파이프라인의 샘플별 진행 상태를 기록하는 SQLite 매니페스트
+이어하기 시 파일 시스템을 다시 스캔(exists/stat/json.loads)하지 않고 매니페스트만 조회하도록 함
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+# 샘플 처리 단계 (뒤로 갈수록 진행된 상태)
+STAGES = ("code_generated", "analyzed", "labeled", "assembled")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PipelineManifest:
+    """샘플 키(생성기/파일명)별로 처리 단계와 코드/심볼/레이블 해시를 저장합니다.
+
+    시작 시 전체 레코드를 한 번에 메모리로 읽어오고, 이후 조회는 메모리에서, 갱신은 메모리와 DB에 함께 반영합니다.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS samples (
+                sample_key TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                code_hash TEXT,
+                symbols_hash TEXT,
+                label_hash TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._records = {
+            row[0]: {"stage": row[1], "code_hash": row[2], "symbols_hash": row[3], "label_hash": row[4]}
+            for row in self._conn.execute("SELECT sample_key, stage, code_hash, symbols_hash, label_hash FROM samples")
+        }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, sample_key: str) -> dict | None:
+        record = self._records.get(sample_key)
+        return dict(record) if record else None
+
+    @staticmethod
+    def has_reached(record: dict | None, stage: str) -> bool:
+        return bool(record) and STAGES.index(record["stage"]) >= STAGES.index(stage)
+
+    def record(self, sample_key: str, stage: str, code_hash: str | None = None,
+               symbols_hash: str | None = None, label_hash: str | None = None):
+        """샘플의 단계를 기록합니다. 넘기지 않은 해시는 기존 값을 유지합니다."""
+        if stage not in STAGES:
+            raise ValueError(f"알 수 없는 단계: {stage}")
+
+        with self._lock:
+            record = dict(self._records.get(sample_key) or {})
+            record["stage"] = stage
+            for key, value in (("code_hash", code_hash), ("symbols_hash", symbols_hash), ("label_hash", label_hash)):
+                if value is not None:
+                    record[key] = value
+                else:
+                    record.setdefault(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO samples (sample_key, stage, code_hash, symbols_hash, label_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sample_key, stage, record["code_hash"], record["symbols_hash"], record["label_hash"], time.time())
+            )
+            self._records[sample_key] = record
+
+    def forget(self, sample_key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM samples WHERE sample_key = ?", (sample_key,))
+            self._records.pop(sample_key, None)
+
+    def stage_counts(self) -> dict[str, int]:
+        counts = {stage: 0 for stage in STAGES}
+        for record in self._records.values():
+            counts[record["stage"]] += 1
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
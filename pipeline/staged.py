@@ -0,0 +1,170 @@
+"""
+단계별 생산자/소비자 파이프라인
+단계마다 전용 워커 스레드와 크기 제한 큐를 두어, 코드 생성(네트워크) / AST 분석(CPU) / 레이블 생성(네트워크)이
+서로를 기다리지 않고 겹쳐서 실행되도록 함. 큐가 가득 차면 앞 단계가 대기하므로(backpressure) 메모리 사용량이 일정함
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable
+
+from tracing import span
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# 단계 종료 신호 (워커 수만큼 큐에 넣음)
+_STOP = object()
+
+
+class Stage:
+    """파이프라인의 한 단계.
+
+    func는 항목 하나를 받아 다음 단계로 넘길 항목을 반환하며, None을 반환하면 해당 항목은 버려집니다.
+    batch_size를 지정하면 func는 최대 batch_size개의 항목 리스트를 받아 다음 단계로 넘길 항목 리스트를 반환합니다
+    (큐에 이미 쌓인 항목만 모으며, batch_size가 찰 때까지 기다리지 않음).
+    downstream이 None이면 마지막 단계이며, func의 반환값은 버려집니다.
+    버려진 항목을 구분할 수 있도록 func는 새 객체가 아닌 받은 항목(필요하면 수정하여)을 그대로 반환해야 합니다.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, downstream: str | None = None,
+                 queue_size: int = 0, batch_size: int | None = None):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.downstream = downstream
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+
+
+class StagedPipeline:
+    """Stage 목록을 연결하여 실행합니다. 여러 단계가 같은 downstream을 가질 수 있습니다 (예: 생성기별 코드 생성 단계).
+
+    on_finish(item, completed)는 항목이 파이프라인을 빠져나갈 때마다 호출되며, completed는 마지막 단계까지 처리되었는지
+    (False면 중간 단계에서 버려짐) 여부입니다. 진행률 표시와 실패한 항목의 정리에 사용하며, 같은 항목이 두 번 보고되지 않습니다.
+    """
+
+    def __init__(self, stages: list[Stage], on_finish: Callable[[Any, bool], None] | None = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.on_finish = on_finish
+        # queue_size가 0이면 한 번에 처리할 수 있는 항목 수(워커 수 × batch_size)의 2배로 제한
+        self.queues = {
+            stage.name: queue.Queue(maxsize=stage.queue_size or stage.workers * (stage.batch_size or 1) * 2)
+            for stage in stages
+        }
+        self.dropped = {stage.name: 0 for stage in stages}
+        self.errors = {stage.name: 0 for stage in stages}
+
+        # 단계별 남은 상류(upstream) 수: 입력을 넣는 feeder 또는 앞 단계가 모두 끝나면 종료 신호를 보냄
+        self._producers = {stage.name: 0 for stage in stages}
+        for stage in stages:
+            if stage.downstream is not None:
+                if stage.downstream not in self.stages:
+                    raise ValueError(f"알 수 없는 downstream 단계: {stage.downstream}")
+                self._producers[stage.downstream] += 1
+        self._live_workers = {stage.name: stage.workers for stage in stages}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def run(self, sources: dict[str, Iterable]):
+        """sources({단계 이름: 입력 항목들})를 각 단계에 넣고, 모든 단계가 끝날 때까지 기다립니다."""
+        for name in sources:
+            self._producers[name] += 1
+        idle = [name for name, count in self._producers.items() if count == 0]
+        if idle:
+            raise ValueError(f"입력이 연결되지 않은 단계: {idle}")
+
+        for stage in self.stages.values():
+            for i in range(stage.workers):
+                self._start_thread(f"{stage.name}-{i}", self._work, stage)
+        for name, items in sources.items():
+            self._start_thread(f"{name}-feeder", self._feed, name, items)
+
+        # daemon 스레드이므로 Ctrl+C 시 join이 중단되고 프로세스가 바로 종료됨
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+
+    def _start_thread(self, name: str, target, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _feed(self, name: str, items: Iterable):
+        try:
+            for item in items:
+                self.queues[name].put(item)
+        finally:
+            self._producer_done(name)
+
+    def _producer_done(self, name: str):
+        with self._lock:
+            self._producers[name] -= 1
+            closing = self._producers[name] == 0
+        if closing:
+            for _ in range(self.stages[name].workers):
+                self.queues[name].put(_STOP)
+
+    def _finished(self, items: list, completed: bool):
+        if self.on_finish:
+            for item in items:
+                self.on_finish(item, completed)
+
+    def _take(self, stage: Stage) -> tuple[list, bool]:
+        """큐에서 항목을 최대 batch_size개 꺼내 (항목들, 종료 신호 수신 여부)를 반환합니다."""
+        item = self.queues[stage.name].get()
+        if item is _STOP:
+            return [], True
+        items = [item]
+        while len(items) < (stage.batch_size or 1):
+            try:
+                item = self.queues[stage.name].get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _work(self, stage: Stage):
+        stopping = False
+        try:
+            while not stopping:
+                items, stopping = self._take(stage)
+                if items:
+                    self._process(stage, items)
+        finally:
+            with self._lock:
+                self._live_workers[stage.name] -= 1
+                last_worker = self._live_workers[stage.name] == 0
+            if last_worker and stage.downstream is not None:
+                self._producer_done(stage.downstream)
+
+    def _process(self, stage: Stage, items: list):
+        try:
+            with span(f"stage:{stage.name}", "stage", items=len(items)):
+                if stage.batch_size is not None:
+                    results = [result for result in (stage.func(items) or []) if result is not None]
+                else:
+                    result = stage.func(items[0])
+                    results = [result] if result is not None else []
+        except Exception:
+            log.exception("❌ Stage error", stage=stage.name, items=len(items))
+            with self._lock:
+                self.errors[stage.name] += len(items)
+                self.dropped[stage.name] += len(items)
+            self._finished(items, completed=False)
+            return
+
+        if stage.downstream is None:
+            self._finished(items, completed=True)
+            return
+
+        # 반환되지 않은 항목은 버려진 것으로 보고
+        passed = {id(result) for result in results}
+        dropped = [item for item in items if id(item) not in passed]
+        with self._lock:
+            self.dropped[stage.name] += len(dropped)
+        self._finished(dropped, completed=False)
+        for result in results:
+            self.queues[stage.downstream].put(result)
@@ -118,6 +118,52 @@ Example for secure code:
 Your response must be ONLY the JSON object, following these rules exactly.
 """
 
+# [Batch] 여러 개의 코드/AST 쌍을 한 번의 요청으로 레이블링 (응답은 샘플 id별 JSON 배열)
+GENERATE_BATCH_LABELS_PROMPT = """You are an expert security code auditor.
+Your task is to identify all sensitive identifiers in EACH of the Swift code samples below and explain your reasoning.
+Every sample has an id, its Swift source code, and its corresponding AST symbol information. Analyze each sample independently of the others.
+
+{samples}
+
+Based on your analysis, provide your response as a JSON array containing exactly one object per sample. Each object has three keys: "id", "reasoning" and "identifiers".
+
+"id": The sample id exactly as given above.
+
+"reasoning": A brief step-by-step explanation of why the identified identifiers are considered sensitive. For secure code, explain why it is safe.
+
+"identifiers": A JSON list of strings containing only the simple base name of each sensitive identifier. For secure code, this should be an empty list [].
+
+Example for one vulnerable sample and one secure sample:
+```json
+[
+  {{
+    "id": "sample_1",
+    "reasoning": "The `save` function is sensitive because it calls the `SecItemAdd` Keychain API. The `secretToken` variable holds the data being saved.",
+    "identifiers": ["save", "secretToken"]
+  }},
+  {{
+    "id": "sample_2",
+    "reasoning": "This code correctly uses the Keychain to store secrets, which is a security best practice. Therefore, no sensitive identifiers were found.",
+    "identifiers": []
+  }}
+]
+```
+
+Your response must be ONLY the JSON array, following these rules exactly."""
+
+# [Batch] 배치 프롬프트에 들어가는 샘플 하나
+BATCH_LABEL_SAMPLE_TEMPLATE = """### Sample id: {sample_id}
+
+**Swift Source Code:**
+```swift
+{swift_code}
+```
+
+**AST Symbol Information (JSON):**
+```json
+{symbol_info_json}
+```"""
+
 # Negative 샘플의 reasoning을 위한 동적 템플릿
 REASONING_TEMPLATE_NEGATIVE = """
 This code correctly and securely implements the requested functionality related to '{pattern_text}'. It follows security best practices. Therefore, no sensitive identifiers were found.
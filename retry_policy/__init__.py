@@ -0,0 +1 @@
+from .retry_policy import RetryPolicy, RetryBudget, RetryBudgetExhausted, RetryDeadlineExceeded, current_attempt
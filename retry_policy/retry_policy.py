@@ -0,0 +1,148 @@
+import time
+import random
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# 현재 실행 중인 시도 번호 (가장 바깥 정책이 설정하며, 안쪽 single() 정책은 덮어쓰지 않음)
+_current_attempt: ContextVar[int | None] = ContextVar("retry_attempt", default=None)
+
+
+def current_attempt() -> int:
+    """지금 실행 중인 요청이 몇 번째 시도인지 반환합니다 (재시도 정책 밖에서는 1). 호출 지표 기록에 사용됩니다."""
+    return _current_attempt.get() or 1
+
+
+class RetryBudgetExhausted(RuntimeError): pass
+
+
+class RetryDeadlineExceeded(RuntimeError): pass
+
+
+class RetryBudget:
+    """실행 전체에서 공유하는 재시도 예산.
+
+    처음부터 reserve번의 재시도를 허용하고, 요청이 하나 들어올 때마다 ratio번씩 재시도 여유가 늘어납니다.
+    (예: ratio=0.2이면 요청 5개당 재시도 1번) 장애 상황에서 모든 요청이 최대 횟수까지 재시도하여
+    제공자에 부하를 몰아주는 것(retry storm)을 막습니다.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: int = 20):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def withdraw(self) -> bool:
+        """재시도 1회를 사용합니다. 예산이 남아 있지 않으면 False를 반환합니다."""
+        with self._lock:
+            if self.retries < self.reserve + self.ratio * self.requests:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "retries": self.retries, "denied": self.denied}
+
+
+class RetryPolicy:
+    """모든 LLM 핸들러와 요청 함수가 공유하는 단일 재시도/대기 정책.
+
+    - 최대 max_attempts번 시도하며, 대기 시간은 full jitter 지수 백오프 (0 ~ min(max_delay, base × 2^(n-1)) 사이 임의 값)
+    - is_throttle(error)가 참인 오류(사용량 한도 등)는 base_delay 대신 throttle_delay를 기준으로 대기
+    - 첫 시도부터 deadline초가 지나면 더 재시도하지 않음 (RetryDeadlineExceeded)
+    - budget이 있으면 재시도마다 예산을 사용하며, 바닥나면 재시도하지 않음 (RetryBudgetExhausted)
+    - non_retryable에 속하거나 is_retryable(error)가 거짓인 예외는 즉시 전파
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 2.0, max_delay: float = 60.0,
+                 throttle_delay: float = 15.0, deadline: float = 600.0, budget: RetryBudget | None = None,
+                 is_throttle: Callable[[Exception], bool] | None = None,
+                 non_retryable: tuple[type[BaseException], ...] = (),
+                 is_retryable: Callable[[Exception], bool] | None = None,
+                 sleep: Callable[[float], Any] = time.sleep):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttle_delay = throttle_delay
+        self.deadline = deadline
+        self.budget = budget
+        self.is_throttle = is_throttle
+        self.non_retryable = non_retryable
+        self.is_retryable = is_retryable
+        self.sleep = sleep
+
+    @classmethod
+    def single(cls) -> "RetryPolicy":
+        """재시도하지 않는 정책. 바깥 계층이 재시도를 맡을 때 핸들러에 넘깁니다."""
+        return cls(max_attempts=1)
+
+    def backoff(self, attempt: int, error: Exception) -> float:
+        base = self.throttle_delay if self.is_throttle and self.is_throttle(error) else self.base_delay
+        return random.uniform(0, min(self.max_delay, base * (2 ** (attempt - 1))))
+
+    def _next_delay(self, attempt: int, error: Exception, started_at: float, describe: str) -> float:
+        """재시도 전 대기 시간을 반환합니다. 재시도하지 않아야 하면 예외를 발생시킵니다."""
+        if (isinstance(error, self.non_retryable) or attempt >= self.max_attempts
+                or (self.is_retryable is not None and not self.is_retryable(error))):
+            raise error
+
+        delay = self.backoff(attempt, error)
+        elapsed = time.monotonic() - started_at
+        if elapsed + delay > self.deadline:
+            raise RetryDeadlineExceeded(f"{describe}: {self.deadline:.0f}초 제한 시간 초과 ({attempt}회 시도): {error}") from error
+        if self.budget is not None and not self.budget.withdraw():
+            raise RetryBudgetExhausted(f"{describe}: 재시도 예산 소진 ({attempt}회 시도): {error}") from error
+
+        log.warning("⚠️ Attempt failed, retrying", request=describe, attempt=attempt, max_attempts=self.max_attempts,
+                    delay=round(delay, 1), error=type(error).__name__, detail=str(error).split('\n')[0])
+        return delay
+
+    def call(self, func: Callable[[], Any], describe: str = "request") -> Any:
+        """func를 정책에 따라 재시도하며 실행하고 결과를 반환합니다. 끝내 실패하면 마지막 예외를 전파합니다."""
+        started_at = time.monotonic()
+        if self.budget is not None:
+            self.budget.record_request()
+        outermost = _current_attempt.get() is None
+        attempt = 0
+        while True:
+            attempt += 1
+            token = _current_attempt.set(attempt) if outermost else None
+            try:
+                return func()
+            except Exception as e:
+                self.sleep(self._next_delay(attempt, e, started_at, describe))
+            finally:
+                if token is not None:
+                    _current_attempt.reset(token)
+
+    async def call_async(self, func: Callable[[], Any], describe: str = "request") -> Any:
+        """call의 asyncio 버전. func는 코루틴을 반환하는 함수입니다."""
+        started_at = time.monotonic()
+        if self.budget is not None:
+            self.budget.record_request()
+        outermost = _current_attempt.get() is None
+        attempt = 0
+        while True:
+            attempt += 1
+            token = _current_attempt.set(attempt) if outermost else None
+            try:
+                return await func()
+            except Exception as e:
+                await asyncio.sleep(self._next_delay(attempt, e, started_at, describe))
+            finally:
+                if token is not None:
+                    _current_attempt.reset(token)
@@ -0,0 +1 @@
+from .structured_log import StructuredLogger, RepeatSampler, get_logger, configure_logging, shutdown_logging
@@ -0,0 +1,188 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import traceback
+from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
+
+# 구조화 필드를 담는 LogRecord 속성 이름
+_FIELDS_ATTR = "fields"
+
+_listener: QueueListener | None = None
+_sampler: "RepeatSampler | None" = None
+_configure_lock = threading.Lock()
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """메시지 템플릿과 키워드 필드를 나누어 기록하는 로거.
+
+        log.warning("⚠️ Label generation failed", sample=name, generator="gemini")
+
+    메시지는 고정된 문자열로 두고 값은 필드로 넘겨야 JSON 로그를 메시지별로 집계할 수 있고,
+    반복 경고 샘플링도 같은 메시지끼리 묶입니다.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        super().__init__(logger, {})
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs)
+                  if key not in ("exc_info", "stack_info", "stacklevel", "extra")}
+        kwargs["extra"] = {**kwargs.get("extra", {}), _FIELDS_ATTR: fields}
+        return msg, kwargs
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(logging.getLogger(name))
+
+
+class _LocalQueueHandler(QueueHandler):
+    """같은 프로세스 안의 큐에 기록을 그대로 넣습니다 (메시지/예외 포맷은 리스너 스레드에서 수행)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RepeatSampler(logging.Filter):
+    """같은 로거/메시지의 경고가 window초 안에 burst회를 넘으면 이후 기록은 버리고 개수만 셉니다.
+
+    window가 지나 다시 기록될 때 버려진 개수를 suppressed 필드로 붙입니다. min_level 미만의 기록은 샘플링하지 않습니다.
+    """
+
+    def __init__(self, burst: int = 5, window: float = 60.0, min_level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        # (로거 이름, 메시지) -> [window 시작 시각, window 안의 기록 수, 버려진 수]
+        self._counters = {}
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None or now - counter[0] >= self.window:
+                suppressed = counter[2] if counter else 0
+                self._counters[key] = [now, 1, 0]
+            elif counter[1] < self.burst:
+                counter[1] += 1
+                suppressed = 0
+            else:
+                counter[2] += 1
+                self.suppressed_total += 1
+                return False
+        if suppressed:
+            fields = getattr(record, _FIELDS_ATTR, None) or {}
+            setattr(record, _FIELDS_ATTR, {**fields, "suppressed": suppressed})
+        return True
+
+    def pending(self) -> dict[tuple[str, str], int]:
+        """아직 보고되지 않은 (로거, 메시지)별 버려진 기록 수."""
+        with self._lock:
+            return {key: counter[2] for key, counter in self._counters.items() if counter[2]}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """기록 하나를 JSON 한 줄로 만듭니다 (ts, level, logger, thread, msg, 필드, 예외)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in (getattr(record, _FIELDS_ATTR, None) or {}).items():
+            event.setdefault(key, value)
+        if record.exc_info:
+            event["exc"] = "".join(traceback.format_exception(*record.exc_info))
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """터미널용 한 줄 형식: "메시지 key=value ..." (WARNING 이상은 레벨을 앞에 표시)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, _FIELDS_ATTR, None) or {}
+        text = f"  {record.getMessage()}"
+        if record.levelno >= logging.WARNING:
+            text = f"  [{record.levelname}] {record.getMessage()}"
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            text += "\n" + "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return text
+
+
+def configure_logging(log_file: Path | None = None, level: str | None = None,
+                      file_level: str | None = None) -> None:
+    """루트 로거를 QueueHandler로 설정합니다. 실제 출력(터미널, JSON 로그 파일)은 백그라운드 스레드가 담당합니다.
+
+    - level: 터미널 출력 레벨 (기본값: LOG_LEVEL 환경 변수 또는 INFO)
+    - log_file: JSON lines 로그 파일 (기본값: LOG_FILE 환경 변수, 없으면 파일에 기록하지 않음)
+    - file_level: 로그 파일 레벨 (기본값: LOG_FILE_LEVEL 환경 변수 또는 DEBUG)
+
+    여러 번 호출해도 한 번만 설정되며, 종료 시 남은 기록을 모두 쓴 뒤 리스너를 멈춥니다.
+    """
+    global _listener, _sampler
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        console_level = logging.getLevelName((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+        console = logging.StreamHandler(sys.stderr)
+        console.setLevel(console_level)
+        console.setFormatter(ConsoleFormatter())
+        handlers = [console]
+
+        log_file = log_file or os.getenv("LOG_FILE")
+        root_level = console_level
+        if log_file:
+            log_file = Path(log_file)
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            json_handler = logging.FileHandler(log_file, encoding="utf-8")
+            json_handler.setLevel(logging.getLevelName((file_level or os.getenv("LOG_FILE_LEVEL", "DEBUG")).upper()))
+            json_handler.setFormatter(JsonLineFormatter())
+            handlers.append(json_handler)
+            root_level = min(root_level, json_handler.level)
+
+        # 호출 스레드는 큐에 넣기만 하므로 여러 워커가 stdout/파일 잠금을 두고 경쟁하지 않음
+        _sampler = RepeatSampler()
+        queue_handler = _LocalQueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(_sampler)
+
+        root = logging.getLogger()
+        root.handlers = [queue_handler]
+        root.setLevel(root_level)
+        # 제공자 라이브러리의 HTTP 요청 로그는 경고 이상만
+        for noisy in ("httpx", "httpcore", "urllib3", "google", "anthropic"):
+            logging.getLogger(noisy).setLevel(logging.WARNING)
+
+        _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """샘플링으로 버려진 기록 수를 남기고, 큐에 남은 기록을 모두 출력한 뒤 리스너를 멈춥니다."""
+    global _listener
+    with _configure_lock:
+        if _listener is None:
+            return
+        log = get_logger(__name__)
+        for (logger_name, message), count in _sampler.pending().items():
+            log.info("🔇 Suppressed repeated log records", source=logger_name, message=message, count=count)
+        _listener.stop()
+        _listener = None
+        logging.getLogger().handlers = []
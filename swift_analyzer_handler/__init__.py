@@ -0,0 +1,3 @@
+from .swift_analyzer_handler import SwiftAnalyzerPool, SwiftAnalyzerError, SwiftAnalyzerInputError, analyze_files
+from .analyzer_cache import AnalyzerCache
+from .analyzer_result import AnalyzerResult
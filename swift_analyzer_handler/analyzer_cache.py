@@ -0,0 +1,115 @@
+import os
+import hashlib
+import threading
+from pathlib import Path
+
+
+class AnalyzerCache:
+    """분석기 결과를 디스크에 저장하는 내용 주소(content-addressed) 캐시.
+
+    키는 분석기 바이너리의 해시와 Swift 소스의 해시로 만들어지므로, 분석기를 다시 빌드하면
+    이전 결과는 자동으로 무효화됩니다. 전체 크기가 max_bytes를 넘으면 가장 오래 사용되지
+    않은 항목부터 삭제합니다 (파일 mtime 기준 LRU).
+    """
+
+    def __init__(self, cache_dir: Path, executable: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.executable = executable
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._binary_digest = None
+        self._total_bytes = None
+
+    def _get_binary_digest(self) -> str:
+        if self._binary_digest is None:
+            digest = hashlib.sha256()
+            try:
+                with open(self.executable, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(chunk)
+            except OSError:
+                # 바이너리를 읽을 수 없으면 경로만으로 구분 (분석 자체도 실패할 것이므로 캐시될 결과는 없음)
+                digest.update(str(self.executable).encode('utf-8'))
+            self._binary_digest = digest.hexdigest()
+        return self._binary_digest
+
+    def _entry_path(self, swift_code: str) -> Path:
+        digest = hashlib.sha256()
+        digest.update(self._get_binary_digest().encode('ascii'))
+        digest.update(b'\0')
+        digest.update(swift_code.encode('utf-8'))
+        key = digest.hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _ensure_total_bytes(self):
+        # 현재 캐시 크기는 처음 쓸 때 한 번만 스캔함
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*/*.json")) if self.cache_dir.exists() else 0
+
+    def get(self, swift_code: str) -> str | None:
+        path = self._entry_path(swift_code)
+        try:
+            result = path.read_text(encoding='utf-8')
+            os.utime(path)  # LRU 순서를 위해 최근 사용 시각 갱신
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, swift_code: str, result: str):
+        path = self._entry_path(swift_code)
+        data = result.encode('utf-8')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._ensure_total_bytes()
+            self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # 최대 크기의 90%까지 오래된 항목부터 삭제하여 매번 삭제가 일어나지 않도록 함
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for p in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = p.stat()
+                entries.append((stat.st_mtime, stat.st_size, p))
+            except OSError:
+                continue
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+                total -= size
+                self.evictions += 1
+            except OSError:
+                continue
+        self._total_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
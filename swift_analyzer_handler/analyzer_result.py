@@ -0,0 +1,41 @@
+import json
+
+
+class AnalyzerResult:
+    """분석기가 반환한 심볼 리스트를 담는 구조화된 결과.
+
+    분석기 출력(compact JSON)을 한 번 파싱해 파이프라인 끝까지 전달하고,
+    프롬프트/데이터셋용 들여쓰기 문자열은 처음 필요할 때 한 번만 만들어 재사용합니다.
+    """
+
+    __slots__ = ("symbols", "_compact", "_pretty")
+
+    def __init__(self, symbols: list[dict]):
+        self.symbols = symbols
+        self._compact = None
+        self._pretty = None
+
+    @classmethod
+    def from_json(cls, text: str) -> "AnalyzerResult":
+        """분석기 출력 JSON 문자열로부터 결과를 만듭니다. 심볼 배열이 아니면 ValueError를 발생시킵니다."""
+        symbols = json.loads(text)
+        if not isinstance(symbols, list):
+            raise ValueError(f"분석기 출력이 심볼 배열이 아닙니다: {type(symbols).__name__}")
+        return cls(symbols)
+
+    @property
+    def compact(self) -> str:
+        """캐시/해시용 compact JSON 문자열 (분석기 빌드와 무관하게 항상 같은 형식)."""
+        if self._compact is None:
+            self._compact = json.dumps(self.symbols, ensure_ascii=False, separators=(",", ":"))
+        return self._compact
+
+    @property
+    def pretty(self) -> str:
+        """프롬프트와 Alpaca input에 들어가는 들여쓰기 JSON 문자열."""
+        if self._pretty is None:
+            self._pretty = json.dumps(self.symbols, indent=2, ensure_ascii=False)
+        return self._pretty
+
+    def __repr__(self) -> str:
+        return f"AnalyzerResult({len(self.symbols)} symbols)"
@@ -0,0 +1,183 @@
+import os
+import json
+import queue
+import atexit
+import threading
+import subprocess
+
+from structured_log import get_logger
+from .analyzer_result import AnalyzerResult
+
+log = get_logger(__name__)
+
+
+class SwiftAnalyzerError(RuntimeError): pass
+
+
+class SwiftAnalyzerInputError(SwiftAnalyzerError):
+    """분석기가 ERR 응답을 반환한 경우 (입력 소스 문제이며 프로세스는 정상)."""
+
+
+class SwiftAnalyzerWorker:
+    """`--server --compact` 모드로 실행된 SwiftASTAnalyzer 프로세스 하나와 통신합니다.
+
+    요청은 "<바이트 수>\\n" + Swift 소스, 응답은 "OK|ERR <바이트 수>\\n" + 본문 형식입니다.
+    """
+
+    def __init__(self, executable: str, timeout: float):
+        self.timeout = timeout
+        self.process = subprocess.Popen(
+            [executable, "--server", "--compact"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def analyze(self, swift_code: str) -> str:
+        payload = swift_code.encode('utf-8')
+
+        # 응답이 timeout 안에 오지 않으면 프로세스를 종료시켜 블로킹 read를 해제함
+        timer = threading.Timer(self.timeout, self.process.kill)
+        timer.start()
+        try:
+            self.process.stdin.write(f"{len(payload)}\n".encode('ascii') + payload)
+            self.process.stdin.flush()
+
+            header = self.process.stdout.readline()
+            if not header:
+                raise SwiftAnalyzerError(f"분석기 프로세스가 응답 없이 종료되었습니다 (exit code: {self.process.poll()})")
+
+            status, _, size = header.decode('ascii', errors='replace').strip().partition(" ")
+            if status not in ("OK", "ERR") or not size.isdigit():
+                raise SwiftAnalyzerError(f"알 수 없는 응답 헤더: {header[:100]!r}")
+
+            data = self.process.stdout.read(int(size))
+            if len(data) != int(size):
+                # timeout으로 프로세스가 종료되면 본문이 중간에 끊김
+                raise SwiftAnalyzerError(f"분석기 응답이 잘렸습니다 ({len(data)}/{size} bytes)")
+            body = data.decode('utf-8')
+        except SwiftAnalyzerError:
+            raise
+        except Exception as e:
+            raise SwiftAnalyzerError(f"분석기 프로세스와 통신 실패: {e!r}") from e
+        finally:
+            timer.cancel()
+
+        if status == "ERR":
+            raise SwiftAnalyzerInputError(body)
+        return body
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+
+class SwiftAnalyzerPool:
+    """상주(long-lived) 분석기 프로세스 풀. 샘플마다 프로세스를 새로 띄우지 않고 재사용합니다."""
+
+    def __init__(self, executable: str, size: int | None = None, timeout: float = 30):
+        self.executable = executable
+        self.size = size or os.cpu_count() or 4
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._workers = []
+        atexit.register(self.close)
+
+    def _acquire(self) -> SwiftAnalyzerWorker:
+        self._slots.acquire()
+        try:
+            while True:
+                worker = self._idle.get_nowait()
+                if worker.alive:
+                    return worker
+                self._discard(worker)
+        except queue.Empty:
+            pass
+
+        try:
+            worker = SwiftAnalyzerWorker(self.executable, self.timeout)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _discard(self, worker: SwiftAnalyzerWorker):
+        worker.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def analyze(self, swift_code: str) -> str:
+        """Swift 소스를 분석하여 심볼 정보 compact JSON 문자열을 반환합니다. 실패 시 SwiftAnalyzerError를 발생시킵니다."""
+        worker = self._acquire()
+        try:
+            result = worker.analyze(swift_code)
+        except SwiftAnalyzerInputError:
+            # 입력 소스 문제로 실패한 정상 프로세스는 재사용
+            self._idle.put(worker)
+            raise
+        except BaseException:
+            # 상태를 알 수 없는 프로세스는 재사용하지 않음
+            self._discard(worker)
+            raise
+        else:
+            self._idle.put(worker)
+        finally:
+            self._slots.release()
+        return result
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+def analyze_files(executable: str, paths: list, timeout: float = 600) -> dict[str, AnalyzerResult]:
+    """`--batch` 모드로 여러 Swift 파일을 한 프로세스에서 병렬 분석합니다.
+
+    경로 문자열을 키로 분석 결과를 담은 딕셔너리를 반환합니다. 분석에 실패한 파일은 결과에서 빠집니다.
+    """
+    paths = [str(path) for path in paths]
+    if not paths:
+        return {}
+
+    # 파일이 많아도 인자 길이 제한에 걸리지 않도록 경로 목록은 stdin으로 전달
+    try:
+        completed = subprocess.run(
+            [executable, "--batch", "--files-from", "-"],
+            input="\n".join(paths).encode('utf-8'),
+            capture_output=True,
+            timeout=timeout
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise SwiftAnalyzerError(f"배치 분석 실행 실패: {e}") from e
+
+    if completed.returncode != 0:
+        raise SwiftAnalyzerError(
+            f"배치 분석기가 비정상 종료되었습니다 (exit code: {completed.returncode}): "
+            f"{completed.stderr.decode('utf-8', errors='replace')[:500]}"
+        )
+
+    results = {}
+    for line in completed.stdout.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "symbols" in record:
+            results[record["path"]] = AnalyzerResult(record["symbols"])
+        else:
+            log.warning("⚠️ Swift analyzer failed for file", path=record["path"], error=record.get("error"))
+    return results
@@ -1,8 +1,6 @@
-import time
-import re
+import os
+import sys
 import json
-import subprocess
-import tempfile
 from pathlib import Path
 from tqdm import tqdm
 import itertools
@@ -15,11 +13,49 @@ from prompts import (
 )
 from claude_handler.claude_handler import ClaudeHandler  # 코드 생성용
 from gemini_handler.gemini_handler import GeminiHandler  # 코드 생성 + 레이블 생성용
+from gemini_handler.async_gemini_handler import AsyncGeminiHandler
+from swift_analyzer_handler import SwiftAnalyzerPool, AnalyzerCache  # AST 분석용
+from pipeline import (
+    SymbolAnalyzer, Labeler, IncrementalAssembler, AIMDController, build_label_prompt, gemini_requester,
+    is_throttle_error, is_retryable, merge_jsonl_files
+)
+from retry_policy import RetryPolicy, RetryBudget
+from llm_cache import CacheMissError
+from llm_metrics import LLM_METRICS, metric_labels
+from tracing import TRACER, span, traced
+from structured_log import get_logger, configure_logging
+
+log = get_logger(__name__)
 
 # --- 테스트 전용 설정 ---
 ANALYZER_EXECUTABLE = "./SwiftASTAnalyzer/.build/release/SwiftASTAnalyzer"
 PATTERNS_FILE = "./patterns.json"
 OUTPUT_DIR = Path("./output")
+METRICS_DIR = OUTPUT_DIR / "metrics"
+LOG_FILE = OUTPUT_DIR / "logs" / "test.jsonl"
+# 상주 분석기 프로세스 풀 + 분석 결과 캐시 (소스 + 분석기 바이너리 해시 기반, 크기 제한 LRU)
+ANALYZER = SymbolAnalyzer(
+    SwiftAnalyzerPool(ANALYZER_EXECUTABLE),
+    AnalyzerCache(OUTPUT_DIR / "cache" / "analyzer", ANALYZER_EXECUTABLE)
+)
+# 데이터셋 조립 프로세스 수 (바뀐 파일이 많을 때만 프로세스 풀 사용)
+ASSEMBLY_WORKERS = int(os.getenv("ASSEMBLY_WORKERS", os.cpu_count() or 4))
+# Gemini 동시 요청 수 컨트롤러 (응답이 안정적이면 늘리고, 사용량 한도/시간 초과 시 절반으로 줄임)
+GEMINI_LIMITER = AIMDController("gemini", initial=3, max_limit=int(os.getenv("GEMINI_MAX_CONCURRENCY", 12)))
+# 현재 동시성 한도/진행 중 요청 수/한도 초과 횟수를 LLM 지표 파일에 게이지로 내보냄
+LLM_METRICS.register_gauges("llm_concurrency", {"provider": GEMINI_LIMITER.name}, GEMINI_LIMITER.gauge_values)
+# 라벨 요청의 재시도 정책: 요청당 최대 4회 시도, 10분 제한, 실행 전체 재시도 예산 (요청 5개당 1회 + 여유 50회)
+RETRY_BUDGET = RetryBudget(ratio=0.2, reserve=50)
+RETRY_POLICY = RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=60.0, throttle_delay=15.0, deadline=600.0,
+                           budget=RETRY_BUDGET, is_throttle=is_throttle_error, is_retryable=is_retryable,
+                           non_retryable=(CacheMissError,))
+# 모든 Gemini API 키에 요청을 분산하는 비동기 클라이언트 (키별 RPM/TPM 버킷 + 쿨다운)
+GEMINI_CLIENT = AsyncGeminiHandler()
+# 라벨 생성기 (Gemini)
+LABELER = Labeler(
+    gemini_requester(GEMINI_CLIENT, "Gemini label", retry_policy=RETRY_POLICY, limiter=GEMINI_LIMITER),
+    GeminiHandler.generation_config
+)
 
 # 테스트 디렉토리 기본 경로 (기존 구조와 동일)
 TEST_BASE_DIR = OUTPUT_DIR / "generated_code" / "test"
@@ -68,8 +104,21 @@ def get_test_project_paths(project_name: str) -> dict:
     }
 
 
+def has_valid_label(label_path: Path) -> bool:
+    """라벨 파일이 존재하고 유효한 JSON인지 확인합니다."""
+    try:
+        if label_path.exists() and label_path.stat().st_size > 10:
+            content = label_path.read_text(encoding='utf-8').strip()
+            if content:
+                json.loads(content)  # JSON 유효성 검사
+                return True
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError):
+        pass
+    return False
+
+
 def discover_existing_test_files():
-    """모든 테스트 프로젝트에서 기존 Swift 파일들을 발견합니다."""
+    """모든 테스트 프로젝트에서 아직 라벨이 없는 기존 Swift 파일들을 발견합니다."""
     test_tasks = []
     test_projects = get_test_projects()
 
@@ -82,220 +131,30 @@ def discover_existing_test_files():
             continue
 
         swift_files = list(project_code_dir.glob("*.swift"))
-        print(f"  - {project}: {len(swift_files)}개의 Swift 파일 발견")
+        # 이미 유효한 라벨이 있는 파일은 분석/라벨링 대상에서 제외
+        labels_dir = get_test_project_paths(project)["labels"]
+        unlabeled = [swift_file for swift_file in swift_files if not has_valid_label(labels_dir / f"{swift_file.stem}.json")]
+        print(f"  - {project}: {len(swift_files)}개의 Swift 파일 발견, {len(unlabeled)}개 라벨 없음")
+
+        # 라벨이 없는 파일들을 분석기 프로세스 하나로 한 번에 분석 (캐시에 있는 파일은 제외)
+        symbols_by_path = ANALYZER.analyze_files(unlabeled)
 
-        for swift_file in swift_files:
+        for swift_file in unlabeled:
             task_name = swift_file.stem
             test_tasks.append({
                 "project": project,
                 "filename": task_name,
                 "file_path": swift_file,
+                "symbol_info": symbols_by_path.get(str(swift_file)),
                 "type": "Existing_Code"
             })
 
     return test_tasks
 
 
-def extract_json_block(text: str) -> str | None:
-    """텍스트에서 JSON 블록을 안전하게 추출합니다."""
-    if not text or not isinstance(text, str):
-        return None
-
-    text = text.strip()
-
-    # 1. ```json ... ``` 블록 검색
-    json_block_patterns = [
-        r"```json\s*(\{.*?\})\s*```",
-        r"```\s*(\{.*?\})\s*```",
-        r"```json\s*([\s\S]*?)\s*```",
-        r"```\s*([\s\S]*?)\s*```"
-    ]
-
-    for pattern in json_block_patterns:
-        try:
-            match = re.search(pattern, text, re.DOTALL | re.MULTILINE)
-            if match:
-                json_candidate = match.group(1).strip()
-                if json_candidate and validate_and_return_json(json_candidate):
-                    return json_candidate
-        except Exception:
-            continue
-
-    # 2. 블록 마커 없이 JSON 객체 찾기
-    return extract_json_from_text(text)
-
-
-def extract_json_from_text(text: str) -> str | None:
-    """텍스트에서 유효한 JSON 객체를 추출합니다."""
-    try:
-        # 줄별로 처리하여 JSON 시작점 찾기
-        lines = text.split('\n')
-        json_start_line = -1
-
-        # JSON이 시작될 것 같은 라인 찾기
-        for i, line in enumerate(lines):
-            stripped_line = line.strip()
-            if stripped_line.startswith('{'):
-                json_start_line = i
-                break
-
-        if json_start_line == -1:
-            return None
-
-        # JSON 끝점 찾기 (중괄호 균형)
-        brace_count = 0
-        json_lines = []
-
-        for i in range(json_start_line, len(lines)):
-            line = lines[i]
-            json_lines.append(line)
-
-            for char in line:
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-
-            if brace_count == 0 and len(json_lines) > 0:
-                # JSON 객체가 완성됨
-                json_text = '\n'.join(json_lines)
-                return validate_and_return_json(json_text.strip())
-
-        # 중괄호가 균형을 이루지 못한 경우, 전체 텍스트에서 JSON 시도
-        return validate_and_return_json(text)
-
-    except Exception:
-        return None
-
-
-def validate_and_return_json(json_text: str) -> str | None:
-    """JSON 텍스트의 유효성을 검사하고 반환합니다."""
-    if not json_text:
-        return None
-
-    try:
-        # 앞뒤 공백 및 특수문자 제거
-        json_text = json_text.strip()
-
-        # JSON 파싱 시도
-        parsed = json.loads(json_text)
-
-        # 기대하는 구조 확인 (reasoning, identifiers 필드)
-        if isinstance(parsed, dict) and "reasoning" in parsed and "identifiers" in parsed:
-            # 유효한 JSON이므로 원본 반환 (포맷팅 보존)
-            return json_text
-
-    except (json.JSONDecodeError, TypeError, AttributeError) as e:
-        # JSON 파싱 실패 - 일반적인 문제들을 수정 시도
-        try:
-            # 흔한 문제들 수정
-            fixed_json = fix_common_json_issues(json_text)
-            if fixed_json and fixed_json != json_text:
-                parsed = json.loads(fixed_json)
-                if isinstance(parsed, dict) and "reasoning" in parsed and "identifiers" in parsed:
-                    return fixed_json
-        except Exception:
-            pass
-
-    return None
-
-
-def fix_common_json_issues(json_text: str) -> str:
-    """일반적인 JSON 형식 문제들을 수정합니다."""
-    if not json_text:
-        return json_text
-
-    try:
-        # 1. 앞뒤 불필요한 문자 제거
-        json_text = json_text.strip()
-
-        # 2. 시작과 끝이 중괄호가 아닌 경우 찾기
-        start_idx = json_text.find('{')
-        end_idx = json_text.rfind('}')
-
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            json_text = json_text[start_idx:end_idx + 1]
-
-        # 3. 따옴표 문제 수정 (단순한 경우만)
-        json_text = re.sub(r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3', json_text)
-
-        # 4. 후행 쉼표 제거
-        json_text = re.sub(r',(\s*[}\]])', r'\1', json_text)
-
-        return json_text
-
-    except Exception:
-        return json_text
-
-
-def run_swift_analyzer_on_code(swift_code: str) -> str | None:
-    """Swift 코드를 임시 파일에 저장하고 분석기를 실행하여 심볼 정보를 반환합니다."""
-    if not swift_code or not swift_code.strip():
-        return None
-
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_file_path = Path(temp_dir) / "temp.swift"
-            temp_file_path.write_text(swift_code, encoding='utf-8')
-            command = [ANALYZER_EXECUTABLE, str(temp_file_path.absolute())]
-
-            process = subprocess.run(
-                command,
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding='utf-8',
-                timeout=30
-            )
-            return process.stdout.strip() if process.stdout else None
-
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, Exception) as e:
-        print(f"  ⚠️ Swift analyzer failed: {e}")
-        return None
-
-
-def create_alpaca_input(swift_code: str, symbol_info_json: str) -> str:
-    """모델이 학습할 Input 필드를 형식에 맞게 생성합니다."""
-    try:
-        symbol_info_pretty = json.dumps(json.loads(symbol_info_json), indent=2, ensure_ascii=False)
-    except (json.JSONDecodeError, TypeError):
-        symbol_info_pretty = symbol_info_json
-
-    return f"""**Swift Source Code:**
-```swift
-{swift_code}
-```
-
-**AST Symbol Information (JSON):**
-```
-{symbol_info_pretty}
-```"""
-
-
-def safe_gemini_label_request(prompt: str, max_retries: int = 3) -> str:
-    """Gemini API 요청을 안전하게 처리합니다 (레이블 생성용)."""
-    for attempt in range(max_retries):
-        try:
-            prompt_config = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "parts": [prompt]
-                    }
-                ]
-            }
-            response = GeminiHandler.ask(prompt_config, model_name="gemini-2.5-pro")
-            if response and response.strip():
-                return response.strip()
-        except Exception as e:
-            print(f"  ⚠️ Gemini label request attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-    return ""
-
-
-def process_existing_test_file(test_task: dict):
-    """기존 테스트 파일을 처리하여 라벨을 생성합니다."""
+@traced("prepare_existing_test_file")
+def prepare_existing_test_file(test_task: dict) -> dict | None:
+    """기존 테스트 파일의 AST를 분석하고 입력 프롬프트를 저장합니다. 이미 처리되었거나 실패하면 None을 반환합니다."""
     project = test_task["project"]
     filename = test_task["filename"]
     file_path = test_task["file_path"]
@@ -306,270 +165,134 @@ def process_existing_test_file(test_task: dict):
     label_path = paths["labels"] / f"{filename}.json"
 
     # 이미 유효한 라벨이 있으면 스킵
-    try:
-        if label_path.exists() and label_path.stat().st_size > 10:
-            content = label_path.read_text(encoding='utf-8').strip()
-            if content:
-                json.loads(content)  # JSON 유효성 검사
-                print(f"  - [TEST/{project}] `{filename}` - 이미 처리됨, 스킵")
-                return
-    except (json.JSONDecodeError, UnicodeDecodeError, OSError):
-        pass
+    if has_valid_label(label_path):
+        log.debug("➡️ 이미 처리됨, 스킵", sample=f"{project}/{filename}")
+        return None
 
-    print(f"  - [TEST/{project}] `{filename}` 처리 중...")
+    log.info("🔄 처리 중", sample=f"{project}/{filename}")
 
     # Swift 코드 읽기
     try:
         swift_code = code_path.read_text(encoding='utf-8')
         if not swift_code or not swift_code.strip():
-            print(f"    ❌ Swift 코드가 비어있음")
-            return
+            log.error("❌ Swift 코드가 비어있음", sample=f"{project}/{filename}")
+            return None
     except Exception as e:
-        print(f"    ❌ Swift 코드 읽기 실패: {e}")
-        return
+        log.error("❌ Swift 코드 읽기 실패", sample=f"{project}/{filename}", error=repr(e))
+        return None
 
-    # AST 분석
-    symbol_info_json = run_swift_analyzer_on_code(swift_code)
-    if not symbol_info_json:
-        print(f"    ❌ Swift analyzer 실패 또는 유효하지 않은 JSON 반환")
-        return
+    # AST 분석 (파일 검색 단계에서 배치 분석된 결과가 있으면 사용)
+    symbol_info = test_task.get("symbol_info") or ANALYZER.analyze(swift_code)
+    if not symbol_info:
+        log.error("❌ Swift analyzer 실패 또는 유효하지 않은 JSON 반환", sample=f"{project}/{filename}")
+        return None
 
     # 라벨 생성용 프롬프트 생성 및 저장
     try:
-        label_prompt = f"""You are an expert security code auditor.
-Your task is to identify all sensitive identifiers in the provided Swift code and explain your reasoning.
-Analyze both the source code and its corresponding AST symbol information.
-
-**Swift Source Code:**
-```swift
-{swift_code}
-```
-
-**AST Symbol Information (JSON):**
-```json
-{symbol_info_json}
-```
-
-Based on your analysis, provide your response as a JSON object with two keys: "reasoning" and "identifiers".
-
-"reasoning": A brief step-by-step explanation of why the identified identifiers are considered sensitive. For secure code, explain why it is safe.
-
-"identifiers": A JSON list of strings containing only the simple base name of each sensitive identifier. For secure code, this should be an empty list [].
-
-Example for vulnerable code:
-```json
-{{
-  "reasoning": "The `save` function is sensitive because it calls the `SecItemAdd` Keychain API. The `secretToken` variable holds the data being saved.",
-  "identifiers": ["save", "secretToken"]
-}}
-```
+        label_prompt = build_label_prompt(swift_code, symbol_info)
+        input_path.write_text(label_prompt, encoding='utf-8')
+    except Exception as e:
+        log.error("❌ 입력 프롬프트 저장 실패", sample=f"{project}/{filename}", error=repr(e))
+        return None
 
-Example for secure code:
-```json
-{{
-  "reasoning": "This code correctly uses the Keychain to store secrets, which is a security best practice. Therefore, no sensitive identifiers were found.",
-  "identifiers": []
-}}
-```
+    return {
+        "name": f"{project}/{filename}",
+        "filename": filename,
+        "code": swift_code,
+        "symbols": symbol_info,
+        "label_prompt": label_prompt,
+        "input_path": input_path,
+        "label_path": label_path
+    }
 
-Your response must be ONLY the JSON object, following these rules exactly."""
 
-        input_path.write_text(label_prompt, encoding='utf-8')
-    except Exception as e:
-        print(f"    ❌ 입력 프롬프트 저장 실패: {e}")
+@traced("process_existing_test_files")
+def process_existing_test_files(test_tasks: list[dict]):
+    """기존 테스트 파일 여러 개를 준비한 뒤, 배치 요청으로 라벨을 생성합니다."""
+    samples = [sample for sample in map(prepare_existing_test_file, test_tasks) if sample]
+    if not samples:
         return
 
     # 라벨 생성 (Gemini 사용)
-    success = False
-    final_output_json_str = ""
-
-    for attempt in range(3):
-        try:
-            raw_response = safe_gemini_label_request(label_prompt)
-            if not raw_response:
-                print(f"    ⚠️ Empty response for {project}/{filename}, attempt {attempt + 1}")
-                continue
+    prompts = {}
+    with metric_labels(stage="label", generator="gemini", task_type="test"):
+        labels = LABELER.generate_batched(samples, prompts)
 
-            print(f"    🔍 Raw response length for {project}/{filename}: {len(raw_response)} chars")
-
-            # 여러 방법으로 JSON 추출 시도
-            json_candidates = []
-
-            # 방법 1: 기존 extract_json_block
-            extracted_json = extract_json_block(raw_response)
-            if extracted_json:
-                json_candidates.append(extracted_json)
-
-            # 방법 2: 간단한 중괄호 찾기
-            start = raw_response.find('{')
-            end = raw_response.rfind('}')
-            if start != -1 and end != -1 and end > start:
-                simple_json = raw_response[start:end + 1]
-                if simple_json not in json_candidates:
-                    json_candidates.append(simple_json)
-
-            # 각 후보에 대해 검증
-            for candidate in json_candidates:
-                try:
-                    output_data = json.loads(candidate)
-                    if isinstance(output_data, dict) and "reasoning" in output_data and "identifiers" in output_data:
-                        final_output_json_str = json.dumps(output_data, ensure_ascii=False, indent=2)
-                        success = True
-                        print(f"    ✅ JSON successfully parsed for {project}/{filename}")
-                        break
-                except json.JSONDecodeError as e:
-                    print(f"    ⚠️ JSON candidate failed for {project}/{filename}: {e}")
-                    continue
-
-            if success:
-                break
-            else:
-                print(f"    ❌ All JSON candidates failed for {project}/{filename}, attempt {attempt + 1}")
-                print(f"    📄 Response preview: {raw_response[:200]}...")
-                time.sleep(2)
+    for sample in samples:
+        label_path = sample["label_path"]
+        final_output_json_str = labels.get(sample["name"])
 
-        except Exception as e:
-            print(f"    ⚠️ Unexpected error for {project}/{filename}, attempt {attempt + 1}: {e}")
-            time.sleep(2)
+        if not final_output_json_str:
+            log.error("❌ Label generation failed", sample=sample["name"])
+            try:
+                label_path.write_text('{"error": "generation_failed"}', encoding='utf-8')
+            except Exception:
+                pass
+            continue
 
-    if not success:
-        print(f"    ❌ Label generation failed for {project}/{filename} after 3 attempts.")
+        # 최종 저장 (입력 프롬프트는 레이블을 실제로 얻은 프롬프트로 갱신, 배치 프롬프트일 수 있음)
         try:
-            label_path.write_text('{"error": "generation_failed"}', encoding='utf-8')
-        except Exception:
-            pass
-        return
-
-    # 최종 저장
-    try:
-        label_path.write_text(final_output_json_str, encoding='utf-8')
-        print(f"    ✅ `{filename}` 처리 완료")
-    except Exception as e:
-        print(f"    ❌ 라벨 저장 실패: {e}")
-        return
+            if sample["name"] in prompts:
+                sample["input_path"].write_text(prompts[sample["name"]], encoding='utf-8')
+            label_path.write_text(final_output_json_str, encoding='utf-8')
+            log.info("✅ 처리 완료", sample=sample["name"])
+        except Exception as e:
+            log.error("❌ 라벨 저장 실패", sample=sample["name"], error=repr(e))
 
 
 def assemble_test_datasets():
-    """테스트 프로젝트별로 최종 데이터셋을 조립합니다."""
+    """테스트 프로젝트별로 최종 데이터셋을 조립합니다.
+
+    지난 조립 이후 바뀐 라벨/코드 파일만 다시 조립하여 기존 test_<project>_dataset.jsonl에 합치고,
+    전체 데이터셋은 프로젝트별 파일을 이어 붙여 만듭니다.
+    """
     print("\n📦 테스트 데이터셋 조립 중...")
 
     test_projects = get_test_projects()
-    all_test_data = []
     project_counts = {}
+    project_datasets = []
 
-    for project in test_projects:
-        print(f"\n  - {project} 프로젝트 처리 중...")
-
-        paths = get_test_project_paths(project)
-        label_files = sorted(list(paths["labels"].glob("*.json")))
-
-        if not label_files:
-            print(f"    라벨 파일 없음")
-            project_counts[project] = 0
-            continue
+    with IncrementalAssembler(ANALYZER, max_workers=ASSEMBLY_WORKERS) as assembler:
+        for project in test_projects:
+            print(f"\n  - {project} 프로젝트 처리 중...")
 
-        project_data = []
-        success_count = 0
-        error_count = 0
+            paths = get_test_project_paths(project)
+            if not any(paths["labels"].glob("*.json")):
+                print(f"    라벨 파일 없음")
+                project_counts[project] = 0
+                continue
 
-        for label_path in tqdm(label_files, desc=f"{project} 데이터셋 조립"):
+            project_dataset_file = OUTPUT_DIR / f"test_{project}_dataset.jsonl"
             try:
-                # 유효한 JSON 파일인지 확인
-                try:
-                    if not label_path.exists() or label_path.stat().st_size <= 10:
-                        error_count += 1
-                        continue
-                    content = label_path.read_text(encoding='utf-8').strip()
-                    if not content or content == "":
-                        error_count += 1
-                        continue
-                    json.loads(content)  # JSON 유효성 검사
-                except (json.JSONDecodeError, UnicodeDecodeError, OSError):
-                    error_count += 1
-                    continue
-
-                code_path = paths["code"] / (label_path.stem + ".swift")
-                input_path = paths["inputs"] / (label_path.stem + ".txt")
-
-                if not code_path.exists() or not input_path.exists():
-                    error_count += 1
-                    continue
-
-                swift_code = code_path.read_text(encoding='utf-8')
-                if not swift_code or not swift_code.strip():
-                    error_count += 1
-                    continue
-
-                output_json_str = label_path.read_text(encoding='utf-8')
-                input_prompt = input_path.read_text(encoding='utf-8')
-
-                # input 프롬프트에서 symbol_info를 추출
-                symbol_info_json = None
-                if "AST Symbol Information (JSON):" in input_prompt:
-                    match = re.search(r'AST Symbol Information \(JSON\):\s*```\s*(.*?)\s*```', input_prompt, re.DOTALL)
-                    if match:
-                        symbol_info_json = match.group(1).strip()
-
-                # 만약 추출에 실패하면 Swift analyzer 다시 실행
-                if not symbol_info_json:
-                    symbol_info_json = run_swift_analyzer_on_code(swift_code)
-                    if not symbol_info_json:
-                        error_count += 1
-                        continue
-
-                # JSON 파싱 검증
-                try:
-                    symbol_info_dict = json.loads(symbol_info_json)
-                    output_dict = json.loads(output_json_str)
-                except json.JSONDecodeError:
-                    error_count += 1
-                    continue
-
-                # 최종 데이터셋 엔트리 생성
-                entry = {
-                    "instruction": "In the following Swift code, find all identifiers related to sensitive logic. Provide the names and reasoning as a JSON object.",
-                    "input": create_alpaca_input(swift_code, symbol_info_json),
-                    "output": output_json_str
-                }
-
-                project_data.append(entry)
-                all_test_data.append(entry)
-                success_count += 1
-
+                stats = assembler.assemble(paths["code"], paths["inputs"], paths["labels"], project_dataset_file)
             except Exception as e:
-                error_count += 1
-                print(f"\n⚠️ 파일 조립 중 에러 발생 '{label_path.name}': {e}")
-
-        project_counts[project] = success_count
-        print(f"    {success_count}개 성공, {error_count}개 실패")
+                print(f"    ❌ 프로젝트 데이터셋 조립 실패: {e}")
+                project_counts[project] = 0
+                continue
 
-        # 프로젝트별 데이터셋 파일 저장
-        if project_data:
-            try:
-                project_dataset_file = OUTPUT_DIR / f"test_{project}_dataset.jsonl"
-                with open(project_dataset_file, "w", encoding="utf-8") as f:
-                    for entry in project_data:
-                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            project_counts[project] = stats["entries"]
+            print(f"    {stats['entries']}개 성공 ({stats['rebuilt']}개 새로 조립, {stats['reused']}개 재사용), "
+                  f"{stats['errors']}개 실패")
+            if stats["entries"]:
+                project_datasets.append(project_dataset_file)
                 print(f"    저장됨: {project_dataset_file}")
-            except Exception as e:
-                print(f"    ❌ 프로젝트 데이터셋 저장 실패: {e}")
 
     # 전체 테스트 데이터셋 저장
-    if all_test_data:
+    total_count = 0
+    if project_datasets:
         try:
             all_test_dataset_file = OUTPUT_DIR / "all_test_dataset.jsonl"
-            with open(all_test_dataset_file, "w", encoding="utf-8") as f:
-                for entry in all_test_data:
-                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            total_count = merge_jsonl_files(project_datasets, all_test_dataset_file)
             print(f"\n전체 테스트 데이터셋 저장됨: {all_test_dataset_file}")
         except Exception as e:
             print(f"\n❌ 전체 테스트 데이터셋 저장 실패: {e}")
 
-    return project_counts, len(all_test_data)
+    return project_counts, total_count
 
 
 def main_test_existing_pipeline():
     """기존 테스트 파일들을 처리하는 파이프라인"""
+    configure_logging(LOG_FILE)
     print("🧪 기존 테스트 Swift 파일 처리 파이프라인 시작...")
 
     # 테스트 프로젝트별 디렉토리 생성
@@ -587,31 +310,55 @@ def main_test_existing_pipeline():
         for path in paths.values():
             path.mkdir(parents=True, exist_ok=True)
 
-    # 1. 기존 테스트 파일들 발견
+    # 1. 라벨이 없는 기존 테스트 파일들 발견
     test_tasks = discover_existing_test_files()
-    if not test_tasks:
-        print("❌ 처리할 Swift 파일을 찾을 수 없습니다!")
-        return
-
-    print(f"\n총 {len(test_tasks)}개의 기존 Swift 파일 발견")
-
-    # 2. 병렬 처리로 샘플 생성
-    print("\n🔄 기존 Swift 파일들 처리 시작...")
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        list(tqdm(
-            executor.map(process_existing_test_file, test_tasks),
-            total=len(test_tasks),
-            desc="기존 Swift 파일 처리 중"
-        ))
+    LLM_METRICS.open(METRICS_DIR / "llm_calls_test.jsonl")
+    # 실행 중에도 동시성 한도 변화를 볼 수 있도록 Prometheus 파일을 주기적으로 갱신
+    LLM_METRICS.start_export(METRICS_DIR / "llm_metrics_test.prom")
+
+    if test_tasks:
+        print(f"\n총 {len(test_tasks)}개의 라벨이 없는 Swift 파일 발견")
+
+        # 2. 병렬 처리로 샘플 생성 (여러 파일을 묶어 배치 라벨 요청)
+        # 워커는 최대 한도만큼 두고, 실제 동시 요청 수는 GEMINI_LIMITER가 조절
+        print("\n🔄 기존 Swift 파일들 처리 시작...")
+        batch_size = LABELER.batch_size
+        task_batches = [test_tasks[i:i + batch_size] for i in range(0, len(test_tasks), batch_size)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=GEMINI_LIMITER.max_limit) as executor:
+            list(tqdm(
+                executor.map(process_existing_test_files, task_batches),
+                total=len(task_batches),
+                desc=f"기존 Swift 파일 처리 중 (배치당 최대 {batch_size}개)"
+            ))
+    else:
+        # 모든 파일에 라벨이 있어도 새로 바뀐 파일이 있을 수 있으므로 조립은 진행
+        print("\n➡️ 라벨이 필요한 Swift 파일이 없습니다. 데이터셋 조립만 진행합니다.")
 
     # 3. 최종 데이터셋 조립
-    project_counts, total_count = assemble_test_datasets()
+    with span("assemble_test_datasets"):
+        project_counts, total_count = assemble_test_datasets()
 
     # 4. 결과 출력
     print(f"\n✅ 기존 테스트 파일 처리 파이프라인 완료!")
     for project, count in project_counts.items():
         print(f"   - {project}: {count}개 데이터")
     print(f"   - 총 테스트 데이터: {total_count}개 생성 완료")
+    cache_stats = ANALYZER.stats()
+    print(f"   - 분석기 캐시: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+          f"{cache_stats['evictions']} evictions (hit rate {cache_stats['hit_rate']:.1%})")
+    limiter_stats = GEMINI_LIMITER.stats()
+    print(f"   - Gemini 동시 요청 한도: {limiter_stats['limit']} (최대 {limiter_stats['peak_limit']}), "
+          f"{limiter_stats['successes']} 성공, {limiter_stats['throttles']} 한도 초과")
+    budget = RETRY_BUDGET.stats()
+    print(f"   - 재시도: {budget['requests']}개 요청에 {budget['retries']}회, 예산 초과로 {budget['denied']}회 거부")
+    LLM_METRICS.write_prometheus(METRICS_DIR / "llm_metrics_test.prom")
+    LLM_METRICS.close()
+    for (stage,), totals in LLM_METRICS.summary(("stage",)).items():
+        print(f"   - LLM 호출 [{stage}]: {totals['calls']}회 ({totals['retries']}회 재시도), "
+              f"입력 {totals['input_tokens']} / 출력 {totals['output_tokens']} 토큰, 예상 비용 ${totals['cost_usd']:.4f}")
+    # TRACE_FILE 환경 변수가 있으면 실행 구간을 Chrome trace-event JSON으로 저장
+    if TRACER.enabled:
+        print(f"   - 실행 구간 추적: {TRACER.write_chrome_trace()}")
 
     # 저장된 파일들 정리
     print(f"\n📄 생성된 데이터셋 파일들:")
@@ -621,6 +368,13 @@ def main_test_existing_pipeline():
     if total_count > 0:
         print(f"   - all_test_dataset.jsonl")
 
+    # replay(오프라인) 모드에서는 캐시 미스가 하나라도 있으면 실패로 처리
+    cache_stats = GeminiHandler.response_cache.stats()
+    print(f"\n🗄️ Gemini 응답 캐시 ({cache_stats['mode']}): {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    if cache_stats['mode'] == "replay" and cache_stats['misses']:
+        print("❌ replay 모드: 응답 캐시에 없는 LLM 요청이 있습니다.")
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main_test_existing_pipeline()
\ No newline at end of file
@@ -0,0 +1 @@
+from .tracing import Tracer, TRACER, span, traced
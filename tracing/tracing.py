@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import asyncio
+import functools
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+
+class Tracer:
+    """파이프라인 단계별 실행 구간(span)을 기록하고 Chrome trace-event JSON으로 내보냅니다.
+
+    - 비활성 상태에서는 span()이 아무것도 기록하지 않으므로 항상 감싸 두어도 비용이 거의 없음
+    - 스레드마다 별도의 트랙에 기록되며, asyncio 태스크 안의 구간은 태스크별 트랙에 기록됨
+      (같은 이벤트 루프 스레드에서 겹쳐 실행되는 요청이 서로 섞이지 않도록)
+    - 내보낸 파일은 chrome://tracing 또는 https://ui.perfetto.dev 에서 타임라인(flamegraph)으로 볼 수 있음
+    """
+
+    def __init__(self, path: Path | None = None, max_events: int = 500_000):
+        self.path = Path(path) if path else None
+        self.max_events = max_events
+        self.dropped = 0
+        self._events = []
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """TRACE_FILE 환경 변수가 있으면 해당 경로로 내보내는 활성 상태의 Tracer를 만듭니다."""
+        path = os.getenv("TRACE_FILE")
+        return cls(Path(path) if path else None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def enable(self, path: Path):
+        self.path = Path(path)
+
+    def _track(self) -> int:
+        """현재 실행 위치의 트랙 번호(tid)를 반환하고, 처음 보는 트랙이면 이름을 등록합니다."""
+        thread = threading.current_thread()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        track, name = (id(task), f"{thread.name} / {task.get_name()}") if task else (thread.ident, thread.name)
+        if track not in self._tracks:
+            with self._lock:
+                self._tracks.setdefault(track, name)
+        return track
+
+    @contextmanager
+    def span(self, name: str, category: str = "pipeline", **args):
+        """with 블록의 실행 구간을 기록합니다. 블록에서 예외가 발생하면 args에 error가 추가됩니다."""
+        if not self.enabled:
+            yield
+            return
+        track = self._track()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            end = time.perf_counter_ns()
+            event = {
+                "name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": track,
+                "ts": (start - self._origin) / 1000, "dur": (end - start) / 1000,
+            }
+            if args:
+                event["args"] = {key: value if isinstance(value, (int, float, bool)) else str(value)
+                                 for key, value in args.items()}
+            with self._lock:
+                if len(self._events) < self.max_events:
+                    self._events.append(event)
+                else:
+                    self.dropped += 1
+
+    def traced(self, name: str | None = None, category: str = "pipeline"):
+        """함수 전체를 span으로 감싸는 데코레이터 (코루틴 함수도 지원)."""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name, category):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def write_chrome_trace(self, path: Path | None = None) -> Path:
+        """기록된 구간을 Chrome trace-event 형식(JSON Object Format)으로 저장하고 경로를 반환합니다."""
+        path = Path(path or self.path)
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            tracks = dict(self._tracks)
+
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "alpaca-pipeline"}}]
+        metadata += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": track, "args": {"name": track_name}}
+            for track, track_name in tracks.items()
+        ]
+        trace = {"traceEvents": metadata + events, "displayTimeUnit": "ms",
+                 "otherData": {"dropped_events": self.dropped}}
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(trace, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    def durations(self) -> dict[str, list[float]]:
+        """구간 이름별 소요 시간(초) 목록. 벤치마크에서 백분위수를 계산하는 데 사용합니다."""
+        result = {}
+        with self._lock:
+            for event in self._events:
+                result.setdefault(event["name"], []).append(event["dur"] / 1e6)
+        return result
+
+    def clear(self):
+        """기록된 구간을 모두 지웁니다 (트랙 이름은 유지)."""
+        with self._lock:
+            self._events.clear()
+            self.dropped = 0
+
+    def summary(self) -> dict[str, dict]:
+        """구간 이름별 {count, total(초), max(초)}를 총 소요 시간이 긴 순서로 반환합니다."""
+        result = {}
+        with self._lock:
+            for event in self._events:
+                totals = result.setdefault(event["name"], {"count": 0, "total": 0.0, "max": 0.0})
+                seconds = event["dur"] / 1e6
+                totals["count"] += 1
+                totals["total"] += seconds
+                totals["max"] = max(totals["max"], seconds)
+        return dict(sorted(result.items(), key=lambda item: item[1]["total"], reverse=True))
+
+
+# 모든 모듈이 공유하는 기본 Tracer (TRACE_FILE 환경 변수 또는 Tracer.enable로 활성화)
+TRACER = Tracer.from_env()
+
+
+def span(name: str, category: str = "pipeline", **args):
+    """기본 Tracer에 구간을 기록합니다."""
+    return TRACER.span(name, category, **args)
+
+
+def traced(name: str | None = None, category: str = "pipeline"):
+    """기본 Tracer로 함수 전체를 기록하는 데코레이터."""
+    return TRACER.traced(name, category)